@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from benchmarks import load, micro
+from benchmarks.harness import compare, load_baseline, report, save_baseline
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Micro-benchmarks and load tests against a deterministic fake exchange')
+    parser.add_argument('--suite', choices=['micro', 'load', 'all'], default='all')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed p50/throughput slowdown (0.5 = 50%%)')
+    parser.add_argument('--p99-tolerance', type=float, default=1.0, help='allowed p99 slowdown')
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--scale', type=float, default=1.0, help='iteration multiplier for micro-benchmarks')
+    parser.add_argument('--requests', type=int, default=300, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--ws-clients', type=int, default=200)
+    parser.add_argument('--ws-duration', type=float, default=5.0)
+    parser.add_argument('--latency', type=float, default=0.0, help='fake exchange latency per call (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fake exchange network error probability')
+    args = parser.parse_args()
+
+    results = []
+    if args.suite in ('micro', 'all'):
+        results += micro.run(args.symbols, args.scale)
+    if args.suite in ('load', 'all'):
+        results += asyncio.run(load.run(args.symbols, args.requests, args.concurrency, args.ws_clients,
+                                        args.ws_duration, args.latency, args.error_rate))
+
+    summaries = {result.name: result.summary() for result in results}
+    baseline = load_baseline(args.baseline)
+    print(report(summaries, baseline))
+
+    if args.update_baseline:
+        merged = {**baseline.get('results', {}), **summaries}
+        save_baseline(args.baseline, merged)
+        print(f"\nbaseline updated: {args.baseline}")
+        return 0
+
+    regressions = compare(summaries, baseline, args.tolerance, args.p99_tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
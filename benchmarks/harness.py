@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import platform
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+class Result:
+    """نتیجه یک بنچمارک: نمونه‌های تأخیر (ثانیه) و توان عملیاتی"""
+
+    def __init__(self, name: str, samples: List[float], elapsed: float, operations: Optional[int] = None,
+                 errors: int = 0):
+        self.name = name
+        self.samples = samples
+        self.elapsed = elapsed
+        self.operations = len(samples) if operations is None else operations
+        self.errors = errors
+
+    def summary(self) -> Dict:
+        values = np.asarray(self.samples, dtype=np.float64) if self.samples else np.zeros(1)
+        return {
+            'operations': self.operations,
+            'errors': self.errors,
+            'throughput': self.operations / self.elapsed if self.elapsed > 0 else 0.0,
+            'p50_ms': float(np.percentile(values, 50)) * 1000,
+            'p99_ms': float(np.percentile(values, 99)) * 1000
+        }
+
+def measure(name: str, fn: Callable[[], object], iterations: int, warmup: int = 3) -> Result:
+    """اجرای متوالی یک تابع sync و ثبت زمان هر اجرا"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return Result(name, samples, time.perf_counter() - started)
+
+async def measure_async(name: str, fn: Callable[[], Awaitable[object]], requests: int, concurrency: int = 1,
+                        warmup: int = 3) -> Result:
+    """اجرای هم‌زمان یک کوروتین با concurrency کارگر تا requests درخواست"""
+    for _ in range(warmup):
+        await fn()
+    samples: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            try:
+                await fn()
+            except Exception:
+                errors += 1
+            samples.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return Result(name, samples, time.perf_counter() - started, errors=errors)
+
+# ---------- baseline ----------
+
+def load_baseline(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_baseline(path: str, summaries: Dict[str, Dict]):
+    data = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor() or platform.machine()},
+        'results': summaries
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def compare(summaries: Dict[str, Dict], baseline: Dict, tolerance: float = 0.5, p99_tolerance: float = 1.0) -> List[str]:
+    """پسرفت‌ها نسبت به baseline (p50 و p99 کندتر یا توان عملیاتی کمتر از حد مجاز، یا خطای جدید)"""
+    regressions = []
+    for name, current in summaries.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        checks = (
+            ('p50_ms', current['p50_ms'] > previous['p50_ms'] * (1 + tolerance)),
+            ('p99_ms', current['p99_ms'] > previous['p99_ms'] * (1 + p99_tolerance)),
+            ('throughput', current['throughput'] < previous['throughput'] / (1 + tolerance)),
+            ('errors', current['errors'] > previous['errors'])
+        )
+        for metric, failed in checks:
+            if failed:
+                regressions.append(f"{name}: {metric} {current[metric]:.3f} (baseline {previous[metric]:.3f})")
+    return regressions
+
+def report(summaries: Dict[str, Dict], baseline: Dict) -> str:
+    lines = [f"{'benchmark':<48} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'errors':>7} {'vs base p50':>12}"]
+    for name, summary in summaries.items():
+        previous = baseline.get('results', {}).get(name)
+        delta = ''
+        if previous and previous['p50_ms']:
+            delta = f"{(summary['p50_ms'] / previous['p50_ms'] - 1) * 100:+.0f}%"
+        lines.append(f"{name:<48} {summary['throughput']:>12.1f} {summary['p50_ms']:>10.3f} "
+                     f"{summary['p99_ms']:>10.3f} {summary['errors']:>7} {delta:>12}")
+    return '\n'.join(lines)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+import aiohttp
+import uvicorn
+
+from benchmarks.harness import Result, measure_async
+from modules.exchange import exchange_registry
+from modules.fake_exchange import FakeExchange, FakeExchangeServer
+
+ROUTES = [
+    '/status',
+    '/api/market/top-coins',
+    '/api/market/explosive-coins',
+    '/api/market/cross-exchange',
+    '/api/charts/candlestick/BTCUSDT?format=columns',
+    '/api/charts/candlestick/BTCUSDT',
+    '/api/whales/sentiment',
+    '/api/whales/alerts',
+    '/api/trading/stats',
+    '/metrics',
+]
+
+async def _get(session: aiohttp.ClientSession, url: str):
+    async with session.get(url) as response:
+        await response.read()
+        if response.status >= 400:
+            raise RuntimeError(f'{url}: HTTP {response.status}')
+
+async def _fanout(base: str, clients: int, duration: float) -> List[Result]:
+    """اتصال clients کلاینت WebSocket و اندازه‌گیری تأخیر پخش یک topic ساعت"""
+    latencies: List[float] = []
+    received = 0
+    connect_samples: List[float] = []
+    sockets = []
+
+    # اتصال‌های WebSocket جزو سقف pool هستند (پیش‌فرض 100)؛ بدون سقف
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        async def connect():
+            started = time.perf_counter()
+            ws = await session.ws_connect(f'{base.replace("http", "ws", 1)}/ws?topics=bench_clock')
+            await ws.receive()
+            connect_samples.append(time.perf_counter() - started)
+            sockets.append(ws)
+
+        started = time.perf_counter()
+        for i in range(0, clients, 50):
+            await asyncio.gather(*(connect() for _ in range(min(50, clients - i))))
+        connect_elapsed = time.perf_counter() - started
+
+        async def read(ws):
+            nonlocal received
+            async for message in ws:
+                data = json.loads(message.data)
+                value = data.get('changes') or data.get('data') or {}
+                if 't' in value:
+                    latencies.append(time.time() - value['t'])
+                    received += 1
+
+        readers = [asyncio.create_task(read(ws)) for ws in sockets]
+        await asyncio.sleep(duration)
+        for ws in sockets:
+            await ws.close()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+    return [
+        Result(f'ws.connect[{clients}]', connect_samples, connect_elapsed),
+        Result(f'ws.fanout[{clients}]', latencies, duration, operations=received)
+    ]
+
+async def run(symbols: int = 2000, requests: int = 300, concurrency: int = 20, ws_clients: int = 200,
+              ws_duration: float = 5.0, latency: float = 0.0, error_rate: float = 0.0) -> List[Result]:
+    """تست بار سرتاسری: سرور uvicorn واقعی روی صرافی ساختگی و جریان تیکر محلی"""
+    stream = FakeExchangeServer(interval=0.5)
+    os.environ['TICKER_STREAM_URL'] = await stream.start()
+    # وضعیت مشترک تازه (رهبری، لاگ تراکنش‌های نهنگ و ...) تا نتایج به اجرای قبلی وابسته نباشند
+    os.environ['SHARED_STATE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='bench-state-'), 'shared.db')
+    exchange_registry.factory = lambda exchange_id, config: FakeExchange(
+        exchange_id, config, symbols=symbols, latency=latency, error_rate=error_rate)
+
+    import main
+    from modules.candles import candle_store
+
+    candle_store.root = tempfile.mkdtemp(prefix='bench-candles-')
+    main.scanner.market_store.path = os.path.join(tempfile.mkdtemp(prefix='bench-markets-'), 'binance.json')
+    main.broadcast_hub.interval = 0.2
+    main.broadcast_hub.add_topic('bench_clock', lambda: {'t': time.time()})
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=0, log_level='warning'))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    base = f'http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}'
+    # اندازه‌گیری حالت پایدار: import‌های پس‌زمینه (GIL) نباید روی اولین routeها بیفتند
+    await main.app.state.warm_up
+
+    results = []
+    try:
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for route in ROUTES:
+                url = base + route
+                results.append(await measure_async(f'GET {route}', lambda: _get(session, url), requests, concurrency))
+        results.extend(await _fanout(base, ws_clients, ws_duration))
+    finally:
+        server.should_exit = True
+        await serving
+        await stream.stop()
+    return results
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.harness import Result, measure
+from modules import indicators
+from modules.chartdata import CHART_INDICATORS, build_columns, encode_json
+from modules.fake_exchange import FakeExchange
+from modules.indicators import IndicatorEngine, IndicatorState
+from modules.screener import TickerFrame
+from modules.whale_stream import RandomWhaleSource, RollingAggregator
+
+def _candles(exchange: FakeExchange, symbol: str, timeframe: str, count: int) -> np.ndarray:
+    ohlcv = asyncio.run(exchange.fetch_ohlcv(symbol, timeframe, limit=count))
+    return np.asarray(ohlcv, dtype=np.float64)
+
+def run(symbols: int = 2000, scale: float = 1.0) -> List[Result]:
+    """میکروبنچمارک‌ها: اندیکاتورها، غربال انفجاری، ساخت نمودار و تجمیع نهنگ‌ها"""
+    from modules.charts import chart_manager
+    from modules.scanner import scanner
+
+    def n(iterations: int) -> int:
+        return max(1, int(iterations * scale))
+
+    exchange = FakeExchange(symbols=symbols)
+    candles = _candles(exchange, 'BTC/USDT', '1h', 1000)
+    closes = candles[:, 4]
+    results = [
+        measure('indicators.rsi[1000]', lambda: indicators.rsi(closes), n(200)),
+        measure('indicators.macd[1000]', lambda: indicators.macd(closes), n(200)),
+    ]
+
+    state = IndicatorState()
+    state.backfill(candles[:, 0], closes)
+    prices = iter(np.tile(closes, 100))
+    timestamps = iter(range(int(candles[-1, 0]) + 3600000, 2 ** 62, 3600000))
+    results.append(measure('indicators.stream_push', lambda: state.push(next(timestamps), next(prices)), n(20000)))
+
+    def engine_backfill():
+        IndicatorEngine().series(('fake', 'BTC/USDT', '1h'), candles)
+    results.append(measure('indicators.engine_backfill[1000]', engine_backfill, n(100)))
+
+    now_ms = int(time.time() * 1000)
+    tickers = {symbol: exchange.ticker(symbol, now_ms) for symbol in exchange.symbols if symbol.endswith('/USDT')}
+    results.append(measure(f'scanner.snapshot[{len(tickers)}]', lambda: TickerFrame.from_tickers(tickers), n(50)))
+    records = TickerFrame.from_tickers(tickers).to_records()
+    results.append(measure(f'scanner.detect_explosive[{len(records)}]',
+                           lambda: scanner.detect_explosive_coins(records), n(50)))
+
+    ohlcv = candles[-100:]
+    values = IndicatorEngine().series(('fake', 'BTC/USDT', '1h'), candles, limit=100)
+    results.append(measure('charts.build_columns_json[100]', lambda: encode_json(
+        build_columns(ohlcv, values, CHART_INDICATORS['candlestick']), {'symbol': 'BTC/USDT'}), n(500)))
+    results.append(measure('charts.build_plotly[100]', lambda: chart_manager._build_candlestick_chart(
+        ohlcv, values, 'BTC/USDT', '1h'), n(20), warmup=1))
+
+    source = RandomWhaleSource(['BTC', 'ETH', 'SOL'], batch=1000, seed=1)
+    batch = asyncio.run(source.fetch())
+    aggregator = RollingAggregator()
+
+    def ingest():
+        for transaction in batch:
+            aggregator.add(transaction)
+    results.append(measure('whales.aggregate[1000]', ingest, n(50)))
+    results.append(measure('whales.summary', lambda: aggregator.summary('24h'), n(5000)))
+    return results
@@ -1,29 +1,134 @@
-from fastapi import FastAPI, WebSocket
-from fastapi.responses import HTMLResponse
+from modules.startup import startup_report
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from datetime import datetime
+from contextlib import asynccontextmanager
 import asyncio
 import json
-from modules.scanner import MarketScanner
-from modules.charts import AdvancedCharts
-from modules.whales import WhaleTracker
-from modules.trader import AutoTrader
+import os
+from typing import Optional, Tuple
+from modules.scanner import scanner
+from modules.screener import Screen
+from modules.strategy import StrategyParams
+from modules.backtest import BacktestConfig, run_backtest
+from modules.chartdata import encode_binary, encode_json
+from modules.render_cache import RenderCache
+from modules.broadcast import BroadcastHub
+from modules.stream import BINANCE_STREAM_URL, TickerStream, ticker_table
+from modules.charts import chart_manager as charts
+from modules.whales import whale_tracker
+from modules.whale_stream import WINDOWS, source_from_spec
+from modules.trader import auto_trader
+from modules.exchange import exchange_registry
+from modules.ledger import parse_cursor
+from modules.metrics import MetricsMiddleware, loop_lag_monitor, metrics
+from modules.lazy import preload
+from modules.shared_state import LeaderElection, shared_state
+
+startup_report.mark("imports")
+
+# کتابخانه‌های سنگینی که ماژول‌ها تنبل import می‌کنند؛ بعد از آماده شدن سرور در پس‌زمینه بارگذاری می‌شوند
+WARMUP_IMPORTS = ["pandas", "ccxt", "ccxt.async_support", "plotly.graph_objects", "plotly.subplots"]
+
+# نمونه‌های ماژول‌ها همان نمونه‌های سطح ماژول هستند تا کلاینت‌ها و state دوبار ساخته نشوند
+render_cache = RenderCache()
+
+# جریان زنده تیکرها (TICKER_STREAM_URL برای اتصال به سرور تست محلی)
+ticker_stream = TickerStream(ticker_table, os.environ.get("TICKER_STREAM_URL", BINANCE_STREAM_URL))
+
+# منبع تراکنش‌های نهنگ: random، jsonl:<path> یا آدرس فید محلی
+whale_tracker.use_source(source_from_spec(os.environ.get("WHALE_SOURCE", "random"), whale_tracker.whale_watchlist))
+
+# چند worker (WEB_CONCURRENCY): وضعیت ترید و اسنپ‌شات‌های بازار در SQLite مشترک؛ فقط رهبر سفارش ثبت می‌کند،
+# پوزیشن‌ها را مانیتور می‌کند و از صرافی اسکن می‌کند و همه workerها درخواست‌های خواندنی را پاسخ می‌دهند
+leader = LeaderElection(shared_state, "trading")
+auto_trader.use_leader(leader)
+scanner.use_shared_state(shared_state, lambda: leader.is_leader)
+whale_tracker.use_shared_state(shared_state, lambda: leader.is_leader)
+
+# هاب پخش زنده: هر topic یک بار محاسبه و برای همه کلاینت‌های WebSocket ارسال می‌شود
+broadcast_hub = BroadcastHub(interval=10.0)
+broadcast_hub.add_stream("whale_alerts", whale_tracker.get_whale_alerts)
+broadcast_hub.add_topic("trading_stats", auto_trader.get_trading_stats)
+
+@metrics.collector
+def collect_module_stats():
+    """آمار کش‌ها، WebSocket و جریان تیکر از stats() خود ماژول‌ها (فقط هنگام خواندن /metrics)"""
+    caches = {
+        "render": render_cache.stats(),
+        "market_snapshot": scanner.snapshot_cache.stats(),
+        "cross_exchange": scanner.cross_exchange_cache.stats()
+    }
+    hits = [({"cache": name}, stats["hits"] + stats.get("stale_hits", 0)) for name, stats in caches.items()]
+    misses = [({"cache": name}, stats["misses"]) for name, stats in caches.items()]
+    ratios = [({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()]
+    hub = broadcast_hub.stats()
+    stream = ticker_stream.stats()
+    return [
+        ("cache_hits_total", "counter", "Cache hits (including stale hits)", hits),
+        ("cache_misses_total", "counter", "Cache misses", misses),
+        ("cache_hit_ratio", "gauge", "Cache hit ratio since start", ratios),
+        ("websocket_clients", "gauge", "Connected WebSocket clients", [({}, hub["clients"])]),
+        ("websocket_topic_subscribers", "gauge", "WebSocket subscribers per topic",
+         [({"topic": topic}, count) for topic, count in hub["subscribers_per_topic"].items()]),
+        ("websocket_messages_delivered_total", "counter", "Messages sent to WebSocket clients",
+         [({}, hub["delivered"])]),
+        ("websocket_dropped_clients_total", "counter", "Slow WebSocket clients disconnected",
+         [({}, hub["dropped_clients"])]),
+        ("broadcast_producer_errors_total", "counter", "Broadcast topic producer failures",
+         [({"topic": topic}, count) for topic, count in hub["producer_errors_per_topic"].items()]),
+        ("ticker_stream_connected", "gauge", "Live ticker stream connection state",
+         [({}, int(bool(stream["connected"])))]),
+        ("ticker_stream_messages_total", "counter", "Live ticker stream messages", [({}, stream["messages"])]),
+        ("trading_leader", "gauge", "1 if this worker runs trading and monitoring", [({}, int(leader.is_leader))])
+    ]
+
+async def warm_up():
+    """گرم‌کردن پس از راه‌اندازی: import کتابخانه‌های سنگین در thread جدا و آماده کردن ایندکس بازار"""
+    with startup_report.phase("preload_imports"):
+        await asyncio.to_thread(preload, WARMUP_IMPORTS)
+    try:
+        # با اسنپ‌شات دیسک فوری است؛ فقط در اولین اجرا منتظر fetch_markets می‌ماند
+        with startup_report.phase("load_markets"):
+            await scanner.market_store.get_index()
+    except Exception as e:
+        print(f"Error loading markets: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_lag_monitor.start()
+    leader.start()
+    scanner.market_store.start()
+    ticker_stream.start()
+    whale_tracker.start()
+    broadcast_hub.start()
+    startup_report.ready()
+    print(startup_report.summary())
+    app.state.warm_up = asyncio.create_task(warm_up())
+    yield
+    app.state.warm_up.cancel()
+    # کنار رفتن از رهبری و آزاد کردن lease تا worker دیگری بلافاصله رهبر شود
+    await leader.stop()
+    await asyncio.gather(broadcast_hub.stop(), ticker_stream.stop(), whale_tracker.stop(), scanner.market_store.stop())
+    # بستن اتصال‌های async صرافی‌ها هنگام خاموش شدن سرور
+    await asyncio.gather(scanner.close(), charts.close(), auto_trader.close())
+    await exchange_registry.close()
+    await loop_lag_monitor.stop()
 
 app = FastAPI(
     title="🚀 تریدر حرفه‌ای ارزدیجیتال - نسخه کامل",
     description="سیستم کامل ترید خودکار با تمام ماژول‌های پیشرفته",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
+# تأخیر هر مسیر برای /metrics
+app.add_middleware(MetricsMiddleware)
+
 # سرویس فایل‌های استاتیک
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# نمونه‌های ماژول‌ها
-scanner = MarketScanner()
-charts = AdvancedCharts()
-whale_tracker = WhaleTracker()
-auto_trader = AutoTrader()
-
 # مسیر اصلی - نمایش دشبورد
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -56,48 +161,220 @@ async def get_top_coins():
     return {
         "count": len(coins),
         "timestamp": datetime.now().isoformat(),
+        "snapshot_age": scanner.snapshot_cache.age,
         "coins": coins[:50]
     }
 
 @app.get("/api/market/explosive-coins")
 async def get_explosive_coins():
     """دریافت شت‌کوین‌های انفجاری"""
-    coins = await scanner.get_top_200_coins()
-    explosive = scanner.detect_explosive_coins(coins)
+    explosive = await scanner.get_explosive_coins()
     return {
         "count": len(explosive),
         "timestamp": datetime.now().isoformat(),
+        "snapshot_age": scanner.snapshot_cache.age,
         "explosive_coins": explosive
     }
 
-# APIهای نمودارها
-@app.get("/api/charts/candlestick/{symbol}")
-async def get_candlestick_chart(symbol: str, timeframe: str = "1h"):
-    """دریافت نمودار کندل استیک"""
-    chart_data = charts.create_candlestick_chart(symbol, timeframe)
+@app.post("/api/market/screen")
+async def screen_market(request: Request):
+    """اجرای غربال‌های سفارشی روی اسنپ‌شات بازار"""
+    body = await request.json()
+    try:
+        screens = [Screen.from_dict(screen) for screen in body.get('screens', [])]
+        results = await scanner.screen_market(screens)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid screen definition: {e}")
     return {
-        "symbol": symbol,
-        "timeframe": timeframe,
-        "chart_data": chart_data,
+        "timestamp": datetime.now().isoformat(),
+        "snapshot_age": scanner.snapshot_cache.age,
+        "results": {name: {"count": len(coins), "coins": coins} for name, coins in results.items()}
+    }
+
+@app.get("/api/market/cross-exchange")
+async def get_cross_exchange_view(limit: int = 50):
+    """نمای ادغام‌شده ارزها در همه صرافی‌های پیکربندی‌شده"""
+    view = await scanner.get_cross_exchange_view()
+    return {
+        "count": len(view['coins']),
+        "timestamp": datetime.now().isoformat(),
+        "snapshot_age": scanner.cross_exchange_cache.age,
+        "venues": view['venues'],
+        "coins": view['coins'][:limit]
+    }
+
+@app.get("/api/market/cache-stats")
+async def get_market_cache_stats():
+    """آمار کش اسنپ‌شات بازار"""
+    return {
+        "snapshot_cache": scanner.snapshot_cache.stats(),
+        "cross_exchange_cache": scanner.cross_exchange_cache.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/market/metadata")
+async def get_market_metadata(quote: Optional[str] = None, base: Optional[str] = None,
+                              active: Optional[bool] = None, limit: int = 100):
+    """نمادهای بازار از اسنپ‌شات متادیتا با فیلتر quote، base و وضعیت فعال"""
+    markets = await scanner.market_store.get_index()
+    symbols = markets.symbols(quote=quote, base=base, active=active)
+    return {
+        "count": len(symbols),
+        "markets": [markets.get(symbol) for symbol in symbols[:limit]],
+        "snapshot": scanner.market_store.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/market/live-tickers")
+async def get_live_tickers(symbols: Optional[str] = None):
+    """آخرین تیکرهای جریان زنده (symbols: فهرست جداشده با کاما؛ پیش‌فرض همه)"""
+    tickers = ticker_table.snapshot(symbols.split(",") if symbols else None)
+    return {
+        "count": len(tickers),
+        "live": ticker_table.is_live(),
+        "tickers": tickers,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/system/rate-limits")
+async def get_rate_limits():
+    """وضعیت سطل توکن مشترک هر صرافی (توکن باقی‌مانده، صف انتظار و درخواست‌های ردشده)"""
+    return {
+        **exchange_registry.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/system/startup")
+async def get_startup_report():
+    """زمان‌بندی راه‌اندازی: مراحل import و lifespan، گرم‌کردن پس‌زمینه و import‌های تنبل"""
+    return {
+        **startup_report.to_dict(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/system/leader")
+async def get_leader_status():
+    """وضعیت رهبری این worker و lease مشترک ترید"""
+    return {
+        "pid": os.getpid(),
+        **leader.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/market/stream-stats")
+async def get_stream_stats():
+    """وضعیت اتصال جریان تیکرها"""
+    return {
+        "stream": ticker_stream.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
+# APIهای نمودارها
+# بدون width همه کندل‌ها رندر می‌شوند؛ با width تا 100k کندل به حدود width نقطه کاهش می‌یابد
+MAX_CHART_PERIODS = 5000
+MAX_DOWNSAMPLED_PERIODS = 100_000
+MAX_CHART_WIDTH = 4000
+
+def chart_window(periods: int, width: int) -> Tuple[int, int]:
+    """periods و width محدود و گردشده؛ هر دو در کلید کش رندر هستند و تعداد حالت‌های آن محدود می‌ماند
+
+    width به مضرب 100 و periods به دو رقم معنی‌دار رو به بالا گرد می‌شود (137 ← 140، 12345 ← 13000).
+    """
+    width = min(-(-width // 100) * 100, MAX_CHART_WIDTH) if width > 0 else 0
+    periods = max(1, min(periods, MAX_DOWNSAMPLED_PERIODS if width else MAX_CHART_PERIODS))
+    step = 10 ** max(0, len(str(periods)) - 2)
+    return -(-periods // step) * step, width
+
+@app.get("/api/charts/candlestick/{symbol}")
+async def get_candlestick_chart(request: Request, symbol: str, timeframe: str = "1h", periods: int = 100,
+                                format: str = "plotly", width: int = 0):
+    """دریافت نمودار کندل استیک (format: plotly، columns یا binary؛ width: عرض نمودار به پیکسل برای کاهش داده)"""
+    periods, width = chart_window(periods, width)
+    return await cached_chart_response(request, symbol, "candlestick", timeframe, periods, format, width)
+
 @app.get("/api/charts/technical/{symbol}")
-async def get_technical_chart(symbol: str):
-    """دریافت نمودار تحلیل تکنیکال"""
-    chart_data = charts.create_technical_analysis_chart(symbol)
+async def get_technical_chart(request: Request, symbol: str, format: str = "plotly"):
+    """دریافت نمودار تحلیل تکنیکال (format: plotly، columns یا binary)"""
+    return await cached_chart_response(request, symbol, "technical", "1d", 100, format)
+
+@app.get("/api/charts/cache-stats")
+async def get_chart_cache_stats():
+    """آمار کش رندر نمودارها"""
     return {
-        "symbol": symbol,
-        "chart_data": chart_data,
+        "render_cache": render_cache.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
+async def cached_chart_response(request: Request, symbol: str, kind: str, timeframe: str, periods: int,
+                                format: str, width: int = 0) -> Response:
+    """پاسخ نمودار از کش رندر؛ فقط وقتی کندل‌ها تغییر کرده باشند دوباره ساخته می‌شود
+
+    کلید کش شامل timestamp آخرین کندل و نسخه داده (از فایل کندل‌ها، یکسان در همه workerها و پس از
+    راه‌اندازی دوباره) است و همان ETag پاسخ را می‌سازد، پس مرورگر با If-None-Match بدون دریافت
+    دوباره بدنه 304 می‌گیرد.
+    """
+    if format not in ("plotly", "columns", "binary"):
+        raise HTTPException(status_code=400, detail=f"Unknown chart format: {format}")
+    try:
+        last_timestamp, version = await charts.data_version(symbol, timeframe, periods)
+    except Exception as e:
+        print(f"Error syncing chart candles: {e}")
+        body, media_type, _ = await render_chart(symbol, kind, timeframe, periods, format, width)
+        return Response(content=body, media_type=media_type)
+
+    key = (kind, symbol, timeframe, periods, width, format, last_timestamp, version)
+    etag = render_cache.etag(key)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={int(charts.candles.min_sync_interval)}"
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    cached = render_cache.get(key)
+    if cached is not None:
+        body, media_type = cached
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    body, media_type, cacheable = await render_chart(symbol, kind, timeframe, periods, format, width)
+    if not cacheable:
+        return Response(content=body, media_type=media_type)
+    render_cache.put(key, body, media_type)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+async def render_chart(symbol: str, kind: str, timeframe: str, periods: int, format: str,
+                       width: int = 0) -> Tuple[bytes, str, bool]:
+    """رندر نمودار: (body، media_type، قابل کش بودن)"""
+    if format == "plotly":
+        if kind == "technical":
+            chart_data = await charts.create_technical_analysis_chart(symbol)
+            payload = {"symbol": symbol, "chart_data": chart_data}
+        else:
+            chart_data = await charts.create_candlestick_chart(symbol, timeframe, periods, width)
+            payload = {"symbol": symbol, "timeframe": timeframe, "chart_data": chart_data}
+        payload["timestamp"] = datetime.now().isoformat()
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return body, "application/json", chart_data is not None
+
+    columns = await charts.get_chart_data(symbol, kind, timeframe, periods, width)
+    if columns is None:
+        raise HTTPException(status_code=502, detail="Chart data unavailable")
+    meta = {"symbol": symbol, "kind": kind, "timeframe": timeframe, "timestamp": datetime.now().isoformat()}
+    if format == "binary":
+        return encode_binary(columns, meta), "application/octet-stream", True
+    return encode_json(columns, meta), "application/json", True
+
 # APIهای تحلیل نهنگ‌ها
+def check_window(window: str):
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {list(WINDOWS)}")
+
 @app.get("/api/whales/transactions")
-async def get_whale_transactions():
-    """دریافت تراکنش‌های نهنگ‌ها"""
+async def get_whale_transactions(window: str = "1h"):
+    """دریافت تراکنش‌های نهنگ‌ها و تحلیل پنجره غلتان"""
+    check_window(window)
     transactions = whale_tracker.get_whale_transactions()
-    analysis = whale_tracker.analyze_whale_behavior(transactions)
+    analysis = whale_tracker.analyze_whale_behavior(window=window)
     return {
         "transactions": transactions,
         "analysis": analysis,
@@ -105,20 +382,30 @@ async def get_whale_transactions():
     }
 
 @app.get("/api/whales/sentiment")
-async def get_whale_sentiment():
+async def get_whale_sentiment(window: str = "1h"):
     """دریافت احساسات بازار از نهنگ‌ها"""
-    sentiment = whale_tracker.get_whale_sentiment()
+    check_window(window)
+    sentiment = whale_tracker.get_whale_sentiment(window)
     return {
         "sentiment": sentiment,
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/api/whales/alerts")
-async def get_whale_alerts():
-    """دریافت هشدارهای نهنگ‌ها"""
-    alerts = whale_tracker.get_whale_alerts()
+async def get_whale_alerts(since: Optional[int] = None, limit: int = 50):
+    """دریافت هشدارهای نهنگ‌ها؛ با since فقط هشدارهای بعد از آن seq"""
+    alerts = whale_tracker.get_whale_alerts(since, None if since is not None else limit)
     return {
         "alerts": alerts,
+        "last_seq": whale_tracker.alerts.last_seq,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/whales/stats")
+async def get_whale_stats():
+    """وضعیت منبع و تجمیع‌گر تراکنش‌های نهنگ"""
+    return {
+        "stats": whale_tracker.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -132,40 +419,110 @@ async def get_trading_signal(symbol: str):
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/trading/signals")
+async def get_trading_signals(symbols: str = "", top: int = 200, concurrency: int = 0, timeout: float = 0):
+    """سیگنال گروهی؛ symbols با کاما جدا می‌شود و در صورت خالی بودن، ارزهای برتر بازار آنالیز می‌شوند"""
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    if not symbol_list:
+        coins = await scanner.get_top_200_coins()
+        symbol_list = [coin['symbol'] for coin in coins[:top]]
+    batch = await auto_trader.analyze_many(symbol_list, concurrency=concurrency or None, timeout=timeout or None)
+    return {
+        **batch,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/trading/backtest/{symbol}")
+async def backtest_strategy(symbol: str, timeframe: str = "1h", history: int = 5000,
+                            fast: int = 20, slow: int = 50, rsi_upper: float = 70, rsi_lower: float = 30,
+                            stop_loss_pct: float = 0.05, take_profit_pct: float = 0.08):
+    """بک‌تست استراتژی تریدر روی کندل‌های ذخیره‌شده"""
+    params = StrategyParams(fast=fast, slow=slow, rsi_upper=rsi_upper, rsi_lower=rsi_lower,
+                            stop_loss_pct=stop_loss_pct, take_profit_pct=take_profit_pct)
+    # سقف تعداد کندل: هر درخواست حداکثر 20000 کندل دریافت و شبیه‌سازی می‌کند
+    history = max(1, min(history, 20000))
+    candles = await auto_trader.candles.get_ohlcv(auto_trader.exchange, symbol, timeframe, history)
+    config = BacktestConfig(risk_per_trade=auto_trader.risk_per_trade, max_position_size=auto_trader.max_position_size)
+    result = await asyncio.to_thread(run_backtest, candles, params, config)
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "candles": len(candles),
+        "result": result,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/trading/stats")
 async def get_trading_stats():
     """دریافت آمار معاملاتی"""
     stats = auto_trader.get_trading_stats()
     return stats
 
+@app.get("/api/trading/trades")
+async def get_trade_history(start: Optional[int] = None, end: Optional[int] = None, symbol: Optional[str] = None,
+                            limit: int = 100, cursor: Optional[str] = None):
+    """تاریخچه معاملات بسته‌شده (start/end: epoch میلی‌ثانیه؛ cursor: next_cursor صفحه قبل)"""
+    if cursor:
+        try:
+            parse_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    page = auto_trader.ledger.query(start, end, symbol, max(1, min(limit, 1000)), cursor)
+    return {
+        "count": len(page["trades"]),
+        "trades": page["trades"],
+        "next_cursor": page["next_cursor"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/trading/performance")
+async def get_trading_performance():
+    """معیارهای عملکرد کل و به تفکیک نماد"""
+    return {
+        **auto_trader.get_performance(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/trading/orders/stats")
+async def get_order_pipeline_stats():
+    """عمق صف، تأخیر و شمارنده‌های صف سفارش‌ها"""
+    return {
+        "orders": auto_trader.orders.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/api/trading/toggle")
 async def toggle_trading():
     """فعال/غیرفعال کردن ترید خودکار"""
-    auto_trader.trading_enabled = not auto_trader.trading_enabled
     return {
-        "trading_enabled": auto_trader.trading_enabled,
+        "trading_enabled": auto_trader.toggle_trading(),
         "timestamp": datetime.now().isoformat()
     }
 
 # WebSocket برای داده‌های زنده
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None):
+    """داده‌های زنده از هاب مشترک (topics: فهرست جداشده با کاما؛ پیش‌فرض همه)"""
     await websocket.accept()
-    try:
-        while True:
-            # ارسال داده‌های زنده از تمام ماژول‌ها
-            market_data = {
-                "type": "full_market_update",
-                "timestamp": datetime.now().isoformat(),
-                "whale_alerts": whale_tracker.get_whale_alerts(),
-                "trading_stats": auto_trader.get_trading_stats(),
-                "market_status": "active"
-            }
-            await websocket.send_json(market_data)
-            await asyncio.sleep(10)
-    except Exception as e:
-        print(f"WebSocket error: {e}")
+    await broadcast_hub.serve(websocket, topics.split(",") if topics else None)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """متریک‌ها در قالب متنی Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/ws/stats")
+async def get_websocket_stats():
+    """آمار هاب WebSocket"""
+    return {
+        "hub": broadcast_hub.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+startup_report.mark("setup")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # با بیش از یک worker، uvicorn برنامه را با رشته import در هر پردازه جدا بارگذاری می‌کند
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    uvicorn.run("main:app" if workers > 1 else app, host="0.0.0.0", port=8000, workers=workers)
@@ -0,0 +1,233 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from modules import indicators
+from modules.candles import CANDLE_COLUMNS
+from modules.strategy import BUY, StrategyParams, signal_array
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """تنظیمات شبیه‌سازی؛ مقادیر پیش‌فرض همان مدیریت ریسک AutoTrader هستند"""
+    initial_balance: float = 10000.0
+    risk_per_trade: float = 0.02
+    max_position_size: float = 1000
+    min_balance: float = 10
+    fee: float = 0.001  # کارمزد هر طرف معامله
+
+DEFAULT_GRID = {
+    'fast': [10, 20, 30],
+    'slow': [50, 100],
+    'rsi_upper': [65, 70, 75],
+    'rsi_lower': [25, 30, 35],
+    'stop_loss_pct': [0.03, 0.05],
+    'take_profit_pct': [0.05, 0.08, 0.12],
+}
+
+class _IndicatorCache:
+    """اندیکاتورهای یک سری قیمت؛ هر طول پنجره فقط یک بار در کل sweep محاسبه می‌شود"""
+
+    def __init__(self, closes: np.ndarray):
+        self.closes = closes
+        self._sma: Dict[int, np.ndarray] = {}
+        self._rsi: Dict[int, np.ndarray] = {}
+
+    def sma(self, period: int) -> np.ndarray:
+        if period not in self._sma:
+            self._sma[period] = indicators.sma(self.closes, period).to_numpy()
+        return self._sma[period]
+
+    def rsi(self, period: int) -> np.ndarray:
+        if period not in self._rsi:
+            self._rsi[period] = indicators.rsi(self.closes, period).to_numpy()
+        return self._rsi[period]
+
+def compute_signals(candles: np.ndarray, params: StrategyParams = StrategyParams(),
+                    cache: Optional[_IndicatorCache] = None) -> np.ndarray:
+    """سیگنال هر کندل با همان منطق AutoTrader (برداری)"""
+    cache = cache or _IndicatorCache(np.asarray(candles[:, 4]))
+    return signal_array(cache.sma(params.fast), cache.sma(params.slow), cache.rsi(params.rsi_period), params)
+
+def _find_exit(opens, highs, lows, start: int, side: int, stop: float, target: float, window: int = 64):
+    """اولین کندل بعد از ورود که به حد ضرر یا سود برسد؛ جستجو در پنجره‌های برداری رو به رشد"""
+    n = len(highs)
+    while start < n:
+        end = min(n, start + window)
+        if side == BUY:
+            stop_hit = lows[start:end] <= stop
+            target_hit = highs[start:end] >= target
+        else:
+            stop_hit = highs[start:end] >= stop
+            target_hit = lows[start:end] <= target
+        hit = stop_hit | target_hit
+        if hit.any():
+            offset = int(np.argmax(hit))
+            index = start + offset
+            # اگر هر دو در یک کندل رخ دهند، حد ضرر اول فرض می‌شود (مثل monitor_positions)
+            if stop_hit[offset]:
+                price = min(stop, opens[index]) if side == BUY else max(stop, opens[index])
+                return index, price, "STOP_LOSS"
+            price = max(target, opens[index]) if side == BUY else min(target, opens[index])
+            return index, price, "TAKE_PROFIT"
+        start = end
+        window *= 4
+    return None
+
+def simulate(candles: np.ndarray, signals: np.ndarray, params: StrategyParams = StrategyParams(),
+             config: BacktestConfig = BacktestConfig(), include_trades: bool = False) -> Dict:
+    """شبیه‌سازی ورود/خروج؛ حلقه فقط روی معاملات است نه روی کندل‌ها"""
+    opens, highs, lows, closes = (np.asarray(candles[:, i]) for i in (1, 2, 3, 4))
+    entries = np.flatnonzero(signals)
+    balance = config.initial_balance
+    trades = []
+    bars_in_market = 0
+    next_bar = 0
+
+    while True:
+        k = int(np.searchsorted(entries, next_bar))
+        if k >= len(entries) or balance < config.min_balance:
+            break
+        entry = int(entries[k])
+        side = int(signals[entry])
+        price = float(closes[entry])
+        if side == BUY:
+            stop, target = price * (1 - params.stop_loss_pct), price * (1 + params.take_profit_pct)
+        else:
+            stop, target = price * (1 + params.stop_loss_pct), price * (1 - params.take_profit_pct)
+
+        # همان calculate_position_size
+        price_diff = abs(price - stop)
+        amount = min(balance * config.risk_per_trade / price_diff, config.max_position_size) if price_diff > 0 else 0
+        if amount <= 0:
+            next_bar = entry + 1
+            continue
+
+        found = _find_exit(opens, highs, lows, entry + 1, side, stop, target)
+        if found is None:
+            exit_index, exit_price, reason = len(closes) - 1, float(closes[-1]), "END_OF_DATA"
+        else:
+            exit_index, exit_price, reason = found
+
+        pnl = (exit_price - price) * amount * side - (price + exit_price) * amount * config.fee
+        balance += pnl
+        bars_in_market += exit_index - entry
+        trades.append((entry, exit_index, side, price, exit_price, amount, pnl, reason))
+        next_bar = exit_index + 1
+
+    result = _metrics(trades, config, balance, len(closes), bars_in_market)
+    result['params'] = asdict(params)
+    if include_trades:
+        timestamps = candles[:, 0]
+        result['trade_log'] = [{
+            'entry_time': int(timestamps[entry]),
+            'exit_time': int(timestamps[exit_index]),
+            'side': "BUY" if side == BUY else "SELL",
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'amount': amount,
+            'pnl': pnl,
+            'reason': reason
+        } for entry, exit_index, side, entry_price, exit_price, amount, pnl, reason in trades]
+    return result
+
+def _metrics(trades, config: BacktestConfig, balance: float, bars: int, bars_in_market: int) -> Dict:
+    pnl = np.array([t[6] for t in trades], dtype=np.float64)
+    equity = config.initial_balance + np.concatenate([[0.0], np.cumsum(pnl)])
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    return {
+        'trades': len(pnl),
+        'wins': int(len(wins)),
+        'win_rate': len(wins) / len(pnl) if len(pnl) else 0.0,
+        'final_balance': balance,
+        'total_return_pct': (balance / config.initial_balance - 1) * 100,
+        'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else None,
+        'max_drawdown_pct': float(drawdown.max() * 100),
+        'exposure': bars_in_market / bars if bars else 0.0
+    }
+
+def run_backtest(candles: np.ndarray, params: StrategyParams = StrategyParams(),
+                 config: BacktestConfig = BacktestConfig(), include_trades: bool = True) -> Dict:
+    """بک‌تست یک ارز با یک مجموعه پارامتر"""
+    candles = np.asarray(candles, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS))
+    return simulate(candles, compute_signals(candles, params), params, config, include_trades)
+
+def parameter_grid(grid: Dict[str, Iterable]) -> List[StrategyParams]:
+    """همه ترکیب‌های پارامتر (ترکیب‌هایی که fast >= slow دارند حذف می‌شوند)"""
+    names = list(grid)
+    combos = [StrategyParams(**dict(zip(names, values))) for values in itertools.product(*grid.values())]
+    return [params for params in combos if params.fast < params.slow]
+
+def backtest_symbol(candles: np.ndarray, params_list: List[StrategyParams],
+                    config: BacktestConfig = BacktestConfig()) -> List[Dict]:
+    """همه ترکیب‌ها روی یک ارز؛ اندیکاتورها بین ترکیب‌ها مشترک‌اند"""
+    candles = np.asarray(candles, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS))
+    cache = _IndicatorCache(np.ascontiguousarray(candles[:, 4]))
+    return [simulate(candles, compute_signals(candles, params, cache), params, config) for params in params_list]
+
+def load_candles(path: str) -> np.ndarray:
+    """خواندن فایل CandleStore به صورت memmap (بدون کپی در پروسس worker)"""
+    return np.memmap(path, dtype=np.float64, mode='r').reshape(-1, len(CANDLE_COLUMNS))
+
+def _sweep_worker(task):
+    symbol, source, params_list, config = task
+    candles = load_candles(source) if isinstance(source, str) else source
+    return symbol, backtest_symbol(candles, params_list, config)
+
+def run_sweep(candles_by_symbol: Dict[str, Union[np.ndarray, str]], grid: Optional[Dict[str, Iterable]] = None,
+              config: BacktestConfig = BacktestConfig(), processes: Optional[int] = None) -> Dict:
+    """اجرای grid پارامترها روی همه ارزها در process pool؛ مقدار هر ارز آرایه کندل یا مسیر فایل CandleStore است"""
+    params_list = parameter_grid(grid or DEFAULT_GRID)
+    tasks = [(symbol, source, params_list, config) for symbol, source in candles_by_symbol.items()]
+
+    per_symbol: Dict[str, List[Dict]] = {}
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+        for symbol, results in pool.map(_sweep_worker, tasks):
+            per_symbol[symbol] = results
+
+    ranking = []
+    for i, params in enumerate(params_list):
+        results = [per_symbol[symbol][i] for symbol in per_symbol]
+        returns = np.array([r['total_return_pct'] for r in results])
+        trades = sum(r['trades'] for r in results)
+        ranking.append({
+            'params': asdict(params),
+            'symbols': len(results),
+            'mean_return_pct': float(returns.mean()) if len(returns) else 0.0,
+            'median_return_pct': float(np.median(returns)) if len(returns) else 0.0,
+            'trades': trades,
+            'win_rate': sum(r['wins'] for r in results) / trades if trades else 0.0,
+            'mean_max_drawdown_pct': float(np.mean([r['max_drawdown_pct'] for r in results])) if results else 0.0
+        })
+    ranking.sort(key=lambda r: r['mean_return_pct'], reverse=True)
+    return {'combinations': len(params_list), 'symbols': len(per_symbol), 'ranking': ranking}
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+    from modules.candles import CandleStore
+
+    parser = argparse.ArgumentParser(description="Parameter sweep over candles stored in CandleStore")
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--exchange', default='binance')
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--root', default='data/candles')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    store = CandleStore(root=args.root)
+    sources = {symbol: store.path((args.exchange, symbol, args.timeframe)) for symbol in args.symbols}
+    sources = {symbol: path for symbol, path in sources.items() if os.path.exists(path)}
+
+    started = time.monotonic()
+    report = run_sweep(sources, processes=args.processes)
+    report['ranking'] = report['ranking'][:args.top]
+    report['elapsed'] = round(time.monotonic() - started, 2)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
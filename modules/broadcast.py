@@ -0,0 +1,335 @@
+import asyncio
+import inspect
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# نشانگر داخل صف: کلاینت عقب افتاده و باید به جای دلتاهای حذف‌شده اسنپ‌شات کامل بگیرد
+_RESYNC = object()
+
+class Subscriber:
+    """یک کلاینت WebSocket با صف محدود پیام‌های از پیش کدشده"""
+
+    def __init__(self, websocket, queue_size: int):
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.cursors: Dict[str, int] = {}  # آخرین seq رویداد ارسال‌شده در topicهای رویدادی
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflows = 0  # سرریزهای پشت سر هم بدون ارسال موفق
+        self.dropped = False
+
+class BroadcastHub:
+    """هاب پخش زنده: هر topic فقط یک بار در هر دوره محاسبه و به همه مشترکین پخش می‌شود
+
+    - هر پیام یک بار به JSON تبدیل می‌شود و فقط رشته آن در صف کلاینت‌ها قرار می‌گیرد.
+    - برای مقادیر dict فقط کلیدهای تغییرکرده ارسال می‌شوند (delta)؛ بقیه مقادیر با تغییر کامل ارسال می‌شوند.
+    - topicهای رویدادی (add_stream) لیست رویدادهای دارای seq هستند و هر رویداد فقط یک بار
+      برای هر کلاینت ارسال می‌شود.
+    - صف هر کلاینت محدود است؛ اگر پر شود دلتاهای معوق دور ریخته می‌شوند و کلاینت یک اسنپ‌شات
+      تازه می‌گیرد. کلاینتی که چند بار پشت سر هم عقب بماند یا ارسالش timeout شود قطع می‌شود.
+
+    پروتکل کلاینت: {"action": "subscribe" | "unsubscribe", "topics": [...], "since": {topic: seq}}
+    """
+
+    def __init__(self, interval: float = 10.0, queue_size: int = 16, max_overflows: int = 3,
+                 send_timeout: float = 5.0, error_log_interval: float = 60.0):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_overflows = max_overflows
+        self.send_timeout = send_timeout
+        self._producers: Dict[str, Callable[[], Any]] = {}
+        self._streams: Dict[str, Tuple[Callable[[Optional[int], Optional[int]], List[Dict]], int]] = {}
+        self._cursors: Dict[str, int] = {}  # آخرین seq پخش‌شده هر topic رویدادی
+        self._state: Dict[str, Any] = {}
+        self._seq: Dict[str, int] = {}
+        self._subscribers: Set[Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._kick: Optional[asyncio.Task] = None
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped_clients = 0
+        self.producer_errors = 0
+        # خطای producer در هر دور تکرار می‌شود؛ برای هر topic حداکثر یک warning در هر error_log_interval ثانیه
+        self.error_log_interval = error_log_interval
+        self._topic_errors: Dict[str, int] = {}
+        self._error_logged: Dict[str, Tuple[float, int]] = {}  # topic -> (زمان آخرین لاگ، تعداد خطا تا آن لحظه)
+        self.last_publish_duration = 0.0
+
+    @property
+    def topics(self):
+        return list(self._producers) + list(self._streams)
+
+    def add_topic(self, name: str, producer: Callable[[], Any]):
+        """ثبت topic؛ producer تابع sync یا async که مقدار قابل تبدیل به JSON برمی‌گرداند"""
+        self._producers[name] = producer
+
+    def add_stream(self, name: str, reader: Callable[[Optional[int], Optional[int]], List[Dict]], backlog: int = 20):
+        """ثبت topic رویدادی؛ reader(since, limit) رویدادهای با seq بعد از since را به ترتیب برمی‌گرداند
+
+        مشترک جدید backlog رویداد آخر (یا رویدادهای بعد از since خودش) را می‌گیرد و بعد از آن
+        فقط رویدادهای جدید.
+        """
+        self._streams[name] = (reader, backlog)
+
+    # ---------- تولیدکننده مشترک ----------
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await self.publish()
+            self.last_publish_duration = time.monotonic() - started
+            await asyncio.sleep(max(0.0, self.interval - self.last_publish_duration))
+
+    async def publish(self):
+        """یک دور: محاسبه topicهای دارای مشترک و پخش delta"""
+        active = {topic for subscriber in self._subscribers for topic in subscriber.topics}
+        for topic, producer in self._producers.items():
+            if topic not in active:
+                # بدون مشترک محاسبه نمی‌شود؛ state کهنه هم نگه داشته نمی‌شود
+                self._state.pop(topic, None)
+                continue
+            try:
+                value = producer()
+                if inspect.isawaitable(value):
+                    value = await value
+            except Exception as e:
+                self._producer_failed(topic, e)
+                continue
+            message = self._update(topic, value)
+            if message is not None:
+                self._fan_out(topic, message)
+        for topic, (reader, _) in self._streams.items():
+            if topic not in active:
+                self._cursors.pop(topic, None)
+                continue
+            try:
+                events = reader(self._cursors.get(topic), None)
+            except Exception as e:
+                self._producer_failed(topic, e)
+                continue
+            if events:
+                self._cursors[topic] = events[-1]['seq']
+                self._fan_out(topic, self._encode_events(topic, events))
+
+    def _producer_failed(self, topic: str, error: Exception):
+        self.producer_errors += 1
+        count = self._topic_errors[topic] = self._topic_errors.get(topic, 0) + 1
+        now = time.monotonic()
+        logged_at, logged_count = self._error_logged.get(topic, (None, 0))
+        if logged_at is None or now - logged_at >= self.error_log_interval:
+            suppressed = count - logged_count - 1
+            logger.warning("Broadcast producer error (%s): %s%s", topic, error,
+                           f" ({suppressed} more since last report)" if suppressed else "")
+            self._error_logged[topic] = (now, count)
+
+    def _update(self, topic: str, value: Any) -> Optional[str]:
+        previous = self._state.get(topic)
+        self._state[topic] = value
+        if previous is None:
+            return self._encode_snapshot(topic, value, bump=True)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            changes = {k: v for k, v in value.items() if k not in previous or previous[k] != v}
+            removed = [k for k in previous if k not in value]
+            if not changes and not removed:
+                return None
+            self._seq[topic] = self._seq.get(topic, 0) + 1
+            return json.dumps({'type': 'delta', 'topic': topic, 'seq': self._seq[topic],
+                               'changes': changes, 'removed': removed}, ensure_ascii=False, default=str)
+        if value == previous:
+            return None
+        return self._encode_snapshot(topic, value, bump=True)
+
+    def _encode_snapshot(self, topic: str, value: Any, bump: bool = False) -> str:
+        if bump:
+            self._seq[topic] = self._seq.get(topic, 0) + 1
+        return json.dumps({'type': 'snapshot', 'topic': topic, 'seq': self._seq.get(topic, 0),
+                           'data': value}, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _encode_events(topic: str, events: List[Dict]) -> Tuple[str, int, int, List[Dict], str]:
+        text = json.dumps({'type': 'events', 'topic': topic, 'seq': events[-1]['seq'], 'events': events},
+                          ensure_ascii=False, default=str)
+        return (topic, events[0]['seq'], events[-1]['seq'], events, text)
+
+    def _stream_backlog(self, subscriber: Subscriber, topic: str, since: Optional[int] = None) -> List[Dict]:
+        """رویدادهای ارسال‌نشده به مشترک تا مکان فعلی پخش (بقیه با پخش بعدی می‌رسند)"""
+        reader, backlog = self._streams[topic]
+        if topic not in self._cursors:
+            latest = reader(None, 1)
+            self._cursors[topic] = latest[-1]['seq'] if latest else 0
+        cursor = self._cursors[topic]
+        since = subscriber.cursors.get(topic, since)
+        events = reader(since, None if since is not None else backlog)
+        return [event for event in events if event['seq'] <= cursor]
+
+    def _fan_out(self, topic: str, message):
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if topic in subscriber.topics:
+                self._enqueue(subscriber, message)
+
+    def _enqueue(self, subscriber: Subscriber, message):
+        try:
+            subscriber.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+        # کلاینت کند: دلتاهای معوق را با یک اسنپ‌شات جایگزین کن
+        subscriber.overflows += 1
+        if subscriber.overflows > self.max_overflows:
+            self._drop(subscriber)
+            return
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+            self.coalesced += 1
+        subscriber.queue.put_nowait(_RESYNC)
+
+    def _drop(self, subscriber: Subscriber):
+        if subscriber.dropped:
+            return
+        subscriber.dropped = True
+        self.dropped_clients += 1
+        self._subscribers.discard(subscriber)
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        # بیدار کردن writer تا اتصال را ببندد
+        subscriber.queue.put_nowait(None)
+
+    # ---------- اتصال کلاینت ----------
+
+    def subscribe(self, subscriber: Subscriber, topics: Iterable[str], since: Optional[Dict[str, int]] = None):
+        for topic in topics:
+            if topic in self._streams and topic not in subscriber.topics:
+                subscriber.topics.add(topic)
+                events = self._stream_backlog(subscriber, topic, (since or {}).get(topic))
+                if events:
+                    self._enqueue(subscriber, self._encode_events(topic, events))
+                else:
+                    subscriber.cursors.setdefault(topic, self._cursors[topic])
+            elif topic in self._producers and topic not in subscriber.topics:
+                subscriber.topics.add(topic)
+                if topic in self._state:
+                    self._enqueue(subscriber, self._encode_snapshot(topic, self._state[topic]))
+        if (any(topic not in self._state for topic in subscriber.topics if topic in self._producers)
+                and (self._kick is None or self._kick.done())):
+            # اولین مشترک این topic؛ بدون منتظر ماندن برای دور بعد محاسبه شود
+            self._kick = asyncio.create_task(self.publish())
+
+    def unsubscribe(self, subscriber: Subscriber, topics: Iterable[str]):
+        subscriber.topics.difference_update(topics)
+        for topic in topics:
+            subscriber.cursors.pop(topic, None)
+
+    async def serve(self, websocket, topics: Optional[Iterable[str]] = None):
+        """سرویس یک اتصال پذیرفته‌شده تا زمان قطع شدن (پیش‌فرض: همه topicها)"""
+        subscriber = Subscriber(websocket, self.queue_size)
+        self._subscribers.add(subscriber)
+        self.subscribe(subscriber, self.topics if topics is None else topics)
+
+        writer = asyncio.create_task(self._write(subscriber))
+        reader = asyncio.create_task(self._read(subscriber))
+        try:
+            await asyncio.wait({writer, reader}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            writer.cancel()
+            reader.cancel()
+            self._subscribers.discard(subscriber)
+        if subscriber.dropped:
+            try:
+                await websocket.close(code=1013)
+            except Exception:
+                pass
+
+    async def _write(self, subscriber: Subscriber):
+        while True:
+            message = await subscriber.queue.get()
+            if message is None:
+                return
+            if message is _RESYNC:
+                messages = [self._encode_snapshot(topic, self._state[topic])
+                            for topic in subscriber.topics if topic in self._state]
+                for topic in subscriber.topics:
+                    if topic in self._streams:
+                        events = self._stream_backlog(subscriber, topic)
+                        if events:
+                            messages.append(self._encode_events(topic, events))
+            else:
+                messages = [message]
+            for text in messages:
+                if isinstance(text, tuple):
+                    text = self._filter_events(subscriber, text)
+                    if text is None:
+                        continue
+                try:
+                    await asyncio.wait_for(subscriber.websocket.send_text(text), self.send_timeout)
+                except asyncio.TimeoutError:
+                    self._drop(subscriber)
+                    return
+                except Exception:
+                    return
+                self.delivered += 1
+            subscriber.overflows = 0
+
+    @staticmethod
+    def _filter_events(subscriber: Subscriber, message: Tuple) -> Optional[str]:
+        """حذف رویدادهایی که این مشترک قبلاً گرفته است (فقط در همپوشانی backlog و پخش دوباره کد می‌شود)"""
+        topic, first, last, events, text = message
+        cursor = subscriber.cursors.get(topic)
+        if cursor is not None and last <= cursor:
+            return None
+        if cursor is not None and first <= cursor:
+            events = [event for event in events if event['seq'] > cursor]
+            text = json.dumps({'type': 'events', 'topic': topic, 'seq': last, 'events': events},
+                              ensure_ascii=False, default=str)
+        subscriber.cursors[topic] = last
+        return text
+
+    async def _read(self, subscriber: Subscriber):
+        while True:
+            try:
+                text = await subscriber.websocket.receive_text()
+            except Exception:
+                return
+            try:
+                command = json.loads(text)
+                topics = command.get('topics', [])
+                if command.get('action') == 'subscribe':
+                    self.subscribe(subscriber, topics, command.get('since'))
+                elif command.get('action') == 'unsubscribe':
+                    self.unsubscribe(subscriber, topics)
+            except (ValueError, AttributeError, TypeError):
+                continue
+
+    def stats(self) -> Dict:
+        per_topic = {topic: 0 for topic in self.topics}
+        for subscriber in self._subscribers:
+            for topic in subscriber.topics:
+                per_topic[topic] += 1
+        return {
+            'clients': len(self._subscribers),
+            'subscribers_per_topic': per_topic,
+            'published': self.published,
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'dropped_clients': self.dropped_clients,
+            'producer_errors': self.producer_errors,
+            'producer_errors_per_topic': dict(self._topic_errors),
+            'last_publish_duration': self.last_publish_duration
+        }
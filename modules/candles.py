@@ -0,0 +1,202 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from modules.lazy import lazy_import
+
+ccxt = lazy_import('ccxt')
+
+# هر کندل یک ردیف float64: timestamp, open, high, low, close, volume
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+ROW_SIZE = len(CANDLE_COLUMNS) * 8
+
+CandleKey = Tuple[str, str, str]
+
+class CandleStore:
+    """مخزن محلی کندل‌ها روی دیسک (memmap) با دریافت افزایشی از صرافی
+
+    چند worker می‌توانند یک root مشترک داشته باشند: هر نوشتن زیر قفل فایل (flock روی فایل
+    .lock کنار داده) و بر اساس وضعیت واقعی فایل روی دیسک انجام می‌شود، بازنویسی کامل با فایل
+    موقت و os.replace است تا memmap پردازه‌های دیگر زیر پایشان کوتاه نشود، و load با تغییر
+    inode/اندازه/mtime فایل دوباره map می‌کند.
+    """
+
+    def __init__(self, root: str = 'data/candles', page_limit: int = 1000, min_sync_interval: float = 5.0):
+        self.root = root
+        self.page_limit = page_limit
+        # فاصله حداقل بین دو همگام‌سازی یک کلید؛ درخواست‌های پشت‌سرهم به شبکه نمی‌روند
+        self.min_sync_interval = min_sync_interval
+        self._arrays: Dict[CandleKey, np.ndarray] = {}
+        # (inode، اندازه، mtime) فایل در زمان map شدن؛ تغییر آن یعنی نوشتن این یا پردازه دیگر
+        self._file_stats: Dict[CandleKey, Tuple[int, int, int]] = {}
+        self._locks: Dict[CandleKey, asyncio.Lock] = {}
+        self._synced_at: Dict[CandleKey, float] = {}
+        # بیشترین تاریخچه‌ای که برای هر کلید پر شده (برای ارزهای جدید با تاریخچه کوتاه)
+        self._backfilled: Dict[CandleKey, int] = {}
+
+    def path(self, key: CandleKey) -> str:
+        exchange_id, symbol, timeframe = key
+        safe_symbol = symbol.replace('/', '_').replace(':', '_')
+        return os.path.join(self.root, exchange_id, safe_symbol, f'{timeframe}.f64')
+
+    @contextmanager
+    def _file_lock(self, key: CandleKey):
+        """قفل انحصاری بین پردازه‌ها برای نوشتن یک کلید"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.lock', 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def load(self, key: CandleKey) -> np.ndarray:
+        """همه کندل‌های ذخیره‌شده یک کلید به صورت آرایه memmap فقط‌خواندنی"""
+        path = self.path(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._arrays.pop(key, None)
+            self._file_stats.pop(key, None)
+            return np.empty((0, len(CANDLE_COLUMNS)))
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        array = self._arrays.get(key)
+        if array is None or self._file_stats.get(key) != signature:
+            rows = st.st_size // ROW_SIZE
+            if rows == 0:
+                self._arrays.pop(key, None)
+                self._file_stats.pop(key, None)
+                return np.empty((0, len(CANDLE_COLUMNS)))
+            array = np.memmap(path, dtype=np.float64, mode='r', shape=(rows, len(CANDLE_COLUMNS)))
+            self._arrays[key] = array
+            self._file_stats[key] = signature
+        return array
+
+    def _forget(self, key: CandleKey):
+        self._arrays.pop(key, None)
+        self._file_stats.pop(key, None)
+
+    def version(self, key: CandleKey) -> str:
+        """نسخه داده یک کلید از خود فایل روی دیسک (inode، اندازه، mtime و آخرین ردیف)
+
+        برخلاف شمارنده درون پردازه، در همه workerها و پس از راه‌اندازی دوباره برای داده یکسان
+        همان مقدار است. آخرین ردیف هم در آن است چون بازنویسی درجای کندل باز اندازه فایل را
+        تغییر نمی‌دهد و mtime ممکن است در همان tick ساعت فایل‌سیستم بماند.
+        """
+        array = self.load(key)
+        signature = self._file_stats.get(key)
+        if signature is None:
+            return '0'
+        digest = hashlib.sha1(repr(signature).encode())
+        digest.update(np.ascontiguousarray(array[-1]).tobytes())
+        return digest.hexdigest()[:16]
+
+    def last_timestamp(self, key: CandleKey) -> Optional[int]:
+        array = self.load(key)
+        return int(array[-1, 0]) if len(array) else None
+
+    def write(self, key: CandleKey, ohlcv) -> int:
+        """افزودن کندل‌های جدیدتر از آخرین کندل ذخیره‌شده؛ کندل آخر (ممکن است هنوز باز باشد) بازنویسی می‌شود"""
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS))
+        if not len(rows):
+            return 0
+
+        with self._file_lock(key) as path:
+            # وضعیت فعلی فایل (شاید پردازه دیگری همین الان نوشته باشد)، نه نسخه کش‌شده
+            existing = self.load(key)
+            stored = len(existing)
+            last = int(existing[-1, 0]) if stored else None
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                # ردیف ناقص انتهای فایل (کرش وسط نوشتن) کنار گذاشته می‌شود
+                f.truncate(stored * ROW_SIZE)
+                if last is not None:
+                    same = rows[rows[:, 0] == last]
+                    if len(same) and not np.array_equal(same[-1], existing[-1]):
+                        f.seek((stored - 1) * ROW_SIZE)
+                        f.write(same[-1].tobytes())
+                    rows = rows[rows[:, 0] > last]
+                f.seek(stored * ROW_SIZE)
+                f.write(np.ascontiguousarray(rows).tobytes())
+
+            # فایل تغییر کرده؛ memmap دفعه بعد دوباره باز می‌شود
+            self._forget(key)
+        return len(rows)
+
+    async def sync(self, exchange, symbol: str, timeframe: str, history: int = 100, force: bool = False) -> int:
+        """دریافت فقط کندل‌های جدیدتر از آخرین timestamp ذخیره‌شده"""
+        key = (exchange.exchange_id, symbol, timeframe)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            synced_at = self._synced_at.get(key)
+            if not force and synced_at is not None and time.monotonic() - synced_at < self.min_sync_interval:
+                return 0
+
+            timeframe_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+            last = self.last_timestamp(key)
+            stored = len(self.load(key))
+            if last is None or (stored < history and self._backfilled.get(key, 0) < history):
+                # پر کردن تاریخچه تا حداقل تعداد درخواستی
+                since = int(time.time() * 1000) - history * timeframe_ms
+                if last is not None:
+                    since = min(since, int(self.load(key)[0, 0]) - (history - stored) * timeframe_ms)
+                self._backfilled[key] = history
+            else:
+                since = last
+
+            added = 0
+            while True:
+                ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=self.page_limit)
+                if not ohlcv:
+                    break
+                if last is not None and ohlcv[0][0] < last and stored:
+                    added += self._merge_history(key, ohlcv)
+                else:
+                    added += self.write(key, ohlcv)
+                last = self.last_timestamp(key)
+                stored = len(self.load(key))
+                next_since = int(ohlcv[-1][0]) + timeframe_ms
+                # صفحه ناقص، عدم پیشرفت یا رسیدن به زمان حال یعنی کندل جدیدتری نیست
+                if len(ohlcv) < self.page_limit or next_since <= since or next_since > time.time() * 1000:
+                    break
+                since = next_since
+
+            self._synced_at[key] = time.monotonic()
+            return added
+
+    def _merge_history(self, key: CandleKey, ohlcv) -> int:
+        """ادغام کندل‌هایی که داخل یا قبل از بازه ذخیره‌شده هستند (پر کردن تاریخچه به عقب)"""
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(CANDLE_COLUMNS))
+        with self._file_lock(key) as path:
+            existing = np.array(self.load(key))
+            # در timestampهای تکراری، داده جدیدتر برنده است
+            combined = np.concatenate([existing, rows])[::-1]
+            _, index = np.unique(combined[:, 0], return_index=True)
+            merged = combined[index]
+            # فایل جدید و os.replace: پردازه‌هایی که فایل قبلی را map کرده‌اند همان inode قبلی را می‌خوانند
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(np.ascontiguousarray(merged).tobytes())
+            os.replace(temp_path, path)
+            self._forget(key)
+        return len(merged) - len(existing)
+
+    async def data_version(self, exchange, symbol: str, timeframe: str = '1h', limit: int = 100) -> Tuple[Optional[int], str]:
+        """(timestamp آخرین کندل، نسخه داده) پس از همگام‌سازی؛ برای کلید کش و ETag"""
+        await self.sync(exchange, symbol, timeframe, history=limit)
+        key = (exchange.exchange_id, symbol, timeframe)
+        return self.last_timestamp(key), self.version(key)
+
+    async def get_ohlcv(self, exchange, symbol: str, timeframe: str = '1h', limit: int = 100) -> np.ndarray:
+        """آخرین limit کندل؛ برش مستقیم از memmap بدون کپی"""
+        await self.sync(exchange, symbol, timeframe, history=limit)
+        return self.load((exchange.exchange_id, symbol, timeframe))[-limit:]
+
+# نمونه مشترک بین اسکنر، نمودارها و تریدر
+candle_store = CandleStore()
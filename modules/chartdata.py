@@ -0,0 +1,66 @@
+import json
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+# ستون‌های اندیکاتور هر نوع نمودار
+CHART_INDICATORS = {
+    'candlestick': ['sma_20', 'sma_50'],
+    'technical': ['rsi_14', 'macd', 'macd_signal'],
+}
+
+BINARY_MAGIC = b'PTCD'
+
+def build_columns(ohlcv: np.ndarray, values: Dict[str, np.ndarray], names: List[str]) -> Dict[str, np.ndarray]:
+    """ستون‌های عددی هم‌تراز: زمان epoch (میلی‌ثانیه، int64) و بقیه float32"""
+    columns = {'t': np.asarray(ohlcv[:, 0], dtype=np.int64)}
+    for i, name in enumerate(['open', 'high', 'low', 'close', 'volume'], start=1):
+        columns[name] = np.asarray(ohlcv[:, i], dtype=np.float32)
+    for name in names:
+        columns[name] = np.asarray(values[name], dtype=np.float32)
+    return columns
+
+def _json_array(values: np.ndarray) -> str:
+    if values.dtype.kind in 'iu':
+        text = np.char.mod('%d', values)
+    else:
+        # 7 رقم معنادار برای float32 کافی است؛ NaN در JSON به null تبدیل می‌شود
+        text = np.where(np.isnan(values), 'null', np.char.mod('%.7g', values))
+    return '[' + ','.join(text.tolist()) + ']'
+
+def encode_json(columns: Dict[str, np.ndarray], meta: Dict) -> bytes:
+    """خروجی JSON فشرده: فقط آرایه‌های ستونی بدون layout و template"""
+    body = ','.join(f'{json.dumps(name)}:{_json_array(values)}' for name, values in columns.items())
+    rows = len(columns['t']) if 't' in columns else 0
+    header = json.dumps({**meta, 'rows': rows}, ensure_ascii=False)[:-1]
+    return f'{header},"columns":{{{body}}}}}'.encode('utf-8')
+
+def encode_binary(columns: Dict[str, np.ndarray], meta: Dict) -> bytes:
+    """خروجی باینری: MAGIC + طول هدر (uint32) + هدر JSON + آرایه‌های little-endian هم‌تراز 8 بایتی
+
+    ستون زمان به صورت float64 ارسال می‌شود تا در مرورگر مستقیم با Float64Array خوانده شود.
+    """
+    arrays = []
+    for name, values in columns.items():
+        if values.dtype.kind in 'iu':
+            values = values.astype('<f8')
+        arrays.append((name, np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))))
+
+    layout = []
+    offset = 0
+    for name, values in arrays:
+        layout.append({'name': name, 'dtype': 'float64' if values.dtype.itemsize == 8 else 'float32',
+                       'offset': offset, 'length': len(values)})
+        offset += (values.nbytes + 7) // 8 * 8
+
+    rows = len(arrays[0][1]) if arrays else 0
+    header = json.dumps({**meta, 'rows': rows, 'columns': layout}, ensure_ascii=False).encode('utf-8')
+    prefix_length = len(BINARY_MAGIC) + 4 + len(header)
+    header += b' ' * ((8 - prefix_length % 8) % 8)
+
+    parts = [BINARY_MAGIC, struct.pack('<I', len(header)), header]
+    for _, values in arrays:
+        parts.append(values.tobytes())
+        parts.append(b'\0' * ((8 - values.nbytes % 8) % 8))
+    return b''.join(parts)
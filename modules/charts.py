@@ -0,0 +1,246 @@
+import asyncio
+from typing import Optional
+from modules.exchange import AsyncExchange
+from modules.ratelimit import PRIORITY_CHARTS
+from modules.candles import CandleStore, candle_store as default_candle_store
+from modules import indicators
+from modules.chartdata import CHART_INDICATORS, build_columns
+from modules.downsample import downsample_chart
+from modules.indicators import IndicatorEngine, indicator_engine as default_indicator_engine
+from modules.lazy import lazy_import
+
+# plotly و pandas فقط برای خروجی Plotly لازم‌اند (مسیر columns به آن‌ها نیازی ندارد)
+go = lazy_import('plotly.graph_objects')
+subplots = lazy_import('plotly.subplots')
+pd = lazy_import('pandas')
+
+class AdvancedCharts:
+    def __init__(self, candle_store: Optional[CandleStore] = None, indicator_engine: Optional[IndicatorEngine] = None):
+        self.exchange = AsyncExchange('binance', priority=PRIORITY_CHARTS)
+        self.candles = candle_store or default_candle_store
+        self.indicators = indicator_engine or default_indicator_engine
+    
+    async def create_candlestick_chart(self, symbol: str, timeframe: str = '1h', periods: int = 100, width: int = 0):
+        """ایجاد نمودار کندل استیک پیشرفته"""
+        try:
+            # دریافت داده‌های تاریخی از مخزن محلی (فقط کندل‌های جدید از صرافی گرفته می‌شوند)
+            ohlcv, values = await self._load(symbol, timeframe, periods, width)
+            # ساخت نمودار پردازش سنگین است و در thread جدا اجرا می‌شود
+            return await asyncio.to_thread(self._build_candlestick_chart, ohlcv, values, symbol, timeframe)
+            
+        except Exception as e:
+            print(f"Error creating chart: {e}")
+            return None
+    
+    async def get_chart_data(self, symbol: str, kind: str = 'candlestick', timeframe: str = '1h', periods: int = 100,
+                             width: int = 0):
+        """داده ستونی نمودار (بدون ساخت شکل Plotly)؛ شکل در مرورگر از قالب کش‌شده ساخته می‌شود"""
+        try:
+            ohlcv, values = await self._load(symbol, timeframe, periods, width)
+            return build_columns(ohlcv, values, CHART_INDICATORS[kind])
+            
+        except Exception as e:
+            print(f"Error loading chart data: {e}")
+            return None
+    
+    async def data_version(self, symbol: str, timeframe: str = '1h', periods: int = 100):
+        """(timestamp آخرین کندل، نسخه داده روی دیسک) برای کلید کش رندر و ETag"""
+        return await self.candles.data_version(self.exchange, symbol, timeframe, periods)
+
+    async def _load(self, symbol: str, timeframe: str, periods: int, width: int = 0):
+        """کندل‌ها و اندیکاتورهای هم‌تراز؛ اندیکاتورها فقط برای کندل‌های بسته جدید محاسبه می‌شوند
+
+        با width > 0 داده به حدود width نقطه کاهش می‌یابد (یک نقطه برای هر پیکسل نمودار).
+        """
+        ohlcv = await self.candles.get_ohlcv(self.exchange, symbol, timeframe, periods)
+        key = (self.exchange.exchange_id, symbol, timeframe)
+        values = self.indicators.series(key, self.candles.load(key), limit=len(ohlcv))
+        if width and len(ohlcv) > width:
+            ohlcv, values = await asyncio.to_thread(downsample_chart, ohlcv, values, width)
+        return ohlcv, values
+    
+    def _build_candlestick_chart(self, ohlcv, values, symbol: str, timeframe: str):
+        """ساخت نمودار کندل استیک از داده‌های OHLCV"""
+        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        
+        # ایجاد نمودار کندل استیک
+        fig = subplots.make_subplots(
+            rows=2, cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.1,
+            subplot_titles=(f'نمودار قیمت {symbol}', 'حجم معاملات'),
+            row_width=[0.7, 0.3]
+        )
+        
+        # کندل استیک
+        fig.add_trace(
+            go.Candlestick(
+                x=df['timestamp'],
+                open=df['open'],
+                high=df['high'],
+                low=df['low'],
+                close=df['close'],
+                name='Price'
+            ),
+            row=1, col=1
+        )
+        
+        # حجم معاملات
+        fig.add_trace(
+            go.Bar(
+                x=df['timestamp'],
+                y=df['volume'],
+                name='Volume',
+                marker_color='rgba(0, 128, 255, 0.7)'
+            ),
+            row=2, col=1
+        )
+        
+        # اضافه کردن میانگین متحرک
+        df['MA20'] = values['sma_20']
+        df['MA50'] = values['sma_50']
+        
+        fig.add_trace(
+            go.Scatter(
+                x=df['timestamp'],
+                y=df['MA20'],
+                line=dict(color='orange', width=2),
+                name='MA20'
+            ),
+            row=1, col=1
+        )
+        
+        fig.add_trace(
+            go.Scatter(
+                x=df['timestamp'],
+                y=df['MA50'],
+                line=dict(color='red', width=2),
+                name='MA50'
+            ),
+            row=1, col=1
+        )
+        
+        # تنظیمات layout
+        fig.update_layout(
+            title=f'نمودار پیشرفته {symbol} - {timeframe}',
+            xaxis_title='زمان',
+            yaxis_title='قیمت (USDT)',
+            template='plotly_dark',
+            height=600,
+            showlegend=True
+        )
+        
+        return fig.to_json()
+    
+    async def create_technical_analysis_chart(self, symbol: str):
+        """نمودار تحلیل تکنیکال با اندیکاتورهای مختلف"""
+        try:
+            ohlcv, values = await self._load(symbol, '1d', 100)
+            return await asyncio.to_thread(self._build_technical_analysis_chart, ohlcv, values, symbol)
+            
+        except Exception as e:
+            print(f"Error in technical analysis: {e}")
+            return None
+    
+    def _build_technical_analysis_chart(self, ohlcv, values, symbol: str):
+        """ساخت نمودار تحلیل تکنیکال از داده‌های OHLCV"""
+        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        
+        # محاسبه اندیکاتورها
+        df['RSI'] = values['rsi_14']
+        df['MACD'] = values['macd']
+        df['MACD_signal'] = values['macd_signal']
+        
+        fig = subplots.make_subplots(
+            rows=3, cols=1,
+            shared_xaxes=True,
+            vertical_spacing=0.05,
+            subplot_titles=('قیمت و حجم', 'RSI', 'MACD'),
+            row_width=[0.4, 0.3, 0.3]
+        )
+        
+        # نمودار قیمت
+        fig.add_trace(
+            go.Candlestick(
+                x=df['timestamp'],
+                open=df['open'],
+                high=df['high'],
+                low=df['low'],
+                close=df['close'],
+                name='Price'
+            ),
+            row=1, col=1
+        )
+        
+        # حجم
+        fig.add_trace(
+            go.Bar(
+                x=df['timestamp'],
+                y=df['volume'],
+                name='Volume',
+                marker_color='rgba(0, 128, 255, 0.7)'
+            ),
+            row=1, col=1
+        )
+        
+        # RSI
+        fig.add_trace(
+            go.Scatter(
+                x=df['timestamp'],
+                y=df['RSI'],
+                line=dict(color='purple', width=2),
+                name='RSI'
+            ),
+            row=2, col=1
+        )
+        
+        # خطوط RSI
+        fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
+        fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
+        
+        # MACD
+        fig.add_trace(
+            go.Scatter(
+                x=df['timestamp'],
+                y=df['MACD'],
+                line=dict(color='blue', width=2),
+                name='MACD'
+            ),
+            row=3, col=1
+        )
+        
+        fig.add_trace(
+            go.Scatter(
+                x=df['timestamp'],
+                y=df['MACD_signal'],
+                line=dict(color='red', width=2),
+                name='Signal'
+            ),
+            row=3, col=1
+        )
+        
+        fig.update_layout(
+            title=f'تحلیل تکنیکال {symbol}',
+            height=800,
+            template='plotly_dark',
+            showlegend=True
+        )
+        
+        return fig.to_json()
+    
+    def calculate_rsi(self, prices, period=14):
+        """محاسبه RSI"""
+        return indicators.rsi(prices, period)
+    
+    def calculate_macd(self, prices, fast=12, slow=26, signal=9):
+        """محاسبه MACD"""
+        return indicators.macd(prices, fast, slow, signal)
+
+    async def close(self):
+        """بستن اتصال صرافی"""
+        await self.exchange.close()
+
+# نمونه استفاده
+chart_manager = AdvancedCharts()
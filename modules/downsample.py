@@ -0,0 +1,67 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+def bucket_starts(length: int, buckets: int) -> np.ndarray:
+    """ابتدای سطل‌های تقریباً هم‌اندازه روی اندیس‌ها"""
+    return np.linspace(0, length, buckets + 1).astype(np.int64)[:-1]
+
+def aggregate_ohlcv(ohlcv: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """تجمیع کندل‌ها در سطل‌های درشت‌تر: open اول، high بیشینه، low کمینه، close آخر، volume جمع"""
+    ends = np.append(starts[1:], len(ohlcv)) - 1
+    return np.column_stack([
+        ohlcv[starts, 0],
+        ohlcv[starts, 1],
+        np.maximum.reduceat(ohlcv[:, 2], starts),
+        np.minimum.reduceat(ohlcv[:, 3], starts),
+        ohlcv[ends, 4],
+        np.add.reduceat(ohlcv[:, 5], starts),
+    ])
+
+def lttb_select(x: np.ndarray, y: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets روی سطل‌های داده‌شده؛ از هر سطل یک اندیس انتخاب می‌شود
+
+    نقطه‌ای انتخاب می‌شود که با نقطه انتخابی سطل قبل و میانگین سطل بعد بزرگ‌ترین مثلث را بسازد،
+    بنابراین قله‌ها و دره‌های خط حفظ می‌شوند. NaN (دوره گرم شدن اندیکاتور) هرگز انتخاب نمی‌شود
+    مگر اینکه کل سطل NaN باشد.
+    """
+    length = len(y)
+    ends = np.append(starts[1:], length)
+    selected = np.empty(len(starts), dtype=np.int64)
+    previous = None
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        segment = y[start:end]
+        if previous is None or np.isnan(y[previous]) or i == len(starts) - 1:
+            # سطل اول (یا بعد از ناحیه NaN) و سطل آخر: اولین/آخرین نقطه معتبر
+            valid = np.flatnonzero(~np.isnan(segment))
+            if len(valid):
+                offset = valid[-1] if i == len(starts) - 1 else valid[0]
+            else:
+                offset = 0
+        else:
+            next_start, next_end = end, ends[i + 1]
+            next_y = y[next_start:next_end]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = np.nanmean(next_y) if not np.isnan(next_y).all() else y[previous]
+            area = np.abs((x[previous] - avg_x) * (segment - y[previous])
+                          - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+            offset = 0 if np.isnan(area).all() else int(np.nanargmax(area))
+        selected[i] = start + offset
+        previous = selected[i]
+    return selected
+
+def downsample_chart(ohlcv: np.ndarray, values: Dict[str, np.ndarray], width: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """کاهش داده نمودار به حدود width نقطه (یک نقطه به ازای هر پیکسل)
+
+    کندل‌ها با معنای درست OHLCV تجمیع می‌شوند و برای هر خط اندیکاتور با LTTB یک نقطه
+    نماینده از همان سطل انتخاب می‌شود تا همه ستون‌ها هم‌تراز باقی بمانند.
+    """
+    if width <= 0 or len(ohlcv) <= width:
+        return ohlcv, values
+    starts = bucket_starts(len(ohlcv), width)
+    x = np.asarray(ohlcv[:, 0], dtype=np.float64)
+    lines = {}
+    for name, series in values.items():
+        series = np.asarray(series, dtype=np.float64)
+        lines[name] = series[lttb_select(x, series, starts)]
+    return aggregate_ohlcv(np.asarray(ohlcv), starts), lines
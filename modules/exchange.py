@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from modules.lazy import lazy_import
+from modules.metrics import metrics
+from modules.ratelimit import DEFAULT_BUDGET, PRIORITY_SCANS, VENUE_BUDGETS, WeightedTokenBucket
+
+# ccxt و ccxt.async_support (نیم ثانیه import) فقط با اولین کلاینت یا اولین خطا بارگذاری می‌شوند
+ccxt = lazy_import('ccxt')
+ccxt_async = lazy_import('ccxt.async_support')
+
+exchange_latency = metrics.histogram('exchange_request_duration_seconds', 'Exchange API call latency',
+                                     ('exchange', 'method'))
+exchange_errors = metrics.counter('exchange_errors_total', 'Failed exchange API calls by error type',
+                                  ('exchange', 'method', 'error'))
+
+class ExchangeRegistry:
+    """رجیستری سراسری کلاینت‌های ccxt و محدودکننده نرخ هر صرافی
+
+    کلاینت‌ها بر اساس (صرافی، تنظیمات) مشترک‌اند و همه کلاینت‌های یک صرافی (حتی با کلیدهای
+    متفاوت) از یک سطل توکن وزن‌دار استفاده می‌کنند، چون سقف صرافی به ازای IP است.
+    factory(exchange_id, config) سازنده کلاینت است (پیش‌فرض ccxt.async_support؛ در بنچمارک FakeExchange).
+    """
+
+    def __init__(self, factory: Optional[Callable[[str, Dict], Any]] = None):
+        self.factory = factory or self._ccxt_client
+        self._clients: Dict[Tuple, Any] = {}
+        self._users: Dict[Tuple, int] = {}
+        self._limiters: Dict[str, WeightedTokenBucket] = {}
+
+    @staticmethod
+    def _key(exchange_id: str, config: Dict) -> Tuple:
+        return (exchange_id, tuple(sorted((k, repr(v)) for k, v in config.items())))
+
+    @staticmethod
+    def _ccxt_client(exchange_id: str, config: Dict):
+        # محدودیت نرخ داخلی ccxt غیرفعال است؛ سطل مشترک رجیستری جای آن را می‌گیرد
+        return getattr(ccxt_async, exchange_id)({**config, 'enableRateLimit': False})
+
+    def client(self, exchange_id: str, config: Dict):
+        key = self._key(exchange_id, config)
+        if key not in self._clients:
+            self._clients[key] = self.factory(exchange_id, config)
+        self._users[key] = self._users.get(key, 0) + 1
+        return self._clients[key]
+
+    async def release(self, exchange_id: str, config: Dict):
+        """کم کردن شمارنده استفاده؛ کلاینت با آخرین کاربر بسته می‌شود"""
+        key = self._key(exchange_id, config)
+        self._users[key] = self._users.get(key, 1) - 1
+        if self._users[key] <= 0 and key in self._clients:
+            del self._users[key]
+            await self._clients.pop(key).close()
+
+    def limiter(self, exchange_id: str) -> WeightedTokenBucket:
+        if exchange_id not in self._limiters:
+            capacity, period, _ = VENUE_BUDGETS.get(exchange_id, DEFAULT_BUDGET)
+            self._limiters[exchange_id] = WeightedTokenBucket(capacity, period)
+        return self._limiters[exchange_id]
+
+    @staticmethod
+    def weight(exchange_id: str, method: str) -> float:
+        return VENUE_BUDGETS.get(exchange_id, DEFAULT_BUDGET)[2].get(method, 1)
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        self._users = {}
+        await asyncio.gather(*(client.close() for client in clients.values()), return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            'clients': len(self._clients),
+            'venues': {exchange_id: limiter.stats() for exchange_id, limiter in self._limiters.items()}
+        }
+
+# رجیستری مشترک کل پروسس
+exchange_registry = ExchangeRegistry()
+
+class AsyncExchange:
+    """لایه دسترسی async به صرافی با timeout و لغو برای هر فراخوانی
+
+    کلاینت ccxt و سطل توکن از رجیستری مشترک گرفته می‌شوند؛ priority پیش‌فرض این نما
+    در هر فراخوانی با آرگومان priority قابل تغییر است.
+    """
+
+    def __init__(self, exchange_id: str = 'binance', config: Optional[Dict] = None, timeout: float = 10.0,
+                 priority: int = PRIORITY_SCANS, registry: Optional[ExchangeRegistry] = None):
+        self.exchange_id = exchange_id
+        self.config = dict(config or {})
+        self.timeout = timeout
+        self.priority = priority
+        self.registry = registry or exchange_registry
+        self._client = None
+
+    @property
+    def client(self):
+        """کلاینت ccxt.async_support مشترک؛ اتصال‌ها (aiohttp session) بین همه ماژول‌ها دوباره استفاده می‌شوند"""
+        if self._client is None:
+            self._client = self.registry.client(self.exchange_id, self.config)
+        return self._client
+
+    async def call(self, method: str, *args, timeout: Optional[float] = None, priority: Optional[int] = None,
+                   **kwargs):
+        """فراخوانی یک متد صرافی با سقف زمانی مشخص، پس از گرفتن توکن به اندازه وزن متد"""
+        limiter = self.registry.limiter(self.exchange_id)
+        try:
+            await limiter.acquire(self.registry.weight(self.exchange_id, method),
+                                  self.priority if priority is None else priority)
+        except ccxt.BaseError as e:
+            exchange_errors.inc(self.exchange_id, method, type(e).__name__)
+            raise
+        limit = timeout if timeout is not None else self.timeout
+        client = self.client
+        started = time.perf_counter()
+        try:
+            # wait_for در صورت timeout یا لغو درخواست، کوروتین صرافی را هم لغو می‌کند
+            return await asyncio.wait_for(getattr(client, method)(*args, **kwargs), limit)
+        except asyncio.TimeoutError:
+            exchange_errors.inc(self.exchange_id, method, 'RequestTimeout')
+            raise ccxt.RequestTimeout(f"{self.exchange_id}.{method} timed out after {limit}s")
+        except (ccxt.DDoSProtection, ccxt.RateLimitExceeded) as e:
+            # صرافی محدودیت اعمال کرده (429/418)؛ همه مصرف‌کننده‌ها متوقف می‌شوند
+            exchange_errors.inc(self.exchange_id, method, type(e).__name__)
+            limiter.penalize()
+            raise
+        except Exception as e:
+            exchange_errors.inc(self.exchange_id, method, type(e).__name__)
+            raise
+        finally:
+            exchange_latency.observe(time.perf_counter() - started, self.exchange_id, method)
+            used = (getattr(client, 'last_response_headers', None) or {}).get('x-mbx-used-weight-1m')
+            if used is not None:
+                limiter.observe_used(float(used))
+
+    async def fetch_markets(self, **kwargs):
+        return await self.call('fetch_markets', **kwargs)
+
+    async def fetch_ticker(self, symbol: str, **kwargs):
+        return await self.call('fetch_ticker', symbol, **kwargs)
+
+    async def fetch_tickers(self, symbols=None, **kwargs):
+        return await self.call('fetch_tickers', symbols, **kwargs)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1h', since: Optional[int] = None,
+                          limit: Optional[int] = None, **kwargs):
+        return await self.call('fetch_ohlcv', symbol, timeframe, since, limit, **kwargs)
+
+    async def fetch_balance(self, **kwargs):
+        return await self.call('fetch_balance', **kwargs)
+
+    async def create_market_buy_order(self, symbol: str, amount: float, **kwargs):
+        return await self.call('create_market_buy_order', symbol, amount, **kwargs)
+
+    async def create_market_sell_order(self, symbol: str, amount: float, **kwargs):
+        return await self.call('create_market_sell_order', symbol, amount, **kwargs)
+
+    async def fetch_order(self, id: Optional[str], symbol: Optional[str] = None, **kwargs):
+        return await self.call('fetch_order', id, symbol, **kwargs)
+
+    async def close(self):
+        """رها کردن کلاینت مشترک (با آخرین کاربر بسته می‌شود)"""
+        if self._client is not None:
+            self._client = None
+            await self.registry.release(self.exchange_id, self.config)
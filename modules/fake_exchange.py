@@ -0,0 +1,301 @@
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+import zlib
+from typing import Dict, List, Optional, Set
+
+import ccxt
+import websockets
+
+DEFAULT_SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT', 'ADAUSDT', 'DOGEUSDT', 'ETHBTC']
+
+class FakeExchangeServer:
+    """سرور WebSocket محلی با پروتکل جریان بایننس برای تست بدون اینترنت
+
+    - SUBSCRIBE / UNSUBSCRIBE / LIST_SUBSCRIPTIONS مثل بایننس پاسخ داده می‌شوند
+    - !miniTicker@arr و <symbol>@trade هر interval ثانیه با قیمت‌های random walk ارسال می‌شوند
+    - drop_connections() همه اتصال‌ها را قطع می‌کند تا reconnect و resubscribe تست شود
+    """
+
+    def __init__(self, symbols: Optional[List[str]] = None, interval: float = 0.5, seed: int = 0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.symbols = symbols or DEFAULT_SYMBOLS
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self._random = random.Random(seed)
+        self.prices = {symbol: self._random.uniform(0.1, 50000) for symbol in self.symbols}
+        self.opens = dict(self.prices)
+        self.highs = dict(self.prices)
+        self.lows = dict(self.prices)
+        self.volumes = {symbol: 0.0 for symbol in self.symbols}
+        self._subscriptions: Dict[object, Set[str]] = {}
+        self._server = None
+        self._ticker_task: Optional[asyncio.Task] = None
+        self.connections = 0
+        self.subscribe_requests = 0
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self.host}:{self.port}/ws'
+
+    async def start(self) -> str:
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker_task = asyncio.create_task(self._tick())
+        return self.url
+
+    async def stop(self):
+        if self._ticker_task is not None:
+            self._ticker_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def drop_connections(self):
+        for connection in list(self._subscriptions):
+            await connection.close(code=1001)
+
+    async def _handle(self, connection):
+        self.connections += 1
+        streams: Set[str] = set()
+        self._subscriptions[connection] = streams
+        try:
+            async for raw in connection:
+                request = json.loads(raw)
+                method = request.get('method')
+                result = None
+                if method == 'SUBSCRIBE':
+                    self.subscribe_requests += 1
+                    streams.update(request.get('params', []))
+                elif method == 'UNSUBSCRIBE':
+                    streams.difference_update(request.get('params', []))
+                elif method == 'LIST_SUBSCRIPTIONS':
+                    result = sorted(streams)
+                await connection.send(json.dumps({'result': result, 'id': request.get('id')}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._subscriptions.pop(connection, None)
+
+    def _step(self):
+        for symbol, price in self.prices.items():
+            price *= 1 + self._random.gauss(0, 0.002)
+            self.prices[symbol] = price
+            self.highs[symbol] = max(self.highs[symbol], price)
+            self.lows[symbol] = min(self.lows[symbol], price)
+            self.volumes[symbol] += self._random.uniform(0, 10)
+
+    def mini_tickers(self) -> List[Dict]:
+        now = int(time.time() * 1000)
+        return [{
+            'e': '24hrMiniTicker', 'E': now, 's': symbol,
+            'c': f'{self.prices[symbol]:.8f}', 'o': f'{self.opens[symbol]:.8f}',
+            'h': f'{self.highs[symbol]:.8f}', 'l': f'{self.lows[symbol]:.8f}',
+            'v': f'{self.volumes[symbol]:.4f}', 'q': f'{self.volumes[symbol] * self.prices[symbol]:.4f}'
+        } for symbol in self.symbols]
+
+    def trade(self, symbol: str) -> Dict:
+        now = int(time.time() * 1000)
+        return {'e': 'trade', 'E': now, 's': symbol, 'p': f'{self.prices[symbol]:.8f}',
+                'q': f'{self._random.uniform(0.001, 5):.4f}', 'T': now}
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self._step()
+            tickers = json.dumps(self.mini_tickers())
+            for connection, streams in list(self._subscriptions.items()):
+                try:
+                    if '!miniTicker@arr' in streams:
+                        await connection.send(tickers)
+                    for stream in streams:
+                        name, _, kind = stream.partition('@')
+                        if kind == 'trade' and name.upper() in self.prices:
+                            await connection.send(json.dumps(self.trade(name.upper())))
+                except websockets.ConnectionClosed:
+                    pass
+
+class FakeExchange:
+    """کلاینت ساختگی سازگار با ccxt.async_support برای بنچمارک و تست بار بدون اینترنت
+
+    بازارها، تیکرها و کندل‌ها تابعی قطعی از seed، نماد و زمان هستند (هیچ داده‌ای ذخیره
+    نمی‌شود)، پس هزاران نماد با حافظه ثابت و نتایج تکرارپذیر تولید می‌شوند. latency و
+    jitter تأخیر هر فراخوانی و error_rate / rate_limit_rate احتمال خطای شبکه و 429 را تعیین
+    می‌کنند (با RNG دارای seed، پس دنباله خطاها هم تکرارپذیر است).
+    """
+
+    def __init__(self, exchange_id: str = 'binance', config: Optional[Dict] = None, symbols: int = 2000,
+                 seed: int = 0, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, balance: float = 100000.0):
+        self.id = exchange_id
+        self.config = dict(config or {})
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.balance = balance
+        self.last_response_headers: Dict[str, str] = {}
+        self.calls: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._order_ids = itertools.count(1)
+        self._orders: Dict[str, Dict] = {}
+        self._markets_list = self._build_markets(symbols)
+        self.markets = {market['symbol']: market for market in self._markets_list}
+        self.markets_by_id = {market['id']: market for market in self._markets_list}
+        self.symbols = list(self.markets)
+
+    def _build_markets(self, count: int) -> List[Dict]:
+        bases = [symbol[:-4] for symbol in DEFAULT_SYMBOLS if symbol.endswith('USDT')]
+        bases += [f'C{i:05d}' for i in range(max(0, count - len(bases)))]
+        markets = []
+        for i, base in enumerate(bases[:count]):
+            quote = 'BTC' if i % 10 == 9 else 'USDT'
+            markets.append({
+                'id': f'{base}{quote}', 'symbol': f'{base}/{quote}', 'base': base, 'quote': quote,
+                'active': i % 50 != 49, 'type': 'spot', 'spot': True,
+                'precision': {'amount': 6, 'price': 8},
+                'limits': {'amount': {'min': 1e-6, 'max': None}, 'cost': {'min': 5.0, 'max': None}},
+                'info': {}
+            })
+        return markets
+
+    def _seed_of(self, symbol: str) -> int:
+        return zlib.crc32(f'{self.seed}:{symbol}'.encode())
+
+    def _market(self, symbol: str) -> Dict:
+        market = self.markets.get(symbol) or self.markets_by_id.get(symbol)
+        if market is None:
+            raise ccxt.BadSymbol(f'{self.id} does not have market symbol {symbol}')
+        return market
+
+    def _base_price(self, symbol: str) -> float:
+        # توزیع لگاریتمی بین 0.0001 و 50000 تا هم ارز ارزان و هم گران داشته باشیم
+        return 10 ** ((self._seed_of(symbol) % 10000) / 10000 * 8.7 - 4)
+
+    def _price(self, symbol: str, timestamp_ms: float) -> float:
+        phase = self._seed_of(symbol) % 628 / 100
+        t = timestamp_ms / 3600000
+        return self._base_price(symbol) * math.exp(0.05 * math.sin(t / 24 + phase) + 0.01 * math.sin(t * 1.7 + phase))
+
+    async def _call(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(max(0.0, self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))))
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            raise ccxt.RateLimitExceeded(f'{self.id} {method} 429 Too Many Requests (injected)')
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise ccxt.NetworkError(f'{self.id} {method} connection reset (injected)')
+
+    # ---------- API سازگار با ccxt ----------
+
+    async def load_markets(self, reload: bool = False, params: Optional[Dict] = None) -> Dict[str, Dict]:
+        await self._call('load_markets')
+        return self.markets
+
+    async def fetch_markets(self, params: Optional[Dict] = None) -> List[Dict]:
+        await self._call('fetch_markets')
+        return [dict(market) for market in self._markets_list]
+
+    def ticker(self, symbol: str, now_ms: Optional[int] = None) -> Dict:
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        last = self._price(symbol, now_ms)
+        open_ = self._price(symbol, now_ms - 86400000)
+        seed = self._seed_of(symbol)
+        # حدود 2% نمادها رشد انفجاری دارند تا غربال‌ها خروجی داشته باشند
+        if seed % 50 == 7:
+            open_ = last / (1.2 + seed % 300 / 100)
+        spread = last * 0.0005
+        base_volume = (seed % 100000 + 1) * 10 / max(last, 1e-4) ** 0.5
+        return {
+            'symbol': symbol, 'timestamp': now_ms, 'datetime': ccxt.Exchange.iso8601(now_ms),
+            'high': max(last, open_) * 1.01, 'low': min(last, open_) * 0.99,
+            'bid': last - spread, 'ask': last + spread, 'open': open_, 'close': last, 'last': last,
+            'change': last - open_, 'percentage': (last - open_) / open_ * 100,
+            'baseVolume': base_volume, 'quoteVolume': base_volume * last, 'info': {}
+        }
+
+    async def fetch_ticker(self, symbol: str, params: Optional[Dict] = None) -> Dict:
+        await self._call('fetch_ticker')
+        return self.ticker(self._market(symbol)['symbol'])
+
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None, params: Optional[Dict] = None) -> Dict[str, Dict]:
+        await self._call('fetch_tickers')
+        now_ms = int(time.time() * 1000)
+        symbols = self.symbols if symbols is None else [self._market(symbol)['symbol'] for symbol in symbols]
+        return {symbol: self.ticker(symbol, now_ms) for symbol in symbols}
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                          limit: Optional[int] = None, params: Optional[Dict] = None) -> List[List[float]]:
+        await self._call('fetch_ohlcv')
+        symbol = self._market(symbol)['symbol']
+        step = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        limit = min(limit or 500, 1000)
+        current = int(time.time() * 1000) // step * step
+        start = current - (limit - 1) * step if since is None else -(-since // step) * step
+        candles = []
+        for timestamp in range(start, min(current, start + (limit - 1) * step) + 1, step):
+            open_ = self._price(symbol, timestamp)
+            close = self._price(symbol, timestamp + step)
+            wick = abs(close - open_) * 0.5 + open_ * 0.001
+            volume = (self._seed_of(symbol) + timestamp // step) % 1000 + 10
+            candles.append([timestamp, open_, max(open_, close) + wick, min(open_, close) - wick, close, float(volume)])
+        return candles
+
+    async def fetch_balance(self, params: Optional[Dict] = None) -> Dict:
+        await self._call('fetch_balance')
+        return {'free': {'USDT': self.balance}, 'used': {'USDT': 0.0}, 'total': {'USDT': self.balance}, 'info': {}}
+
+    async def _create_order(self, side: str, symbol: str, amount: float, params: Optional[Dict]) -> Dict:
+        await self._call(f'create_market_{side}_order')
+        symbol = self._market(symbol)['symbol']
+        client_id = (params or {}).get('newClientOrderId') or f'fake-{next(self._order_ids)}'
+        if client_id in self._orders:
+            raise ccxt.InvalidOrder(f'{self.id} duplicate clientOrderId {client_id}')
+        price = self.ticker(symbol)['last']
+        cost = amount * price
+        self.balance += cost if side == 'sell' else -cost
+        order = {
+            'id': str(next(self._order_ids)), 'clientOrderId': client_id, 'symbol': symbol, 'type': 'market',
+            'side': side, 'amount': amount, 'filled': amount, 'remaining': 0.0, 'price': price, 'average': price,
+            'cost': cost, 'status': 'closed', 'timestamp': int(time.time() * 1000), 'fee': None, 'info': {}
+        }
+        self._orders[client_id] = order
+        return order
+
+    async def create_market_buy_order(self, symbol: str, amount: float, params: Optional[Dict] = None) -> Dict:
+        return await self._create_order('buy', symbol, amount, params)
+
+    async def create_market_sell_order(self, symbol: str, amount: float, params: Optional[Dict] = None) -> Dict:
+        return await self._create_order('sell', symbol, amount, params)
+
+    async def fetch_order(self, id: Optional[str], symbol: Optional[str] = None, params: Optional[Dict] = None) -> Dict:
+        await self._call('fetch_order')
+        client_id = (params or {}).get('origClientOrderId')
+        for order in ([self._orders.get(client_id)] if client_id else self._orders.values()):
+            if order is not None and (client_id or order['id'] == id):
+                return order
+        raise ccxt.OrderNotFound(f'{self.id} order {id or client_id} not found')
+
+    async def close(self):
+        pass
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local fake exchange WebSocket server (Binance stream protocol)")
+    parser.add_argument('--port', type=int, default=9443)
+    parser.add_argument('--interval', type=float, default=1.0)
+    args = parser.parse_args()
+
+    async def serve():
+        server = FakeExchangeServer(interval=args.interval, port=args.port)
+        print(f"Fake exchange stream on {await server.start()}")
+        await asyncio.Future()
+
+    asyncio.run(serve())
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from modules.lazy import lazy_import
+
+# pandas و ccxt فقط در مسیر برداری و تبدیل timeframe لازم‌اند؛ با اولین استفاده بارگذاری می‌شوند
+pd = lazy_import('pandas')
+ccxt = lazy_import('ccxt')
+
+NAN = float('nan')
+
+# ---------- مسیر برداری (backfill و محاسبه یک‌جا) ----------
+
+def sma(prices, period: int) -> pd.Series:
+    """میانگین متحرک ساده"""
+    return pd.Series(prices, dtype=np.float64).rolling(window=period).mean()
+
+def ema(prices, span: int) -> pd.Series:
+    """میانگین متحرک نمایی (همان ewm(span) پانداس)"""
+    return pd.Series(prices, dtype=np.float64).ewm(span=span).mean()
+
+def rsi(prices, period: int = 14) -> pd.Series:
+    """محاسبه RSI"""
+    prices = pd.Series(prices, dtype=np.float64)
+    delta = prices.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+def macd(prices, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series]:
+    """محاسبه MACD"""
+    line = ema(prices, fast) - ema(prices, slow)
+    return line, line.ewm(span=signal).mean()
+
+# ---------- مسیر جریانی O(1) برای هر کندل ----------
+# step(x, commit=False) مقدار را برای کندل باز محاسبه می‌کند بدون اینکه state تغییر کند
+
+class StreamingSMA:
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+
+    def step(self, x: float, commit: bool = True) -> float:
+        total = self.total + x
+        count = len(self.window) + 1
+        if count > self.period:
+            total -= self.window[0]
+            count -= 1
+        if commit:
+            self.window.append(x)
+            if len(self.window) > self.period:
+                self.window.popleft()
+            self.total = total
+        return total / self.period if count == self.period else NAN
+
+    def seed(self, values: np.ndarray):
+        self.window = deque(float(v) for v in values[-self.period:])
+        self.total = float(sum(self.window))
+
+class StreamingEMA:
+    """EMA تعدیل‌شده (adjust=True) مثل pandas: نسبت دو مجموع وزنی"""
+
+    def __init__(self, span: int):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def step(self, x: float, commit: bool = True) -> float:
+        numerator = x + self.decay * self.numerator
+        denominator = 1 + self.decay * self.denominator
+        if commit:
+            self.numerator, self.denominator = numerator, denominator
+        return numerator / denominator
+
+    def seed(self, last_value: float, count: int):
+        self.denominator = (1 - self.decay ** count) / (1 - self.decay)
+        self.numerator = last_value * self.denominator
+
+class StreamingRSI:
+    def __init__(self, period: int = 14):
+        self.previous: Optional[float] = None
+        self.gain = StreamingSMA(period)
+        self.loss = StreamingSMA(period)
+
+    def step(self, x: float, commit: bool = True) -> float:
+        # اولین کندل تغییری ندارد (مثل where(delta > 0, 0) روی NaN در نسخه برداری)
+        delta = 0.0 if self.previous is None else x - self.previous
+        gain = self.gain.step(max(delta, 0.0), commit)
+        loss = self.loss.step(max(-delta, 0.0), commit)
+        if commit:
+            self.previous = x
+        if math.isnan(gain) or (loss == 0 and gain == 0):
+            return NAN
+        if loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def seed(self, closes: np.ndarray):
+        delta = np.diff(closes, prepend=closes[0])
+        self.gain.seed(np.maximum(delta, 0.0))
+        self.loss.seed(np.maximum(-delta, 0.0))
+        self.previous = float(closes[-1])
+
+class StreamingMACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    def step(self, x: float, commit: bool = True) -> Tuple[float, float]:
+        line = self.fast.step(x, commit) - self.slow.step(x, commit)
+        return line, self.signal.step(line, commit)
+
+# ---------- موتور مشترک ----------
+
+INDICATOR_NAMES = ['sma_20', 'sma_50', 'rsi_14', 'macd', 'macd_signal']
+
+class _Buffer:
+    """آرایه قابل رشد با افزودن O(1) سرشکن؛ برش‌ها بدون کپی هستند"""
+
+    def __init__(self, capacity: int = 256):
+        self.data = np.empty(capacity)
+        self.size = 0
+
+    def append(self, value: float):
+        if self.size == len(self.data):
+            self.data = np.resize(self.data, len(self.data) * 2)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values: np.ndarray):
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            self.data = np.resize(self.data, max(needed, len(self.data) * 2))
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+class IndicatorState:
+    """state اندیکاتورهای یک (صرافی، ارز، تایم‌فریم) و خروجی‌های محاسبه‌شده برای کندل‌های بسته"""
+
+    def __init__(self):
+        self.sma_20 = StreamingSMA(20)
+        self.sma_50 = StreamingSMA(50)
+        self.rsi_14 = StreamingRSI(14)
+        self.macd = StreamingMACD(12, 26, 9)
+        self.timestamps = _Buffer()
+        self.values = {name: _Buffer() for name in INDICATOR_NAMES}
+
+    @property
+    def count(self) -> int:
+        return self.timestamps.size
+
+    @property
+    def first_timestamp(self) -> Optional[float]:
+        return self.timestamps.data[0] if self.count else None
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return self.timestamps.data[self.count - 1] if self.count else None
+
+    def step(self, close: float, commit: bool = True) -> Dict[str, float]:
+        line, signal = self.macd.step(close, commit)
+        return {
+            'sma_20': self.sma_20.step(close, commit),
+            'sma_50': self.sma_50.step(close, commit),
+            'rsi_14': self.rsi_14.step(close, commit),
+            'macd': line,
+            'macd_signal': signal
+        }
+
+    def push(self, timestamp: float, close: float):
+        """افزودن یک کندل بسته (O(1))"""
+        for name, value in self.step(close).items():
+            self.values[name].append(value)
+        self.timestamps.append(timestamp)
+
+    def backfill(self, timestamps: np.ndarray, closes: np.ndarray):
+        """محاسبه برداری کل تاریخچه و مقداردهی state جریانی از انتهای آن"""
+        fast, slow = ema(closes, 12), ema(closes, 26)
+        line = fast - slow
+        signal = line.ewm(span=9).mean()
+        computed = {
+            'sma_20': sma(closes, 20),
+            'sma_50': sma(closes, 50),
+            'rsi_14': rsi(closes, 14),
+            'macd': line,
+            'macd_signal': signal
+        }
+        for name, series in computed.items():
+            self.values[name].extend(series.to_numpy())
+        self.timestamps.extend(timestamps)
+
+        count = len(closes)
+        self.sma_20.seed(closes)
+        self.sma_50.seed(closes)
+        self.rsi_14.seed(closes)
+        self.macd.fast.seed(float(fast.iloc[-1]), count)
+        self.macd.slow.seed(float(slow.iloc[-1]), count)
+        self.macd.signal.seed(float(signal.iloc[-1]), count)
+
+class IndicatorEngine:
+    """موتور اندیکاتور مشترک نمودارها و تریدر؛ هر مقدار فقط یک بار برای هر کندل بسته محاسبه می‌شود"""
+
+    def __init__(self, bulk_threshold: int = 64):
+        # اگر تعداد کندل‌های جدید بیشتر از این باشد، مسیر برداری سریع‌تر است
+        self.bulk_threshold = bulk_threshold
+        self._states: Dict[Tuple, IndicatorState] = {}
+        self.streamed = 0
+        self.backfilled = 0
+
+    def update(self, key: Tuple[str, str, str], candles: np.ndarray, now: Optional[float] = None) -> Tuple[IndicatorState, int]:
+        """به‌روزرسانی state با کندل‌های بسته جدید؛ candles کل تاریخچه ذخیره‌شده است"""
+        timeframe_ms = ccxt.Exchange.parse_timeframe(key[-1]) * 1000
+        now = now if now is not None else time.time() * 1000
+        closed = len(candles)
+        # کندل آخر تا پایان بازه زمانی‌اش هنوز باز است
+        if closed and candles[-1, 0] + timeframe_ms > now:
+            closed -= 1
+
+        state = self._states.get(key)
+        if state is not None and (state.count == 0 or (closed and candles[0, 0] < state.first_timestamp)):
+            # state خالی (مثلاً فراخوان قبلی فقط کندل باز داشت) یا تاریخچه به عقب گسترش یافته؛ محاسبه دوباره
+            state = None
+
+        if state is None:
+            state = IndicatorState()
+            self._states[key] = state
+            start = 0
+        else:
+            start = int(np.searchsorted(candles[:closed, 0], state.last_timestamp, side='right'))
+
+        new = closed - start
+        if new > 0:
+            if state.count == 0 or new > self.bulk_threshold:
+                if state.count:
+                    state = IndicatorState()
+                    self._states[key] = state
+                    start = 0
+                state.backfill(np.array(candles[:closed, 0]), np.array(candles[:closed, 4]))
+                self.backfilled += closed - start
+            else:
+                for timestamp, close in candles[start:closed, [0, 4]]:
+                    state.push(timestamp, close)
+                self.streamed += new
+        return state, closed
+
+    def series(self, key: Tuple[str, str, str], candles: np.ndarray, limit: Optional[int] = None,
+               now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """سری اندیکاتورها هم‌تراز با candles (کندل باز با مقدار پیش‌نمایش)"""
+        state, closed = self.update(key, candles, now)
+        total = len(candles)
+        limit = min(limit or total, total)
+        start = total - limit
+        out = {}
+        preview = state.step(float(candles[-1, 4]), commit=False) if closed < total else None
+        for name in INDICATOR_NAMES:
+            values = state.values[name].view()[state.count - closed + start:state.count]
+            if preview is not None:
+                values = np.append(values, preview[name])
+            out[name] = values
+        return out
+
+    def latest(self, key: Tuple[str, str, str], candles: np.ndarray, now: Optional[float] = None) -> Dict[str, float]:
+        """آخرین مقدار اندیکاتورها (شامل کندل در حال شکل‌گیری)"""
+        state, closed = self.update(key, candles, now)
+        if closed < len(candles):
+            return state.step(float(candles[-1, 4]), commit=False)
+        return {name: float(state.values[name].view()[-1]) for name in INDICATOR_NAMES}
+
+    def stats(self) -> Dict:
+        return {
+            'tracked_series': len(self._states),
+            'streamed_candles': self.streamed,
+            'backfilled_candles': self.backfilled
+        }
+
+# نمونه مشترک بین نمودارها و تریدر
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,57 @@
+import importlib
+import sys
+import time
+import types
+from typing import Dict, Iterable
+
+# زمان واقعی بارگذاری هر کتابخانه تنبل (ثانیه)، برای گزارش راه‌اندازی
+load_times: Dict[str, float] = {}
+
+class LazyModule(types.ModuleType):
+    """جانشین ماژول که import واقعی را تا اولین دسترسی به یک attribute عقب می‌اندازد
+
+    بعد از بارگذاری، attributeهای ماژول واقعی روی همین شیء کپی می‌شوند تا دسترسی‌های بعدی
+    هزینه اضافه نداشته باشند.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            name = self.__name__
+            already_loaded = name in sys.modules
+            started = time.perf_counter()
+            module = importlib.import_module(name)
+            if not already_loaded:
+                load_times[name] = time.perf_counter() - started
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name: str) -> types.ModuleType:
+    """ماژول بارگذاری‌شده، یا جانشین تنبل اگر هنوز import نشده باشد"""
+    return sys.modules.get(name) or LazyModule(name)
+
+def preload(names: Iterable[str]) -> Dict[str, float]:
+    """import پیش‌دستانه (مثلاً در thread پس‌زمینه بعد از راه‌اندازی)؛ زمان هر کتابخانه را برمی‌گرداند"""
+    timings = {}
+    for name in names:
+        if name in sys.modules:
+            continue
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Preload failed for {name}: {e}")
+            continue
+        timings[name] = load_times[name] = time.perf_counter() - started
+    return timings
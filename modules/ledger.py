@@ -0,0 +1,224 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    position_id INTEGER,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    amount REAL NOT NULL,
+    price REAL,
+    order_id TEXT,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    position_id INTEGER,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    amount REAL NOT NULL,
+    entry_price REAL NOT NULL,
+    exit_price REAL NOT NULL,
+    pnl REAL NOT NULL,
+    reason TEXT,
+    order_id TEXT,
+    opened_at INTEGER,
+    closed_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_closed_at ON trades (closed_at, id);
+CREATE INDEX IF NOT EXISTS trades_symbol_closed_at ON trades (symbol, closed_at, id);
+CREATE TABLE IF NOT EXISTS metrics (
+    scope TEXT PRIMARY KEY,
+    trades INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    gross_profit REAL NOT NULL,
+    gross_loss REAL NOT NULL,
+    realized_pnl REAL NOT NULL,
+    peak REAL NOT NULL,
+    max_drawdown REAL NOT NULL
+);
+"""
+
+# scope مجموع کل معاملات در جدول metrics (بقیه ردیف‌ها به ازای هر نماد هستند)
+ALL = '*'
+
+class Metrics:
+    """معیارهای عملکرد که با هر معامله در O(1) به‌روز می‌شوند"""
+
+    __slots__ = ('trades', 'wins', 'losses', 'gross_profit', 'gross_loss', 'realized_pnl', 'peak', 'max_drawdown')
+
+    def __init__(self, trades=0, wins=0, losses=0, gross_profit=0.0, gross_loss=0.0, realized_pnl=0.0,
+                 peak=0.0, max_drawdown=0.0):
+        self.trades = trades
+        self.wins = wins
+        self.losses = losses
+        self.gross_profit = gross_profit
+        self.gross_loss = gross_loss
+        self.realized_pnl = realized_pnl
+        self.peak = peak  # بیشینه PnL تجمعی تا اینجا
+        self.max_drawdown = max_drawdown  # بیشترین افت از قله (به واحد ارز مظنه)
+
+    def add(self, pnl: float):
+        self.trades += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss -= pnl
+        self.realized_pnl += pnl
+        self.peak = max(self.peak, self.realized_pnl)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.realized_pnl)
+
+    def copy(self) -> 'Metrics':
+        return Metrics(*(getattr(self, name) for name in self.__slots__))
+
+    def row(self, scope: str) -> tuple:
+        return (scope,) + tuple(getattr(self, name) for name in self.__slots__)
+
+    def to_dict(self) -> Dict:
+        return {
+            'trades': self.trades,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': self.wins / self.trades if self.trades else 0.0,
+            'realized_pnl': self.realized_pnl,
+            'gross_profit': self.gross_profit,
+            'gross_loss': self.gross_loss,
+            'profit_factor': self.gross_profit / self.gross_loss if self.gross_loss else None,
+            'max_drawdown': self.max_drawdown
+        }
+
+def _epoch_ms(value: Optional[str]) -> int:
+    try:
+        return int(datetime.fromisoformat(value).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return int(time.time() * 1000)
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    """(closed_at, id) از next_cursor؛ برای cursor نامعتبر ValueError"""
+    parts = cursor.split(':')
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return int(parts[0]), int(parts[1])
+
+class TradeLedger:
+    """دفتر دائمی سفارش‌ها و معاملات بسته‌شده (SQLite)
+
+    معیارهای کل و هر نماد در همان تراکنش ثبت معامله به‌روز و ذخیره می‌شوند، پس گزارش
+    عملکرد هیچ‌وقت کل جدول را پیمایش نمی‌کند. پرس‌وجوی معاملات روی ایندکس (closed_at, id)
+    با صفحه‌بندی keyset انجام می‌شود.
+    """
+
+    def __init__(self, path: str = 'data/trades.db'):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self._metrics: Dict[str, Metrics] = {}
+        self.reload_metrics()
+
+    def reload_metrics(self):
+        """بازخوانی معیارها از جدول metrics (نوشته‌شده توسط این یا worker دیگری)"""
+        metrics = {}
+        for row in self.db.execute('SELECT * FROM metrics'):
+            values = dict(row)
+            scope = values.pop('scope')
+            metrics[scope] = Metrics(**values)
+        self._metrics = metrics
+
+    def record_fill(self, symbol: str, side: str, kind: str, amount: float, price: Optional[float],
+                    order_id: Optional[str] = None, position_id: Optional[int] = None):
+        """ثبت یک سفارش اجراشده (kind: open یا close)"""
+        with self.db:
+            self.db.execute(
+                'INSERT INTO fills (position_id, symbol, side, kind, amount, price, order_id, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (position_id, symbol, side, kind, amount, price, order_id, int(time.time() * 1000)))
+
+    def record_close(self, position, exit_price: float, reason: str, order_id: Optional[str] = None) -> Dict:
+        """ثبت بسته شدن پوزیشن: fill بستن، ردیف معامله و به‌روزرسانی معیارها در یک تراکنش"""
+        direction = 1 if position.side == "BUY" else -1
+        pnl = (exit_price - position.entry_price) * position.amount * direction
+        closed_at = int(time.time() * 1000)
+        trade = {
+            'position_id': position.id,
+            'symbol': position.symbol,
+            'side': position.side,
+            'amount': position.amount,
+            'entry_price': position.entry_price,
+            'exit_price': exit_price,
+            'pnl': pnl,
+            'reason': reason,
+            'order_id': order_id,
+            'opened_at': _epoch_ms(position.timestamp),
+            'closed_at': closed_at
+        }
+        scopes = (ALL, position.symbol)
+        # معیارهای حافظه فقط بعد از commit موفق جایگزین می‌شوند تا درج ناموفق شمرده نشود
+        updated = {}
+        for scope in scopes:
+            metrics = self._metrics.get(scope)
+            updated[scope] = metrics.copy() if metrics is not None else Metrics()
+            updated[scope].add(pnl)
+        with self.db:
+            self.db.execute(
+                'INSERT INTO fills (position_id, symbol, side, kind, amount, price, order_id, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (position.id, position.symbol, "SELL" if direction == 1 else "BUY", 'close', position.amount,
+                 exit_price, order_id, closed_at))
+            cursor = self.db.execute(
+                'INSERT INTO trades (position_id, symbol, side, amount, entry_price, exit_price, pnl, reason, '
+                'order_id, opened_at, closed_at) VALUES (:position_id, :symbol, :side, :amount, :entry_price, '
+                ':exit_price, :pnl, :reason, :order_id, :opened_at, :closed_at)', trade)
+            self.db.executemany('INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                [updated[scope].row(scope) for scope in scopes])
+        self._metrics.update(updated)
+        trade['id'] = cursor.lastrowid
+        return trade
+
+    def metrics(self, symbol: Optional[str] = None) -> Dict:
+        return (self._metrics.get(symbol or ALL) or Metrics()).to_dict()
+
+    def per_symbol(self) -> Dict[str, Dict]:
+        return {scope: metrics.to_dict() for scope, metrics in self._metrics.items() if scope != ALL}
+
+    def query(self, start: Optional[int] = None, end: Optional[int] = None, symbol: Optional[str] = None,
+              limit: int = 100, cursor: Optional[str] = None) -> Dict:
+        """معاملات بسته‌شده در بازه [start, end) (میلی‌ثانیه)، جدیدترین اول
+
+        cursor مقدار next_cursor صفحه قبل است ("closed_at:id").
+        """
+        clauses, params = [], []
+        if symbol:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if start is not None:
+            clauses.append('closed_at >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('closed_at < ?')
+            params.append(end)
+        if cursor:
+            closed_at, trade_id = parse_cursor(cursor)
+            clauses.append('(closed_at < ? OR (closed_at = ? AND id < ?))')
+            params.extend([closed_at, closed_at, trade_id])
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        rows = self.db.execute(f'SELECT * FROM trades{where} ORDER BY closed_at DESC, id DESC LIMIT ?',
+                               params + [limit]).fetchall()
+        trades = [dict(row) for row in rows]
+        next_cursor = f"{trades[-1]['closed_at']}:{trades[-1]['id']}" if len(trades) == limit else None
+        return {'trades': trades, 'next_cursor': next_cursor}
+
+    def close(self):
+        self.db.close()
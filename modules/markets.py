@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# نسخه قالب فایل اسنپ‌شات؛ با تغییر فیلدهای ذخیره‌شده افزایش می‌یابد تا فایل قدیمی نادیده گرفته شود
+SNAPSHOT_FORMAT = 1
+# فقط متادیتای لازم از خروجی سنگین fetch_markets نگه داشته می‌شود (info خام صرافی حذف می‌شود)
+MARKET_FIELDS = ('id', 'symbol', 'base', 'quote', 'active', 'type', 'spot', 'precision', 'limits')
+
+def compact_market(market: Dict) -> Dict:
+    return {field: market.get(field) for field in MARKET_FIELDS}
+
+def checksum(markets: List[Dict]) -> str:
+    return hashlib.sha1(json.dumps(markets, sort_keys=True).encode('utf-8')).hexdigest()
+
+class MarketIndex:
+    """ایندکس نمادها بر اساس quote، base و وضعیت فعال
+
+    لیست هر quote/base یک بار ساخته می‌شود؛ نتیجه هر ترکیب فیلتر هم کش می‌شود تا
+    فیلترهای تکراری مثل «جفت‌های فعال USDT» فقط یک lookup باشند.
+    """
+
+    def __init__(self, markets: List[Dict]):
+        self.markets: Dict[str, Dict] = {}
+        self.by_id: Dict[str, str] = {}
+        self.by_quote: Dict[str, List[str]] = {}
+        self.by_base: Dict[str, List[str]] = {}
+        self.active = set()
+        for market in markets:
+            symbol = market['symbol']
+            self.markets[symbol] = market
+            self.by_id[market['id']] = symbol
+            self.by_quote.setdefault(market['quote'], []).append(symbol)
+            self.by_base.setdefault(market['base'], []).append(symbol)
+            if market.get('active'):
+                self.active.add(symbol)
+        self._queries: Dict[Tuple, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        return self.markets.get(symbol)
+
+    def symbols(self, quote: Optional[str] = None, base: Optional[str] = None,
+                active: Optional[bool] = None) -> List[str]:
+        """نمادهای منطبق با فیلترها به ترتیب لیست صرافی (لیست مشترک است؛ تغییر ندهید)"""
+        key = (quote, base, active)
+        result = self._queries.get(key)
+        if result is None:
+            if quote is not None:
+                candidates = self.by_quote.get(quote, [])
+            elif base is not None:
+                candidates = self.by_base.get(base, [])
+            else:
+                candidates = list(self.markets)
+            if quote is not None and base is not None:
+                candidates = [s for s in candidates if self.markets[s]['base'] == base]
+            if active is not None:
+                candidates = [s for s in candidates if (s in self.active) == active]
+            result = self._queries[key] = candidates
+        return result
+
+class MarketStore:
+    """اسنپ‌شات نسخه‌دار متادیتای بازار روی دیسک با رفرش زمان‌بندی‌شده در پس‌زمینه
+
+    هنگام راه‌اندازی، اسنپ‌شات ذخیره‌شده بدون درخواست شبکه خوانده می‌شود. رفرش فقط وقتی
+    شماره revision را بالا می‌برد و فایل را (اتمیک) بازنویسی می‌کند که محتوا واقعاً تغییر کرده باشد.
+    """
+
+    def __init__(self, exchange, path: str = 'data/markets/binance.json', refresh_interval: float = 6 * 3600,
+                 retry_interval: float = 60.0):
+        self.exchange = exchange
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.index: Optional[MarketIndex] = None
+        self.revision = 0
+        self.checksum: Optional[str] = None
+        self.fetched_at: Optional[float] = None
+        self.loaded_from_disk = False
+        self.refreshes = 0
+        self.changes = 0
+        self.errors = 0
+        # در اجرای چند-worker فقط رهبر از صرافی رفرش می‌کند؛ بقیه فایل را بعد از تغییر دوباره می‌خوانند
+        self.is_leader: Callable[[], bool] = lambda: True
+        self._mtime: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        if self.fetched_at is None:
+            return None
+        return time.time() - self.fetched_at
+
+    def is_stale(self) -> bool:
+        age = self.age
+        return age is None or age >= self.refresh_interval
+
+    # ---------- دیسک ----------
+
+    def load_snapshot(self) -> bool:
+        """خواندن اسنپ‌شات ذخیره‌شده؛ فایل ناموجود، خراب یا با قالب قدیمی نادیده گرفته می‌شود"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError as e:
+            print(f"Ignoring corrupt market snapshot {self.path}: {e}")
+            return False
+        if data.get('format') != SNAPSHOT_FORMAT:
+            return False
+        self.index = MarketIndex(data['markets'])
+        self.revision = data.get('revision', 0)
+        self.checksum = data.get('checksum')
+        self.fetched_at = data.get('fetched_at')
+        self.loaded_from_disk = True
+        self._mtime = mtime
+        return True
+
+    def _snapshot_changed(self) -> bool:
+        try:
+            return os.path.getmtime(self.path) != self._mtime
+        except FileNotFoundError:
+            return False
+
+    def _save(self, markets: List[Dict]):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = {
+            'format': SNAPSHOT_FORMAT,
+            'exchange': self.exchange.exchange_id,
+            'revision': self.revision,
+            'checksum': self.checksum,
+            'fetched_at': self.fetched_at,
+            'markets': markets
+        }
+        # فایل موقت جدا برای هر پردازه تا نوشتن هم‌زمان دو worker فایل یکدیگر را خراب نکند
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    # ---------- رفرش ----------
+
+    async def refresh(self) -> MarketIndex:
+        """دریافت fetch_markets از صرافی؛ فراخوان‌های هم‌زمان منتظر همان یک درخواست می‌مانند"""
+        fetched_at = self.fetched_at
+        async with self._lock:
+            if self.fetched_at != fetched_at and self.index is not None:
+                # فراخوان دیگری همین الان رفرش کرد
+                return self.index
+            self.refreshes += 1
+            markets = [compact_market(m) for m in await self.exchange.fetch_markets()]
+            self.fetched_at = time.time()
+            digest = checksum(markets)
+            if digest != self.checksum:
+                self.index = MarketIndex(markets)
+                self.checksum = digest
+                self.revision += 1
+                self.changes += 1
+            await asyncio.to_thread(self._save, markets)
+            return self.index
+
+    async def get_index(self) -> MarketIndex:
+        """ایندکس فعلی؛ فقط اگر هیچ اسنپ‌شاتی (روی دیسک یا حافظه) نباشد منتظر صرافی می‌ماند"""
+        if self.index is None and not self.load_snapshot():
+            return await self.refresh()
+        return self.index
+
+    async def _run(self):
+        while True:
+            if self.is_leader():
+                age = self.age
+                await asyncio.sleep(0.0 if age is None else max(0.0, self.refresh_interval - age))
+            else:
+                # پیرو: اسنپ‌شات جدید رهبر از دیسک خوانده می‌شود؛ فقط اگر رهبر بیش از یک مهلت اضافه
+                # رفرش نکرده باشد خودش از صرافی می‌گیرد
+                await asyncio.sleep(self.retry_interval)
+                if self._snapshot_changed():
+                    self.load_snapshot()
+                age = self.age
+                if age is not None and age < self.refresh_interval + self.retry_interval:
+                    continue
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Error refreshing markets: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+    def start(self):
+        """خواندن اسنپ‌شات دیسک (فوری) و شروع رفرش زمان‌بندی‌شده"""
+        if self.index is None:
+            self.load_snapshot()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        age = self.age
+        return {
+            'markets': len(self.index) if self.index is not None else 0,
+            'active': len(self.index.active) if self.index is not None else 0,
+            'revision': self.revision,
+            'checksum': self.checksum,
+            'age': round(age, 1) if age is not None else None,
+            'stale': self.is_stale(),
+            'loaded_from_disk': self.loaded_from_disk,
+            'refresh_interval': self.refresh_interval,
+            'refreshes': self.refreshes,
+            'changes': self.changes,
+            'errors': self.errors,
+            'path': self.path
+        }
@@ -0,0 +1,213 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# مرزهای پیش‌فرض هیستوگرام تأخیر (ثانیه)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """شمارنده صعودی با برچسب (مقادیر برچسب به ترتیب labelnames)"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        return [f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}'
+                for labels, value in self._values.items()]
+
+class Gauge(Counter):
+    """مقدار لحظه‌ای با برچسب"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+class Histogram:
+    """هیستوگرام با مرزهای ثابت؛ observe فقط یک جستجوی دودویی و چند جمع است"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, List] = {}  # labels -> [شمارش هر سطل (غیرتجمعی)، مجموع، تعداد]
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+# collector هنگام خواندن /metrics صدا زده می‌شود و (نام، نوع، توضیح، [(برچسب‌ها، مقدار)]) برمی‌گرداند
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict, float]]]]]
+
+class MetricsRegistry:
+    """رجیستری متریک‌ها با خروجی متنی Prometheus
+
+    متریک‌های مسیر داغ (درخواست‌ها، فراخوانی صرافی) مستقیم به‌روز می‌شوند؛ آمارهایی که
+    ماژول‌ها خودشان نگه می‌دارند (کش‌ها، WebSocket) فقط هنگام خواندن با collectorها جمع می‌شوند.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, collector: Collector) -> Collector:
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_labels(list(labels), list(labels.values()))} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+# رجیستری مشترک کل پروسس
+metrics = MetricsRegistry()
+
+http_latency = metrics.histogram('http_request_duration_seconds', 'HTTP request latency by route',
+                                 ('method', 'route'))
+http_requests = metrics.counter('http_requests_total', 'HTTP requests by route and status',
+                                ('method', 'route', 'status'))
+loop_lag = metrics.gauge('event_loop_lag_seconds', 'Latest event loop scheduling delay')
+loop_lag_max = metrics.gauge('event_loop_lag_max_seconds', 'Largest event loop delay in the current minute')
+loop_lag_histogram = metrics.histogram('event_loop_delay_seconds', 'Event loop scheduling delay',
+                                       buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+class MetricsMiddleware:
+    """میان‌افزار ASGI برای تأخیر هر مسیر (الگوی مسیر، نه آدرس واقعی، تا برچسب‌ها محدود بمانند)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            http_latency.observe(time.perf_counter() - started, scope['method'], path)
+            http_requests.inc(scope['method'], path, status[0])
+
+class LoopLagMonitor:
+    """اندازه‌گیری تأخیر حلقه رویداد: هر interval ثانیه می‌خوابد و دیرکرد بیدار شدن را ثبت می‌کند"""
+
+    def __init__(self, interval: float = 0.5, max_window: float = 60.0):
+        self.interval = interval
+        self.max_window = max_window
+        self.max_lag = 0.0
+        self._window_started = time.perf_counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            loop_lag.set(lag)
+            loop_lag_histogram.observe(lag)
+            if time.perf_counter() - self._window_started > self.max_window:
+                self.max_lag = 0.0
+                self._window_started = time.perf_counter()
+            self.max_lag = max(self.max_lag, lag)
+            loop_lag_max.set(self.max_lag)
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,285 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+from modules import ratelimit
+from modules.lazy import lazy_import
+from modules.ratelimit import PRIORITY_ORDERS
+
+ccxt = lazy_import('ccxt')
+
+# اولویت صف سفارش‌ها: بستن پوزیشن جلوتر از باز کردن پوزیشن جدید
+PRIORITY_CLOSE = 0
+PRIORITY_OPEN = 1
+
+def new_client_order_id(prefix: str = 'pt') -> str:
+    """شناسه سفارش سمت کلاینت (الگوی مجاز بایننس: حداکثر 36 کاراکتر [.A-Za-z0-9:/_-])"""
+    return f'{prefix}-{uuid.uuid4().hex[:24]}'
+
+class BalanceCache:
+    """موجودی ارز مظنه که به صورت محلی با fillهای خودمان به‌روز می‌شود
+
+    به جای fetch_balance در هر معامله، فقط وقتی مقدار قدیمی‌تر از reconcile_interval باشد
+    (یا بعد از سفارشی با نتیجه نامعلوم) با صرافی تطبیق داده می‌شود. مبلغ سفارش‌های در صف
+    رزرو می‌شود تا سیگنال‌های هم‌زمان بیش از موجودی سفارش ندهند.
+    """
+
+    def __init__(self, exchange, currency: str = 'USDT', reconcile_interval: float = 60.0):
+        self.exchange = exchange
+        self.currency = currency
+        self.reconcile_interval = reconcile_interval
+        self.total: Optional[float] = None
+        self.reserved = 0.0
+        self.reconciled_at: Optional[float] = None
+        self.reconciles = 0
+        self.drift = 0.0  # اختلاف مقدار محلی با صرافی در آخرین تطبیق
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> float:
+        return (self.total or 0.0) - self.reserved
+
+    def is_stale(self) -> bool:
+        return self.reconciled_at is None or time.monotonic() - self.reconciled_at > self.reconcile_interval
+
+    def invalidate(self):
+        self.reconciled_at = None
+
+    async def get(self) -> float:
+        """موجودی قابل استفاده (تطبیق با صرافی فقط در صورت قدیمی بودن)"""
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    await self.reconcile()
+        return self.available
+
+    async def reconcile(self):
+        balance = await self.exchange.fetch_balance()
+        value = float(balance['total'].get(self.currency, 0) or 0)
+        if self.total is not None:
+            self.drift = value - self.total
+        self.total = value
+        self.reconciled_at = time.monotonic()
+        self.reconciles += 1
+
+    def reserve(self, amount: float) -> bool:
+        if amount > self.available:
+            return False
+        self.reserved += amount
+        return True
+
+    def release(self, amount: float):
+        self.reserved = max(0.0, self.reserved - amount)
+
+    def apply_fill(self, side: str, amount: float, price: float, fee: float = 0.0):
+        """اعمال اثر یک fill روی موجودی ارز مظنه"""
+        if self.total is None:
+            return
+        cost = amount * price
+        self.total += -cost if side == "BUY" else cost
+        self.total -= fee
+
+@dataclass
+class OrderRequest:
+    symbol: str
+    side: str  # BUY یا SELL
+    amount: float
+    price: float = 0.0  # قیمت تخمینی برای رزرو موجودی
+    priority: int = PRIORITY_OPEN
+    client_order_id: str = field(default_factory=new_client_order_id)
+    reserve: float = 0.0  # مبلغ رزروشده از BalanceCache
+    submitted_at: float = field(default_factory=time.monotonic)
+
+class OrderStatusUnknown(Exception):
+    """ارسال سفارش به خطای شبکه خورد و وضعیت آن در صرافی هم قابل تأیید نبود
+
+    سفارش ممکن است اجرا شده باشد؛ دوباره ارسال نمی‌شود و فراخوان باید وضعیت را بعداً تطبیق دهد.
+    """
+
+    def __init__(self, client_order_id: str, cause: Exception):
+        super().__init__(f"order {client_order_id} status unknown: {cause}")
+        self.client_order_id = client_order_id
+        self.cause = cause
+
+class OrderNotSent(Exception):
+    """محدودکننده نرخ محلی سفارش را پیش از ارسال به صرافی رد کرد (RequestShed)
+
+    سفارش از این پردازه خارج نشده، پس نتیجه‌اش معلوم است و ارسال دوباره بی‌خطر است.
+    """
+
+    def __init__(self, client_order_id: str, cause: Exception):
+        super().__init__(f"order {client_order_id} not sent: {cause}")
+        self.client_order_id = client_order_id
+        self.cause = cause
+
+class OrderPipeline:
+    """صف async سفارش‌ها با چند worker
+
+    هر سفارش شناسه سمت کلاینت (newClientOrderId) دارد. اگر ارسال با خطای شبکه/timeout
+    مواجه شود، قبل از تلاش دوباره با همان شناسه وضعیت سفارش از صرافی پرسیده می‌شود تا
+    سفارش دو بار اجرا نشود. فقط با OrderNotFound قطعی دوباره ارسال می‌شود؛ اگر وضعیت
+    نامعلوم بماند OrderStatusUnknown برمی‌گردد. سفارشی که محدودکننده نرخ محلی پیش از ارسال رد کند
+    (RequestShed) بدون پرس‌وجو با OrderNotSent رد می‌شود. ارسال دوباره همان شناسه به صف هم همان Future
+    قبلی را برمی‌گرداند.
+    """
+
+    def __init__(self, exchange, balance: Optional[BalanceCache] = None, workers: int = 8, max_queue: int = 1000,
+                 retries: int = 2, retry_delay: float = 0.5, lookup_retries: int = 3, samples: int = 1000):
+        self.exchange = exchange
+        self.balance = balance
+        self.worker_count = workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.lookup_retries = lookup_retries
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max_queue)
+        self._sequence = itertools.count()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._workers: List[asyncio.Task] = []
+        self.queue_wait: Deque[float] = deque(maxlen=samples)
+        self.latency: Deque[float] = deque(maxlen=samples)
+        self.submitted = 0
+        self.filled = 0
+        self.failed = 0
+        self.retried = 0
+        self.recovered = 0  # سفارش‌هایی که بعد از timeout در صرافی پیدا شدند
+        self.deduplicated = 0
+        self.unknown = 0  # سفارش‌هایی که وضعیتشان بعد از خطای شبکه تأیید نشد
+        self.shed = 0  # سفارش‌هایی که محدودکننده محلی پیش از ارسال رد کرد
+
+    def _ensure_workers(self):
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, request: OrderRequest) -> asyncio.Future:
+        """افزودن سفارش به صف؛ Future نتیجه سفارش ccxt را برمی‌گرداند"""
+        existing = self._pending.get(request.client_order_id)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing
+        self._ensure_workers()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request.client_order_id] = future
+        self.submitted += 1
+        await self.queue.put((request.priority, next(self._sequence), request))
+        return future
+
+    async def execute(self, request: OrderRequest) -> Dict:
+        """ارسال سفارش و انتظار برای نتیجه"""
+        return await (await self.submit(request))
+
+    async def _worker(self):
+        while True:
+            _, _, request = await self.queue.get()
+            future = self._pending.get(request.client_order_id)
+            started = time.monotonic()
+            self.queue_wait.append(started - request.submitted_at)
+            try:
+                order = await self._place(request)
+            except Exception as e:
+                self.failed += 1
+                if self.balance is not None:
+                    self.balance.release(request.reserve)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            else:
+                self.filled += 1
+                if self.balance is not None:
+                    self.balance.release(request.reserve)
+                    price = order.get('average') or order.get('price') or request.price
+                    filled = order.get('filled') or request.amount
+                    self.balance.apply_fill(request.side, filled, price)
+                if future is not None and not future.done():
+                    future.set_result(order)
+            finally:
+                self.latency.append(time.monotonic() - request.submitted_at)
+                self._pending.pop(request.client_order_id, None)
+                self.queue.task_done()
+
+    async def _place(self, request: OrderRequest) -> Dict:
+        params = {'newClientOrderId': request.client_order_id}
+        create = (self.exchange.create_market_buy_order if request.side == "BUY"
+                  else self.exchange.create_market_sell_order)
+        attempt = 0
+        while True:
+            try:
+                return await create(request.symbol, request.amount, params=params, priority=PRIORITY_ORDERS)
+            except ratelimit.RequestShed as e:
+                # RequestShed زیرکلاس NetworkError است ولی درخواستی ارسال نشده؛ نتیجه نامعلوم نیست
+                self.shed += 1
+                raise OrderNotSent(request.client_order_id, e) from e
+            except ccxt.NetworkError:
+                # نتیجه نامعلوم: شاید سفارش ثبت شده باشد و فقط پاسخ نرسیده باشد
+                if self.balance is not None:
+                    self.balance.invalidate()
+                order = await self._lookup(request)
+                if order is not None:
+                    self.recovered += 1
+                    return order
+                if attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(self.retry_delay * attempt)
+
+    async def _lookup(self, request: OrderRequest) -> Optional[Dict]:
+        """سفارش ثبت‌شده با شناسه کلاینت، یا None فقط اگر صرافی نبودن آن را تأیید کند
+
+        خطاهای دیگر (timeout، محدودیت نرخ، RequestShed) با تأخیر افزایشی دوباره پرسیده می‌شوند؛
+        سفارش بازارِ اجراشده دیگر باز نیست و صرافی شناسه تکراری آن را رد نمی‌کند، پس بدون
+        تأیید نباید دوباره ارسال شود.
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self.exchange.fetch_order(None, request.symbol, priority=PRIORITY_ORDERS,
+                                                       params={'origClientOrderId': request.client_order_id})
+            except ccxt.OrderNotFound:
+                return None
+            except ccxt.BaseError as e:
+                if attempt >= self.lookup_retries:
+                    self.unknown += 1
+                    raise OrderStatusUnknown(request.client_order_id, e) from e
+                attempt += 1
+                await asyncio.sleep(self.retry_delay * attempt)
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> Dict:
+        def percentiles(samples):
+            if not samples:
+                return {'p50': None, 'p99': None}
+            values = np.fromiter(samples, dtype=np.float64)
+            return {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99))}
+
+        return {
+            'queue_depth': self.queue.qsize(),
+            'in_flight': len(self._pending),
+            'workers': len(self._workers),
+            'submitted': self.submitted,
+            'filled': self.filled,
+            'failed': self.failed,
+            'retried': self.retried,
+            'recovered': self.recovered,
+            'unknown': self.unknown,
+            'shed': self.shed,
+            'deduplicated': self.deduplicated,
+            'queue_wait': percentiles(self.queue_wait),
+            'latency': percentiles(self.latency),
+            'balance': {
+                'total': self.balance.total,
+                'reserved': self.balance.reserved,
+                'reconciles': self.balance.reconciles,
+                'drift': self.balance.drift
+            } if self.balance is not None else None
+        }
@@ -0,0 +1,200 @@
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional
+
+from modules.triggers import TriggerIndex
+
+@dataclass(slots=True)
+class Position:
+    symbol: str
+    side: str
+    amount: float
+    entry_price: float
+    current_price: float
+    stop_loss: float
+    take_profit: float
+    pnl: float
+    timestamp: str
+    id: int = 0
+
+class PositionBook:
+    """دفتر پوزیشن‌های باز با ایندکس نماد/جهت، تریگرهای حد ضرر/سود و ژورنال append-only
+
+    هر باز و بسته شدن یک خط JSON به ژورنال اضافه می‌کند؛ در شروع برنامه با بازپخش ژورنال
+    پوزیشن‌های باز بازیابی می‌شوند. وقتی تعداد خطوط بسته‌شده زیاد شود ژورنال با اسنپ‌شات
+    پوزیشن‌های باز جایگزین (compact) می‌شود.
+    """
+
+    def __init__(self, journal_path: Optional[str] = 'data/positions.jsonl', compact_threshold: int = 10000,
+                 fsync: bool = False):
+        self.journal_path = journal_path
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self._positions: Dict[int, Position] = {}
+        self._by_symbol: Dict[str, Dict[int, Position]] = {}
+        self._by_side: Dict[str, Dict[int, Position]] = {"BUY": {}, "SELL": {}}
+        self.triggers = TriggerIndex()
+        self.next_id = 1
+        self.total_amount = 0.0
+        self.total_notional = 0.0  # مجموع amount * entry_price
+        self.opened = 0
+        self.closed = 0
+        self._journal = None
+        self._stale_lines = 0
+        if journal_path:
+            self._recover()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Position]:
+        return iter(list(self._positions.values()))
+
+    def __bool__(self) -> bool:
+        return bool(self._positions)
+
+    def get(self, position_id: int) -> Optional[Position]:
+        return self._positions.get(position_id)
+
+    def by_symbol(self, symbol: str) -> List[Position]:
+        return list(self._by_symbol.get(symbol, {}).values())
+
+    def by_side(self, side: str) -> List[Position]:
+        return list(self._by_side.get(side, {}).values())
+
+    def symbols(self) -> List[str]:
+        return list(self._by_symbol)
+
+    # ---------- تغییرات ----------
+
+    def open(self, position: Position) -> Position:
+        if not position.id:
+            position.id = self.next_id
+        self.next_id = max(self.next_id, position.id + 1)
+        self._index(position)
+        self.opened += 1
+        self._write({'op': 'open', 'position': asdict(position)})
+        return position
+
+    def close(self, position: Position, reason: str = "") -> bool:
+        if not self._unindex(position):
+            return False
+        self.closed += 1
+        self.write_close(position.id, reason)
+        return True
+
+    def write_close(self, position_id: int, reason: str = ""):
+        """ثبت بسته شدن در ژورنال؛ جدا از ایندکس تا بعد از خطای دیسک دوباره تلاش شود"""
+        self._write({'op': 'close', 'id': position_id, 'reason': reason})
+        self._stale_lines += 2
+        if self._stale_lines >= self.compact_threshold:
+            self.compact()
+
+    def _index(self, position: Position):
+        self._positions[position.id] = position
+        self._by_symbol.setdefault(position.symbol, {})[position.id] = position
+        self._by_side.setdefault(position.side, {})[position.id] = position
+        self.triggers.add(position)
+        self.total_amount += position.amount
+        self.total_notional += position.amount * position.entry_price
+
+    def _unindex(self, position: Position) -> bool:
+        if self._positions.pop(position.id, None) is None:
+            return False
+        symbol_positions = self._by_symbol[position.symbol]
+        del symbol_positions[position.id]
+        if not symbol_positions:
+            del self._by_symbol[position.symbol]
+        del self._by_side[position.side][position.id]
+        self.triggers.remove(position)
+        self.total_amount -= position.amount
+        self.total_notional -= position.amount * position.entry_price
+        return True
+
+    # ---------- ژورنال ----------
+
+    def _write(self, record: Dict):
+        if not self.journal_path:
+            return
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _recover(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # خط ناقص انتهای فایل (قطع برق/کرش هنگام نوشتن)
+                    continue
+                if record.get('op') == 'open':
+                    position = Position(**record['position'])
+                    self._index(position)
+                    self.next_id = max(self.next_id, position.id + 1)
+                elif record.get('op') == 'close':
+                    position = self._positions.get(record['id'])
+                    if position is not None:
+                        self._unindex(position)
+                        self._stale_lines += 2
+        # compact در بازیابی انجام نمی‌شود: چند worker ژورنال را هم‌زمان می‌خوانند و فقط رهبر ترید
+        # (بعد از reload) یا اولین close بعدی آن را بازنویسی می‌کند
+
+    def reload(self):
+        """بازخوانی پوزیشن‌ها از ژورنال (مثلاً وقتی این worker رهبر ترید می‌شود)
+
+        ایندکس‌ها در همین شیء پاک و دوباره ساخته می‌شوند تا ارجاع‌ها به triggers معتبر بمانند.
+        """
+        self.close_journal()
+        for position in list(self._positions.values()):
+            self._unindex(position)
+        self._stale_lines = 0
+        if self.journal_path:
+            self._recover()
+            if self._stale_lines >= self.compact_threshold:
+                self.compact()
+
+    def compact(self):
+        """بازنویسی اتمیک ژورنال فقط با پوزیشن‌های باز"""
+        if not self.journal_path:
+            return
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        temp_path = self.journal_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for position in self._positions.values():
+                f.write(json.dumps({'op': 'open', 'position': asdict(position)}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.journal_path)
+        self._stale_lines = 0
+
+    def close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    # ---------- آمار ----------
+
+    def stats(self) -> Dict:
+        """آمار جاری پوزیشن‌های باز (O(1))"""
+        return {
+            'open_positions': len(self._positions),
+            'long_positions': len(self._by_side.get("BUY", {})),
+            'short_positions': len(self._by_side.get("SELL", {})),
+            'symbols': len(self._by_symbol),
+            'total_amount': self.total_amount,
+            'total_notional': self.total_notional,
+            'unrealized_pnl': self.triggers.unrealized_pnl(),
+            'winning_positions': self.triggers.winning_positions(),
+            'opened': self.opened,
+            'closed': self.closed
+        }
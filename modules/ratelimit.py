@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from modules.lazy import lazy_import
+
+ccxt = lazy_import('ccxt')
+
+# اولویت درخواست‌ها (عدد کمتر = مهم‌تر)
+PRIORITY_ORDERS = 0
+PRIORITY_MONITORING = 1
+PRIORITY_CHARTS = 2
+PRIORITY_SCANS = 3
+PRIORITY_NAMES = {PRIORITY_ORDERS: 'orders', PRIORITY_MONITORING: 'monitoring',
+                  PRIORITY_CHARTS: 'charts', PRIORITY_SCANS: 'scans'}
+
+# سهمی از ظرفیت که هر اولویت نمی‌تواند مصرف کند (برای اولویت‌های بالاتر کنار گذاشته می‌شود)
+DEFAULT_RESERVES = {PRIORITY_ORDERS: 0.0, PRIORITY_MONITORING: 0.05, PRIORITY_CHARTS: 0.2, PRIORITY_SCANS: 0.4}
+# بیشترین انتظار قابل قبول برای توکن؛ اگر تخمین انتظار بیشتر باشد درخواست فوراً رد می‌شود
+DEFAULT_MAX_WAITS = {PRIORITY_ORDERS: 30.0, PRIORITY_MONITORING: 10.0, PRIORITY_CHARTS: 2.0, PRIORITY_SCANS: 1.0}
+
+# وزن درخواست‌ها طبق مستندات بایننس (REQUEST_WEIGHT، سقف 6000 در دقیقه برای هر IP)
+BINANCE_WEIGHTS = {
+    'fetch_markets': 20,
+    'fetch_ticker': 2,
+    'fetch_tickers': 80,
+    'fetch_ohlcv': 2,
+    'fetch_balance': 20,
+    'fetch_order': 4,
+    'create_market_buy_order': 1,
+    'create_market_sell_order': 1,
+}
+
+# (ظرفیت، بازه به ثانیه، جدول وزن‌ها) هر صرافی؛ بقیه صرافی‌ها از DEFAULT_BUDGET استفاده می‌کنند
+VENUE_BUDGETS = {
+    'binance': (6000, 60.0, BINANCE_WEIGHTS),
+}
+DEFAULT_BUDGET = (1200, 60.0, {})
+
+_request_shed = None
+
+def _request_shed_error():
+    # زیرکلاس خطای ccxt؛ فقط هنگام اولین نیاز ساخته می‌شود تا import ماژول ccxt را بارگذاری نکند
+    global _request_shed
+    if _request_shed is None:
+        class RequestShed(ccxt.RateLimitExceeded):
+            """درخواست کم‌اولویت قبل از رسیدن به سقف صرافی رد شد"""
+        RequestShed.__module__, RequestShed.__qualname__ = __name__, "RequestShed"
+        _request_shed = RequestShed
+    return _request_shed
+
+def __getattr__(name: str):
+    if name == 'RequestShed':
+        return _request_shed_error()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class WeightedTokenBucket:
+    """سطل توکن وزن‌دار مشترک برای همه کلاینت‌های یک صرافی
+
+    هر درخواست به اندازه وزنش توکن مصرف می‌کند. اولویت‌های پایین‌تر فقط تا جایی مصرف
+    می‌کنند که سهم رزرو اولویت‌های بالاتر باقی بماند، و تا وقتی درخواست مهم‌تری منتظر است
+    جلو نمی‌افتند. اگر انتظار تخمینی از سقف آن اولویت بیشتر باشد، درخواست با RequestShed
+    رد می‌شود تا ترافیک کم‌اهمیت پیش از رسیدن به محدودیت صرافی حذف شود.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0, reserves: Optional[Dict[int, float]] = None,
+                 max_waits: Optional[Dict[int, float]] = None):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.reserves = reserves or DEFAULT_RESERVES
+        self.max_waits = max_waits or DEFAULT_MAX_WAITS
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiting: Dict[int, int] = {priority: 0 for priority in self.reserves}
+        self.granted: Dict[int, int] = {priority: 0 for priority in self.reserves}
+        self.shed: Dict[int, int] = {priority: 0 for priority in self.reserves}
+        self.waited = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _floor(self, priority: int) -> float:
+        return self.reserves.get(priority, 0.0) * self.capacity
+
+    def _blocked_by_higher(self, priority: int) -> bool:
+        return any(count for p, count in self._waiting.items() if p < priority)
+
+    def _wait_estimate(self, weight: float, priority: int) -> float:
+        deficit = weight + self._floor(priority) - self.tokens
+        blocked = max(0.0, self.blocked_until - time.monotonic())
+        return max(blocked, deficit / self.rate if deficit > 0 else 0.0)
+
+    async def acquire(self, weight: float = 1, priority: int = PRIORITY_SCANS):
+        self._refill()
+        max_wait = self.max_waits.get(priority, 0.0)
+        if self._wait_estimate(weight, priority) > max_wait:
+            self.shed[priority] = self.shed.get(priority, 0) + 1
+            raise _request_shed_error()(f"request shed ({PRIORITY_NAMES.get(priority, priority)}, weight {weight})")
+
+        started = time.monotonic()
+        deadline = started + max_wait
+        self._waiting[priority] = self._waiting.get(priority, 0) + 1
+        try:
+            while True:
+                self._refill()
+                now = time.monotonic()
+                if (now >= self.blocked_until and not self._blocked_by_higher(priority)
+                        and self.tokens - weight >= self._floor(priority)):
+                    self.tokens -= weight
+                    self.granted[priority] = self.granted.get(priority, 0) + 1
+                    self.waited += now - started
+                    return
+                if now >= deadline:
+                    self.shed[priority] = self.shed.get(priority, 0) + 1
+                    raise _request_shed_error()(f"request shed after waiting ({PRIORITY_NAMES.get(priority, priority)})")
+                delay = max(0.005, min(self._wait_estimate(weight, priority), deadline - now, 0.25))
+                await asyncio.sleep(delay)
+        finally:
+            self._waiting[priority] -= 1
+
+    def observe_used(self, used: float):
+        """هم‌گام‌سازی با وزن مصرف‌شده‌ای که صرافی گزارش می‌دهد (مثل X-MBX-USED-WEIGHT-1M)"""
+        self._refill()
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def penalize(self, retry_after: float = 60.0):
+        """بعد از 429/418 تا retry_after ثانیه هیچ درخواستی ارسال نمی‌شود"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict:
+        self._refill()
+        return {
+            'capacity': self.capacity,
+            'tokens': self.tokens,
+            'blocked_for': max(0.0, self.blocked_until - time.monotonic()),
+            'waiting': {PRIORITY_NAMES.get(p, p): n for p, n in self._waiting.items()},
+            'granted': {PRIORITY_NAMES.get(p, p): n for p, n in self.granted.items()},
+            'shed': {PRIORITY_NAMES.get(p, p): n for p, n in self.shed.items()},
+            'total_wait': self.waited
+        }
@@ -0,0 +1,62 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+class RenderCache:
+    """کش LRU خروجی‌های رندرشده نمودار با سقف حجم (بایت)
+
+    کلید شامل timestamp آخرین کندل و شماره نسخه داده است، پس با بسته شدن کندل جدید
+    (یا تغییر کندل باز) کلید عوض می‌شود و ورودی قدیمی به مرور از انتهای LRU حذف می‌شود.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[bytes, str]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def etag(key: Hashable) -> str:
+        """ETag قوی از روی کلید؛ محتوا فقط با تغییر کلید تغییر می‌کند"""
+        return '"' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20] + '"'
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        """(body، media_type) یا None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, media_type: str):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous[0])
+        self._entries[key] = (body, media_type)
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / requests if requests else 0.0
+        }
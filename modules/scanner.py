@@ -1,67 +1,277 @@
-import ccxt
-import pandas as pd
 from datetime import datetime
-from typing import List, Dict
+from typing import Any, Awaitable, Callable, List, Dict, Optional, Tuple
 import asyncio
+import time
+from modules.exchange import AsyncExchange
+from modules.lazy import lazy_import
+from modules.markets import MarketStore
+from modules.ratelimit import PRIORITY_SCANS
+from modules.screener import EXPLOSIVE_SCREEN, Screen, Screener, TickerFrame
+from modules.stream import TickerTable, ticker_table as default_ticker_table
 
-class MarketScanner:
-    def __init__(self):
-        self.exchanges = {
-            'binance': ccxt.binance(),
-            'kucoin': ccxt.kucoin(),
+ccxt = lazy_import('ccxt')
+
+class SnapshotCache:
+    """کش اسنپ‌شات با TTL، رفرش تک‌پرواز و پاسخ stale-while-revalidate"""
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl: float = 30.0):
+        self.loader = loader
+        self.ttl = ttl
+        self._value = None
+        self._updated_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    @property
+    def age(self) -> Optional[float]:
+        """سن اسنپ‌شات فعلی به ثانیه"""
+        if self._updated_at is None:
+            return None
+        return time.monotonic() - self._updated_at
+
+    def is_fresh(self) -> bool:
+        age = self.age
+        return age is not None and age < self.ttl
+
+    async def get(self, allow_stale: bool = True) -> Any:
+        """دریافت اسنپ‌شات؛ در صورت کهنه بودن، رفرش در پس‌زمینه انجام می‌شود"""
+        if self.is_fresh():
+            self.hits += 1
+            return self._value
+
+        if self._value is not None and allow_stale:
+            # پاسخ فوری با داده قبلی و بروزرسانی در پس‌زمینه
+            self.stale_hits += 1
+            self.refresh()
+            return self._value
+
+        self.misses += 1
+        # shield: لغو یک درخواست، رفرش مشترک بقیه را لغو نمی‌کند
+        return await asyncio.shield(self.refresh())
+
+    def refresh(self) -> asyncio.Task:
+        """شروع رفرش؛ فراخوان‌های هم‌زمان روی یک درخواست مشترک منتظر می‌مانند"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._load())
+            self._inflight.add_done_callback(self._on_done)
+        return self._inflight
+
+    async def _load(self) -> Any:
+        self.refreshes += 1
+        value = await self.loader()
+        self._value = value
+        self._updated_at = time.monotonic()
+        return value
+
+    def _on_done(self, task: asyncio.Task):
+        # خطای رفرش پس‌زمینه باید خوانده شود تا هشدار asyncio ایجاد نشود
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def peek(self) -> Any:
+        """آخرین مقدار موجود بدون شروع رفرش"""
+        return self._value
+
+    def invalidate(self):
+        self._updated_at = None
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.stale_hits + self.misses
+        age = self.age
+        return {
+            "ttl": self.ttl,
+            "age": round(age, 3) if age is not None else None,
+            "fresh": self.is_fresh(),
+            "refreshing": self._inflight is not None and not self._inflight.done(),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_ratio": (self.hits + self.stale_hits) / requests if requests else 0.0
         }
+
+class MarketScanner:
+    def __init__(self, cache_ttl: float = 30.0, exchange_ids: Tuple[str, ...] = ('binance', 'kucoin'),
+                 venue_timeouts: Optional[Dict[str, float]] = None, default_venue_timeout: float = 8.0,
+                 ticker_table: Optional[TickerTable] = None):
+        self.exchanges = {exchange_id: AsyncExchange(exchange_id, priority=PRIORITY_SCANS) for exchange_id in exchange_ids}
+        # تیکرهای زنده WebSocket؛ فقط اگر جریان قطع باشد از REST خوانده می‌شود
+        self.tickers = ticker_table or default_ticker_table
+        # سقف زمانی جداگانه برای هر صرافی در اسکن چندصرافی
+        self.venue_timeouts = venue_timeouts or {}
+        self.default_venue_timeout = default_venue_timeout
+        # اسنپ‌شات مشترک برای همه endpointها
+        self.snapshot_cache = SnapshotCache(self._scan_market, ttl=cache_ttl)
+        self.screener = Screener()
+        self.cross_exchange_cache = SnapshotCache(self._scan_cross_exchange, ttl=cache_ttl)
+        # متادیتای بازار از اسنپ‌شات دیسک؛ رفرش در پس‌زمینه و نه در هر اسکن
+        self.market_store = MarketStore(self.exchanges['binance'])
+        # در اجرای چند-worker فقط رهبر از صرافی اسکن می‌کند و بقیه اسنپ‌شات منتشرشده را می‌خوانند
+        self.state = None
+        self.is_leader: Callable[[], bool] = lambda: True
         
-    async def get_top_200_coins(self) -> List[Dict]:
-        """دریافت 200 ارز برتر بازار"""
+    async def get_market_snapshot(self, allow_stale: bool = True) -> TickerFrame:
+        """اسنپ‌شات ستونی همه جفت‌ارزهای فعال USDT"""
         try:
-            # استفاده از Binance برای داده‌های واقعی
-            exchange = self.exchanges['binance']
-            markets = exchange.fetch_markets()
-            
-            # فیلتر ارزهای USDT
-            usdt_pairs = [m for m in markets if m['quote'] == 'USDT' and m['active']]
-            
-            # دریافت قیمت‌های لحظه‌ای
-            tickers = exchange.fetch_tickers([m['symbol'] for m in usdt_pairs[:200]])
-            
-            coins_data = []
-            for symbol, ticker in list(tickers.items())[:200]:
-                coin_data = {
-                    'symbol': symbol,
-                    'price': ticker['last'],
-                    'change_24h': ticker['percentage'],
-                    'volume': ticker['baseVolume'],
-                    'high_24h': ticker['high'],
-                    'low_24h': ticker['low'],
-                    'timestamp': datetime.now().isoformat()
-                }
-                coins_data.append(coin_data)
-            
-            # مرتب‌سازی بر اساس حجم معاملات
-            coins_data.sort(key=lambda x: x['volume'], reverse=True)
-            return coins_data[:200]
-            
+            return await self.snapshot_cache.get(allow_stale=allow_stale)
         except Exception as e:
             print(f"Error in market scan: {e}")
-            return []
+            return self.snapshot_cache.peek() or TickerFrame.from_records([])
 
-    def detect_explosive_coins(self, coins_data: List[Dict]) -> List[Dict]:
-        """شناسایی شت‌کوین‌های انفجاری"""
-        explosive_coins = []
+    async def get_top_200_coins(self, allow_stale: bool = True) -> List[Dict]:
+        """دریافت 200 ارز برتر بازار"""
+        snapshot = await self.get_market_snapshot(allow_stale=allow_stale)
+        return snapshot.to_records()[:200]
+
+    def use_shared_state(self, state, is_leader: Callable[[], bool]):
+        """اشتراک اسنپ‌شات‌ها بین workerها از طریق SharedState"""
+        self.state = state
+        self.is_leader = is_leader
+        self.market_store.is_leader = is_leader
+
+    async def _shared_snapshot(self, key: str, scan: Callable[[], Awaitable[Any]],
+                               encode: Callable[[Any], Any], decode: Callable[[Any], Any]) -> Any:
+        """اسنپ‌شات تازه رهبر از وضعیت مشترک؛ در غیر این صورت (یا در خود رهبر) اسکن و انتشار"""
+        if self.state is None:
+            return await scan()
+        if not self.is_leader():
+            shared = self.state.get_with_time(key)
+            if shared is not None and time.time() - shared[1] < self.snapshot_cache.ttl * 2:
+                return decode(shared[0])
+        value = await scan()
+        if self.is_leader():
+            self.state.set(key, encode(value))
+        return value
+
+    async def _scan_market(self) -> TickerFrame:
+        """اسنپ‌شات بازار (بدون کش محلی)"""
+        return await self._shared_snapshot('market.snapshot', self._scan_market_exchange,
+                                           TickerFrame.to_columns, TickerFrame.from_columns)
+
+    async def _scan_market_exchange(self) -> TickerFrame:
+        """اسکن کامل بازار از صرافی"""
+        # استفاده از Binance برای داده‌های واقعی
+        exchange = self.exchanges['binance']
+        markets = await self.market_store.get_index()
         
-        for coin in coins_data:
-            # معیارهای شناسایی شت‌کوین انفجاری
-            if (coin['change_24h'] > 20 and  # رشد بیش از 20%
-                coin['price'] < 1.0 and      # قیمت زیر 1 دلار
-                coin['volume'] > 100000):    # حجم معاملات بالا
-                
-                explosive_coins.append({
-                    **coin,
-                    'potential': self.calculate_potential(coin),
-                    'risk_level': self.assess_risk(coin)
-                })
+        # جفت‌ارزهای فعال USDT از ایندکس
+        symbols = markets.symbols(quote='USDT', active=True)
         
-        return sorted(explosive_coins, key=lambda x: x['change_24h'], reverse=True)
+        # دریافت قیمت‌های لحظه‌ای همه جفت‌ها (مرتب‌شده بر اساس حجم معاملات)
+        tickers = self.tickers.snapshot(symbols) if self.tickers.is_live() else {}
+        if not tickers:
+            tickers = await exchange.fetch_tickers(symbols)
+        return TickerFrame.from_tickers(tickers)
+
+    async def screen_market(self, screens: List[Screen]) -> Dict[str, List[Dict]]:
+        """اجرای چند غربال روی یک اسنپ‌شات بازار"""
+        snapshot = await self.get_market_snapshot()
+        return self.screener.run_many(snapshot, screens)
+
+    async def get_explosive_coins(self) -> List[Dict]:
+        """شت‌کوین‌های انفجاری در کل جفت‌ارزهای USDT"""
+        return (await self.screen_market([EXPLOSIVE_SCREEN]))[EXPLOSIVE_SCREEN.name]
+
+    async def get_cross_exchange_view(self, allow_stale: bool = True) -> Dict:
+        """نمای ادغام‌شده قیمت، حجم و اسپرد هر ارز در همه صرافی‌ها"""
+        try:
+            return await self.cross_exchange_cache.get(allow_stale=allow_stale)
+        except Exception as e:
+            print(f"Error in cross-exchange scan: {e}")
+            return self.cross_exchange_cache.peek() or {'venues': {}, 'coins': []}
+
+    async def _scan_cross_exchange(self) -> Dict:
+        return await self._shared_snapshot('market.cross_exchange', self._scan_cross_exchange_venues,
+                                           lambda view: view, lambda view: view)
+
+    async def _scan_cross_exchange_venues(self) -> Dict:
+        """اسکن هم‌زمان همه صرافی‌ها؛ صرافی‌های کند یا خراب کنار گذاشته می‌شوند"""
+        names = list(self.exchanges)
+        results = await asyncio.gather(*(self._scan_venue(name) for name in names))
+
+        venues = {}
+        merged: Dict[str, Dict] = {}
+        for name, (status, tickers) in zip(names, results):
+            venues[name] = status
+            for symbol, quote in tickers.items():
+                record = merged.setdefault(symbol, {'symbol': symbol, 'venues': {}})
+                record['venues'][name] = quote
+
+        coins = [self._summarize_venues(record) for record in merged.values()]
+        coins.sort(key=lambda x: x['total_volume'], reverse=True)
+        return {
+            'venues': venues,
+            'healthy_venues': [name for name, status in venues.items() if status['status'] == 'ok'],
+            'coins': coins,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    async def _scan_venue(self, name: str) -> Tuple[Dict, Dict[str, Dict]]:
+        """دریافت تیکرهای USDT یک صرافی با سقف زمانی مخصوص همان صرافی"""
+        timeout = self.venue_timeouts.get(name, self.default_venue_timeout)
+        started = time.monotonic()
+        try:
+            tickers = await self.exchanges[name].fetch_tickers(timeout=timeout)
+        except Exception as e:
+            status = 'timeout' if isinstance(e, ccxt.RequestTimeout) else 'error'
+            return {
+                'status': status,
+                'latency': round(time.monotonic() - started, 3),
+                'error': str(e)
+            }, {}
+
+        quotes = {}
+        for symbol, ticker in tickers.items():
+            if not symbol.endswith('/USDT') or ticker.get('last') is None:
+                continue
+            bid, ask = ticker.get('bid'), ticker.get('ask')
+            spread = None
+            if bid and ask:
+                spread = (ask - bid) / ((ask + bid) / 2) * 100
+            quotes[symbol] = {
+                'price': ticker['last'],
+                'volume': ticker.get('baseVolume') or 0,
+                'bid': bid,
+                'ask': ask,
+                'spread': spread
+            }
+        return {
+            'status': 'ok',
+            'latency': round(time.monotonic() - started, 3),
+            'symbols': len(quotes)
+        }, quotes
+
+    def _summarize_venues(self, record: Dict) -> Dict:
+        """خلاصه بین‌صرافی: بهترین bid/ask و اختلاف قیمت بین صرافی‌ها"""
+        venues = record['venues']
+        prices = [quote['price'] for quote in venues.values()]
+        bids = [(quote['bid'], name) for name, quote in venues.items() if quote['bid']]
+        asks = [(quote['ask'], name) for name, quote in venues.items() if quote['ask']]
+        best_bid = max(bids) if bids else (None, None)
+        best_ask = min(asks) if asks else (None, None)
+        return {
+            **record,
+            'venue_count': len(venues),
+            'total_volume': sum(quote['volume'] for quote in venues.values()),
+            'best_bid': best_bid[0],
+            'best_bid_venue': best_bid[1],
+            'best_ask': best_ask[0],
+            'best_ask_venue': best_ask[1],
+            'price_divergence': (max(prices) - min(prices)) / min(prices) * 100 if min(prices) > 0 else 0
+        }
+
+    async def close(self):
+        """بستن اتصال‌های صرافی‌ها"""
+        await asyncio.gather(*(exchange.close() for exchange in self.exchanges.values()))
+
+    def detect_explosive_coins(self, coins_data: List[Dict]) -> List[Dict]:
+        """شناسایی شت‌کوین‌های انفجاری"""
+        return self.screener.run(TickerFrame.from_records(coins_data), EXPLOSIVE_SCREEN)
 
     def calculate_potential(self, coin: Dict) -> str:
         """محاسبه پتانسیل سود"""
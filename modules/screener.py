@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from modules.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+TICKER_COLUMNS = ['price', 'change_24h', 'volume', 'quote_volume', 'high_24h', 'low_24h']
+
+# آستانه‌های برچسب پتانسیل و ریسک (همان منطق calculate_potential و assess_risk)
+POTENTIAL_BUCKETS = [(100, "10x+"), (50, "5x-10x"), (20, "2x-5x")]
+POTENTIAL_DEFAULT = "1x-2x"
+RISK_BUCKETS = [(1000000, "کم"), (100000, "متوسط")]
+RISK_DEFAULT = "بالا"
+
+_COMPARE = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+class TickerFrame:
+    """اسنپ‌شات ستونی تیکرها (هر فیلد یک آرایه NumPy)"""
+
+    def __init__(self, df: pd.DataFrame, timestamp: Optional[str] = None):
+        self.df = df.reset_index(drop=True)
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self._records: Optional[List[Dict]] = None
+
+    @classmethod
+    def from_tickers(cls, tickers: Dict[str, Dict]) -> 'TickerFrame':
+        """ساخت فریم از خروجی fetch_tickers؛ مقادیر None به NaN تبدیل می‌شوند"""
+        values = list(tickers.values())
+
+        def column(key):
+            return np.array([t.get(key) for t in values], dtype=np.float64)
+
+        df = pd.DataFrame({
+            'symbol': list(tickers.keys()),
+            'price': column('last'),
+            'change_24h': column('percentage'),
+            'volume': column('baseVolume'),
+            'quote_volume': column('quoteVolume'),
+            'high_24h': column('high'),
+            'low_24h': column('low'),
+        })
+        return cls(df.sort_values('volume', ascending=False, na_position='last'))
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> 'TickerFrame':
+        df = pd.DataFrame.from_records(list(records))
+        if df.empty:
+            df = pd.DataFrame(columns=['symbol'] + TICKER_COLUMNS)
+        return cls(df)
+
+    @classmethod
+    def from_columns(cls, data: Dict) -> 'TickerFrame':
+        """بازسازی از خروجی to_columns (مثلاً اسنپ‌شات مشترک بین workerها)"""
+        return cls(pd.DataFrame(data['columns']), data['timestamp'])
+
+    def to_columns(self) -> Dict:
+        """همه ستون‌ها به صورت لیست (NaN حفظ می‌شود) به همراه timestamp"""
+        return {'timestamp': self.timestamp, 'columns': self.df.to_dict('list')}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.df[name].to_numpy()
+
+    def head(self, n: int) -> 'TickerFrame':
+        return TickerFrame(self.df.head(n), self.timestamp)
+
+    def to_records(self, df: Optional[pd.DataFrame] = None) -> List[Dict]:
+        """تبدیل به لیست دیکشنری با فرمت قبلی API"""
+        if df is None:
+            if self._records is None:
+                self._records = self._to_records(self.df)
+            return self._records
+        return self._to_records(df)
+
+    def _to_records(self, df: pd.DataFrame) -> List[Dict]:
+        out = df.drop(columns=['quote_volume'], errors='ignore')
+        # NaN در JSON معتبر نیست
+        out = out.astype(object).where(out.notna(), None)
+        records = out.to_dict('records')
+        if 'timestamp' not in out.columns:
+            for record in records:
+                record['timestamp'] = self.timestamp
+        return records
+
+@dataclass(frozen=True)
+class Rule:
+    """یک قانون غربالگری: مقایسه (> < ...)، بازه (between) یا رتبه (top/bottom)"""
+    field: str
+    op: str
+    value: object = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Rule':
+        value = data.get('value')
+        if isinstance(value, list):
+            value = tuple(value)
+        return cls(data['field'], data['op'], value)
+
+    def mask(self, frame: TickerFrame) -> np.ndarray:
+        values = frame.column(self.field).astype(np.float64)
+        if self.op in _COMPARE:
+            # مقایسه با NaN همیشه False است؛ داده ناقص از غربال رد می‌شود
+            return _COMPARE[self.op](values, self.value)
+        if self.op == 'between':
+            low, high = self.value
+            return (values >= low) & (values <= high)
+        if self.op in ('top', 'bottom'):
+            # رتبه‌بندی برداری؛ NaNها در انتها قرار می‌گیرند
+            ranked = pd.Series(values).rank(ascending=self.op == 'bottom', method='first', na_option='bottom')
+            return (ranked <= int(self.value)).to_numpy()
+        raise ValueError(f"Unknown rule operator: {self.op}")
+
+@dataclass
+class Screen:
+    """مجموعه قوانین غربالگری که همه باید برقرار باشند"""
+    name: str
+    rules: List[Rule]
+    sort_by: Optional[str] = None
+    descending: bool = True
+    limit: Optional[int] = None
+    annotate: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Screen':
+        return cls(
+            name=data.get('name', 'custom'),
+            rules=[Rule.from_dict(rule) for rule in data.get('rules', [])],
+            sort_by=data.get('sort_by'),
+            descending=data.get('descending', True),
+            limit=data.get('limit'),
+            annotate=data.get('annotate', True)
+        )
+
+EXPLOSIVE_SCREEN = Screen(
+    name='explosive',
+    rules=[
+        Rule('change_24h', '>', 20),   # رشد بیش از 20%
+        Rule('price', '<', 1.0),       # قیمت زیر 1 دلار
+        Rule('volume', '>', 100000),   # حجم معاملات بالا
+    ],
+    sort_by='change_24h'
+)
+
+def bucket(values: np.ndarray, buckets, default: str) -> np.ndarray:
+    """برچسب‌گذاری برداری بر اساس آستانه‌های نزولی (اولین آستانه برقرار)"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.select([values > threshold for threshold, _ in buckets],
+                     [label for _, label in buckets], default=default)
+
+def bucket_potential(change_24h: np.ndarray) -> np.ndarray:
+    return bucket(change_24h, POTENTIAL_BUCKETS, POTENTIAL_DEFAULT)
+
+def bucket_risk(volume: np.ndarray) -> np.ndarray:
+    return bucket(volume, RISK_BUCKETS, RISK_DEFAULT)
+
+class Screener:
+    """اجرای برداری چند غربال روی یک اسنپ‌شات ستونی"""
+
+    def run(self, frame: TickerFrame, screen: Screen) -> List[Dict]:
+        return self.run_many(frame, [screen])[screen.name]
+
+    def run_many(self, frame: TickerFrame, screens: Sequence[Screen]) -> Dict[str, List[Dict]]:
+        """ماسک هر قانون یک بار محاسبه و بین غربال‌ها به اشتراک گذاشته می‌شود"""
+        masks: Dict[Rule, np.ndarray] = {}
+        annotations = None
+        results = {}
+
+        for screen in screens:
+            selected = np.ones(len(frame), dtype=bool)
+            for rule in screen.rules:
+                if rule not in masks:
+                    masks[rule] = rule.mask(frame)
+                selected &= masks[rule]
+
+            df = frame.df[selected]
+            if screen.annotate:
+                if annotations is None:
+                    annotations = pd.DataFrame({
+                        'potential': bucket_potential(frame.column('change_24h')),
+                        'risk_level': bucket_risk(frame.column('volume'))
+                    })
+                df = df.join(annotations[selected])
+            if screen.sort_by:
+                df = df.sort_values(screen.sort_by, ascending=not screen.descending, na_position='last')
+            if screen.limit:
+                df = df.head(screen.limit)
+            results[screen.name] = frame.to_records(df)
+
+        return results
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    term INTEGER NOT NULL
+);
+"""
+
+class SharedState:
+    """وضعیت مشترک بین workerهای uvicorn (SQLite در حالت WAL)
+
+    مقدارها JSON هستند. خواننده‌ها در WAL هیچ‌وقت منتظر نویسنده نمی‌مانند؛ نوشتن‌ها کوتاه و
+    اتمیک‌اند. جدول leases پایه انتخاب رهبر است: هر lease مالک، زمان انقضا (ساعت دیواری
+    مشترک ماشین) و شماره term دارد که با هر تغییر مالک افزایش می‌یابد.
+    """
+
+    def __init__(self, path: str = 'data/shared.db', busy_timeout: float = 2.0):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # isolation_level=None: هر دستور autocommit است و تراکنش‌ها صریحاً با BEGIN IMMEDIATE باز می‌شوند
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=busy_timeout)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+
+    # ---------- key/value ----------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self.db.execute('SELECT value FROM kv WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else default
+
+    def get_with_time(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(مقدار، زمان آخرین نوشتن) یا None"""
+        row = self.db.execute('SELECT value, updated_at FROM kv WHERE key = ?', (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def set(self, key: str, value: Any):
+        self.db.execute('INSERT OR REPLACE INTO kv (key, value, updated_at) VALUES (?, ?, ?)',
+                        (key, json.dumps(value), time.time()))
+
+    def update(self, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """خواندن-تغییر-نوشتن اتمیک بین همه workerها؛ مقدار جدید را برمی‌گرداند"""
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            value = fn(self.get(key, default))
+            self.set(key, value)
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+        return value
+
+    # ---------- lease ----------
+
+    def acquire(self, name: str, owner: str, ttl: float) -> Optional[int]:
+        """گرفتن یا تمدید lease؛ اگر lease مال owner باشد term آن و در غیر این صورت None"""
+        now = time.time()
+        row = self.db.execute(
+            'INSERT INTO leases (name, owner, expires_at, term) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (name) DO UPDATE SET '
+            'term = CASE WHEN leases.owner = excluded.owner THEN leases.term ELSE leases.term + 1 END, '
+            'owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.owner = excluded.owner OR leases.expires_at < ? '
+            'RETURNING term', (name, owner, now + ttl, now)).fetchone()
+        return row[0] if row is not None else None
+
+    def release(self, name: str, owner: str):
+        """آزاد کردن lease (فقط توسط مالک) تا worker دیگری بدون انتظار انقضا رهبر شود"""
+        self.db.execute('UPDATE leases SET expires_at = 0 WHERE name = ? AND owner = ?', (name, owner))
+
+    def lease(self, name: str) -> Optional[Dict]:
+        row = self.db.execute('SELECT owner, expires_at, term FROM leases WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+        return {'owner': row[0], 'expires_at': row[1], 'term': row[2], 'expired': row[1] < time.time()}
+
+    def close(self):
+        self.db.close()
+
+class LeaderElection:
+    """انتخاب یک رهبر بین workerها با lease زمان‌دار در SharedState
+
+    رهبر هر renew_interval ثانیه lease را تمدید می‌کند. خود رهبر فقط تا ttl - renew_interval
+    ثانیه بعد از آخرین تمدید موفق خود را رهبر می‌داند، یعنی پیش از آنکه lease برای
+    workerهای دیگر منقضی شود کنار می‌رود. on_elected و on_demoted کوروتین‌هایی هستند که
+    هنگام رسیدن به رهبری و از دست دادن آن اجرا می‌شوند (مثلاً شروع و توقف حلقه‌های ترید).
+    """
+
+    def __init__(self, state: SharedState, name: str = 'leader', ttl: float = 15.0, renew_interval: float = 5.0,
+                 on_elected: Optional[Callable[[], Awaitable[None]]] = None,
+                 on_demoted: Optional[Callable[[], Awaitable[None]]] = None):
+        self.state = state
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.term: Optional[int] = None
+        self._valid_until = 0.0
+        self.elections = 0
+        self.demotions = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.term is not None and time.monotonic() < self._valid_until
+
+    async def campaign(self) -> bool:
+        """یک دور گرفتن/تمدید lease؛ وضعیت رهبری را برمی‌گرداند"""
+        started = time.monotonic()
+        term = self.state.acquire(self.name, self.owner, self.ttl)
+        if term is None:
+            await self._demote()
+            return False
+        self._valid_until = started + self.ttl - self.renew_interval
+        if self.term != term:
+            # رهبری جدید (یا term تازه پس از از دست دادن lease)
+            await self._demote()
+            self.term = term
+            self.elections += 1
+            if self.on_elected is not None:
+                await self.on_elected()
+        return True
+
+    async def _demote(self):
+        if self.term is None:
+            return
+        self.term = None
+        self.demotions += 1
+        if self.on_demoted is not None:
+            await self.on_demoted()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.campaign()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in leader election: {e}")
+                if self.term is not None and not self.is_leader:
+                    await self._demote()
+            await asyncio.sleep(self.renew_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """توقف حلقه، کنار رفتن از رهبری و آزاد کردن lease"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        was_leader = self.term is not None
+        await self._demote()
+        if was_leader:
+            self.state.release(self.name, self.owner)
+
+    def stats(self) -> Dict:
+        return {
+            'owner': self.owner,
+            'is_leader': self.is_leader,
+            'term': self.term,
+            'lease': self.state.lease(self.name),
+            'ttl': self.ttl,
+            'renew_interval': self.renew_interval,
+            'elections': self.elections,
+            'demotions': self.demotions,
+            'errors': self.errors
+        }
+
+# نمونه مشترک هر worker؛ همه workerها همان فایل را باز می‌کنند
+shared_state = SharedState(os.environ.get('SHARED_STATE_PATH', 'data/shared.db'))
@@ -0,0 +1,53 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from modules import lazy
+
+class StartupReport:
+    """زمان‌بندی مراحل راه‌اندازی (import، lifespan و گرم‌کردن پس‌زمینه)
+
+    زمان‌ها نسبت به اولین import همین ماژول اندازه‌گیری می‌شوند؛ main.py آن را پیش از بقیه
+    ماژول‌ها import می‌کند.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+        self.background: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+
+    def mark(self, name: str):
+        """ثبت مرحله‌ای که از علامت قبلی تا اکنون طول کشیده"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def ready(self):
+        """سرور آماده پاسخ‌گویی است"""
+        self.mark('lifespan')
+        self.ready_at = self._last - self.started
+
+    @contextmanager
+    def phase(self, name: str):
+        """زمان‌بندی یک کار پس‌زمینه (جدا از مراحل متوالی راه‌اندازی)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.background[name] = time.perf_counter() - started
+
+    def to_dict(self) -> Dict:
+        return {
+            'phases': {name: round(seconds, 4) for name, seconds in self.phases},
+            'ready_at': round(self.ready_at, 4) if self.ready_at is not None else None,
+            'background': {name: round(seconds, 4) for name, seconds in self.background.items()},
+            'lazy_imports': {name: round(seconds, 4) for name, seconds in lazy.load_times.items()}
+        }
+
+    def summary(self) -> str:
+        phases = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases)
+        return f"Startup: {phases}; ready after {(self.ready_at or 0) * 1000:.0f}ms"
+
+startup_report = StartupReport()
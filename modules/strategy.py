@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+BUY, HOLD, SELL = 1, 0, -1
+ACTIONS = {BUY: "BUY", HOLD: "HOLD", SELL: "SELL"}
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """پارامترهای استراتژی کراس اوور میانگین متحرک با فیلتر RSI"""
+    fast: int = 20
+    slow: int = 50
+    rsi_period: int = 14
+    rsi_upper: float = 70
+    rsi_lower: float = 30
+    stop_loss_pct: float = 0.05
+    take_profit_pct: float = 0.08
+
+def decide(sma_fast: float, sma_slow: float, rsi: float, price: float,
+           params: StrategyParams = StrategyParams()) -> Tuple[str, float, float, float, str]:
+    """تصمیم معاملاتی برای یک کندل: (action, confidence, stop_loss, take_profit, reason)"""
+    if sma_fast > sma_slow and rsi < params.rsi_upper:
+        return (
+            "BUY",
+            min(0.8, (sma_fast - sma_slow) / sma_slow * 100),
+            price * (1 - params.stop_loss_pct),
+            price * (1 + params.take_profit_pct),
+            "روند صعودی - کراس اوور میانگین متحرک"
+        )
+    if sma_fast < sma_slow and rsi > params.rsi_lower:
+        return (
+            "SELL",
+            min(0.8, (sma_slow - sma_fast) / sma_fast * 100),
+            price * (1 + params.stop_loss_pct),
+            price * (1 - params.take_profit_pct),
+            "روند نزولی - کراس اوور میانگین متحرک"
+        )
+    return "HOLD", 0.5, 0, 0, "روند خنثی - عدم سیگنال واضح"
+
+def signal_array(sma_fast: np.ndarray, sma_slow: np.ndarray, rsi: np.ndarray,
+                 params: StrategyParams = StrategyParams()) -> np.ndarray:
+    """نسخه برداری decide برای کل سری (1=BUY، 0=HOLD، -1=SELL)"""
+    buy = (sma_fast > sma_slow) & (rsi < params.rsi_upper)
+    sell = ~buy & (sma_fast < sma_slow) & (rsi > params.rsi_lower)
+    return buy.astype(np.int8) - sell.astype(np.int8)
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import websockets
+
+BINANCE_STREAM_URL = 'wss://stream.binance.com:9443/ws'
+ALL_MINI_TICKERS = '!miniTicker@arr'
+
+# پسوندهای ارز مظنه برای تبدیل شناسه بایننس (BTCUSDT) به نماد یکپارچه (BTC/USDT)
+QUOTE_ASSETS = ('USDT', 'FDUSD', 'USDC', 'TUSD', 'BUSD', 'BTC', 'ETH', 'BNB', 'EUR', 'TRY')
+
+class TickerTable:
+    """جدول آخرین تیکر همه نمادها که از جریان WebSocket پر می‌شود
+
+    هر به‌روزرسانی یک dict تازه جایگزین مقدار قبلی می‌کند (هیچ‌وقت درجا تغییر نمی‌کند)،
+    پس خواننده‌ها بدون قفل همیشه یک تیکر کامل و سازگار می‌بینند.
+    """
+
+    def __init__(self, max_age: float = 15.0):
+        self.max_age = max_age
+        self._tickers: Dict[str, Dict] = {}
+        self.watched: Set[str] = set()
+        self._watch_listeners: List[Callable[[Set[str]], None]] = []
+        self.updates = 0
+        self.last_update: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._tickers)
+
+    def update(self, symbol: str, ticker: Dict):
+        ticker['received_at'] = time.time()
+        self._tickers[symbol] = ticker
+        self.updates += 1
+        self.last_update = ticker['received_at']
+
+    def update_trade(self, symbol: str, price: float, timestamp: int):
+        """قیمت آخرین معامله؛ بقیه فیلدهای تیکر از مقدار قبلی کپی می‌شوند"""
+        previous = self._tickers.get(symbol)
+        ticker = dict(previous) if previous else {'symbol': symbol}
+        ticker['last'] = price
+        ticker['timestamp'] = timestamp
+        self.update(symbol, ticker)
+
+    def get(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """آخرین تیکر یا None اگر وجود نداشته باشد یا قدیمی‌تر از max_age باشد"""
+        ticker = self._tickers.get(symbol)
+        limit = self.max_age if max_age is None else max_age
+        if ticker is None or time.time() - ticker['received_at'] > limit:
+            return None
+        return ticker
+
+    def price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        ticker = self.get(symbol, max_age)
+        return ticker.get('last') if ticker else None
+
+    def snapshot(self, symbols: Optional[Iterable[str]] = None, max_age: Optional[float] = None) -> Dict[str, Dict]:
+        """تیکرهای تازه (همه یا فقط symbols) با همان ساختار خروجی fetch_tickers"""
+        limit = self.max_age if max_age is None else max_age
+        cutoff = time.time() - limit
+        tickers = self._tickers
+        keys = tickers.keys() if symbols is None else symbols
+        out = {}
+        for symbol in keys:
+            ticker = tickers.get(symbol)
+            if ticker is not None and ticker['received_at'] >= cutoff:
+                out[symbol] = ticker
+        return out
+
+    def is_live(self, max_age: Optional[float] = None) -> bool:
+        limit = self.max_age if max_age is None else max_age
+        return self.last_update is not None and time.time() - self.last_update <= limit
+
+    def watch(self, symbols: Iterable[str]):
+        """درخواست جریان معاملات برای نمادهایی که قیمت لحظه‌ای‌تر لازم دارند (مثل پوزیشن‌های باز)"""
+        new = set(symbols) - self.watched
+        if new:
+            self.watched |= new
+            for listener in self._watch_listeners:
+                listener(new)
+
+    def unwatch(self, symbols: Iterable[str]):
+        self.watched -= set(symbols)
+
+    def on_watch(self, listener: Callable[[Set[str]], None]):
+        self._watch_listeners.append(listener)
+
+    def stats(self) -> Dict:
+        return {
+            'symbols': len(self._tickers),
+            'watched': sorted(self.watched),
+            'updates': self.updates,
+            'age': time.time() - self.last_update if self.last_update else None
+        }
+
+def binance_symbol(market_id: str, markets: Optional[Dict[str, str]] = None) -> str:
+    """BTCUSDT -> BTC/USDT"""
+    if markets and market_id in markets:
+        return markets[market_id]
+    for quote in QUOTE_ASSETS:
+        if market_id.endswith(quote) and len(market_id) > len(quote):
+            return f'{market_id[:-len(quote)]}/{quote}'
+    return market_id
+
+def binance_stream_name(symbol: str, kind: str = 'trade') -> str:
+    """BTC/USDT -> btcusdt@trade"""
+    return symbol.split(':')[0].replace('/', '').lower() + '@' + kind
+
+def parse_mini_ticker(message: Dict, markets: Optional[Dict[str, str]] = None) -> Dict:
+    """تبدیل 24hrMiniTicker بایننس به ساختار تیکر ccxt"""
+    last = float(message['c'])
+    open_ = float(message['o'])
+    return {
+        'symbol': binance_symbol(message['s'], markets),
+        'timestamp': message.get('E'),
+        'last': last,
+        'open': open_,
+        'high': float(message['h']),
+        'low': float(message['l']),
+        'baseVolume': float(message['v']),
+        'quoteVolume': float(message['q']),
+        'change': last - open_,
+        'percentage': (last - open_) / open_ * 100 if open_ else None,
+    }
+
+class TickerStream:
+    """اتصال دائمی WebSocket به جریان تیکر و معاملات بایننس و پر کردن TickerTable
+
+    با هر قطع اتصال (یا سکوت طولانی‌تر از stale_timeout) با backoff نمایی دوباره وصل می‌شود
+    و همه اشتراک‌ها (تیکر همه نمادها + معاملات نمادهای watch شده) دوباره ثبت می‌شوند.
+    """
+
+    def __init__(self, table: TickerTable, url: str = BINANCE_STREAM_URL, stale_timeout: float = 30.0,
+                 min_backoff: float = 0.5, max_backoff: float = 30.0, markets: Optional[Dict[str, str]] = None):
+        self.table = table
+        self.url = url
+        self.stale_timeout = stale_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.markets = markets  # نگاشت شناسه بایننس به نماد یکپارچه (اختیاری)
+        self._connection = None
+        self._task: Optional[asyncio.Task] = None
+        self._request_id = 0
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        table.on_watch(self._on_watch)
+
+    def streams(self) -> List[str]:
+        return [ALL_MINI_TICKERS] + [binance_stream_name(symbol) for symbol in sorted(self.table.watched)]
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None, ping_interval=20) as connection:
+                    self._connection = connection
+                    self.connected = True
+                    self.connects += 1
+                    if self.connects > 1:
+                        self.reconnects += 1
+                    await self._subscribe(self.streams())
+                    attempt = 0
+                    await self._consume(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f'{type(e).__name__}: {e}'
+            finally:
+                self._connection = None
+                self.connected = False
+            # backoff نمایی با jitter تا همه کلاینت‌ها هم‌زمان دوباره وصل نشوند
+            delay = min(self.max_backoff, self.min_backoff * 2 ** attempt)
+            attempt += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _consume(self, connection):
+        while True:
+            raw = await asyncio.wait_for(connection.recv(), self.stale_timeout)
+            self.messages += 1
+            self._dispatch(json.loads(raw))
+
+    def _dispatch(self, message):
+        if isinstance(message, list):
+            for item in message:
+                if item.get('e') == '24hrMiniTicker':
+                    ticker = parse_mini_ticker(item, self.markets)
+                    self.table.update(ticker['symbol'], ticker)
+        elif isinstance(message, dict) and message.get('e') == 'trade':
+            self.table.update_trade(binance_symbol(message['s'], self.markets), float(message['p']), message.get('T'))
+
+    async def _subscribe(self, streams: List[str]):
+        if self._connection is None or not streams:
+            return
+        self._request_id += 1
+        await self._connection.send(json.dumps({'method': 'SUBSCRIBE', 'params': streams, 'id': self._request_id}))
+
+    def _on_watch(self, symbols: Set[str]):
+        # اگر وصل نباشیم، در اتصال بعدی از روی table.watched ثبت می‌شوند
+        if self._connection is not None:
+            asyncio.ensure_future(self._subscribe([binance_stream_name(symbol) for symbol in sorted(symbols)]))
+
+    def stats(self) -> Dict:
+        return {
+            'url': self.url,
+            'connected': self.connected,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'messages': self.messages,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'table': self.table.stats()
+        }
+
+# جدول مشترک بین اسکنر، تریدر و داشبورد
+ticker_table = TickerTable()
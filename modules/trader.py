@@ -0,0 +1,456 @@
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import time
+from dataclasses import dataclass
+import json
+from modules.exchange import AsyncExchange
+from modules.ratelimit import PRIORITY_MONITORING
+from modules.candles import CandleStore, candle_store as default_candle_store
+from modules import indicators
+from modules.indicators import IndicatorEngine, indicator_engine as default_indicator_engine
+from modules.strategy import StrategyParams, decide
+from modules.stream import TickerTable, ticker_table as default_ticker_table
+from modules.positions import Position, PositionBook
+from modules.ledger import TradeLedger
+from modules.orders import PRIORITY_CLOSE, BalanceCache, OrderPipeline, OrderRequest
+from modules.shared_state import LeaderElection, SharedState, shared_state as default_shared_state
+
+@dataclass
+class TradeSignal:
+    symbol: str
+    action: str  # BUY, SELL, HOLD
+    confidence: float
+    price: float
+    stop_loss: float
+    take_profit: float
+    timestamp: str
+    reason: str
+
+class AutoTrader:
+    def __init__(self, api_key: str = "", secret: str = "", candle_store: Optional[CandleStore] = None,
+                 indicator_engine: Optional[IndicatorEngine] = None, ticker_table: Optional[TickerTable] = None,
+                 position_book: Optional[PositionBook] = None, ledger: Optional[TradeLedger] = None,
+                 state: Optional[SharedState] = None, monitor_interval: float = 5.0):
+        self.exchange = AsyncExchange('binance', {
+            'apiKey': api_key,
+            'secret': secret,
+            'sandbox': True,  # حالت تست
+            'enableRateLimit': True
+        }, priority=PRIORITY_MONITORING)
+        
+        self.candles = candle_store or default_candle_store
+        self.indicators = indicator_engine or default_indicator_engine
+        # قیمت لحظه‌ای از جریان WebSocket؛ در صورت قدیمی بودن از REST گرفته می‌شود
+        self.tickers = ticker_table or default_ticker_table
+        # پوزیشن‌های باز (بازیابی‌شده از ژورنال) و ایندکس حد ضرر/سود آن‌ها
+        self.positions = position_book if position_book is not None else PositionBook()
+        self.triggers = self.positions.triggers
+        self.tickers.watch(self.positions.symbols())
+        # تاریخچه دائمی سفارش‌ها و معاملات بسته‌شده با معیارهای عملکرد
+        self.ledger = ledger if ledger is not None else TradeLedger()
+        # موجودی محلی (تطبیق دوره‌ای با صرافی) و صف سفارش‌ها با worker و شناسه سمت کلاینت
+        self.balance = BalanceCache(self.exchange)
+        self.orders = OrderPipeline(self.exchange, self.balance)
+        # trading_enabled و آمار رهبر در وضعیت مشترک بین workerها نگه داشته می‌شوند
+        self.state = state or default_shared_state
+        # بدون انتخاب رهبر (اجرای تک‌پردازه) همین نمونه رهبر است
+        self.leader: Optional[LeaderElection] = None
+        self.monitor_interval = monitor_interval
+        self.monitor_errors = 0
+        # ثبت‌های دفتر/ژورنال ناموفق برای پوزیشن‌هایی که سفارش بستنشان اجرا شده؛ بدون ارسال دوباره سفارش تکرار می‌شوند
+        self.record_errors = 0
+        self._unrecorded: List[Tuple[str, Callable[[], Any]]] = []
+        self._monitor_task: Optional[asyncio.Task] = None
+        self.max_position_size = 1000  # حداکثر سایز پوزیشن (USDT)
+        self.risk_per_trade = 0.02  # 2% ریسک در هر معامله
+        # آستانه‌های RSI و درصد حد ضرر/سود؛ میانگین‌ها از موتور اندیکاتور (20/50/14) خوانده می‌شوند
+        self.strategy = StrategyParams()
+        self.signal_concurrency = 10  # حداکثر آنالیز هم‌زمان در درخواست‌های گروهی
+        self.signal_timeout = 15.0  # سقف زمان آنالیز هر ارز (ثانیه)
+        
+    @property
+    def trading_enabled(self) -> bool:
+        return bool(self.state.get('trading.enabled', False))
+
+    @trading_enabled.setter
+    def trading_enabled(self, enabled: bool):
+        self.state.set('trading.enabled', bool(enabled))
+
+    def toggle_trading(self) -> bool:
+        """تغییر اتمیک trading_enabled (دو toggle هم‌زمان در دو worker یکدیگر را خنثی نمی‌کنند)"""
+        return self.state.update('trading.enabled', lambda enabled: not enabled, False)
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader is None or self.leader.is_leader
+
+    # ---------- رهبری ----------
+
+    def use_leader(self, leader: LeaderElection):
+        """فقط رهبر سفارش ثبت می‌کند و حلقه مانیتورینگ را اجرا می‌کند"""
+        self.leader = leader
+        leader.on_elected = self.take_leadership
+        leader.on_demoted = self.step_down
+
+    async def take_leadership(self):
+        """بازخوانی پوزیشن‌ها و معیارها از دیسک (نوشته‌شده توسط رهبر قبلی) و شروع مانیتورینگ"""
+        self.positions.reload()
+        self.ledger.reload_metrics()
+        self.tickers.watch(self.positions.symbols())
+        self.publish_stats()
+        self.start()
+
+    async def step_down(self):
+        await self.stop()
+        self.positions.close_journal()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.monitor_positions()
+                self.publish_stats()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.monitor_errors += 1
+                print(f"Error in position monitoring: {e}")
+            await asyncio.sleep(self.monitor_interval)
+
+    def start(self):
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            await asyncio.gather(self._monitor_task, return_exceptions=True)
+            self._monitor_task = None
+
+    # ---------- آنالیز ----------
+
+    async def analyze_market(self, symbol: str) -> TradeSignal:
+        """آنالیز بازار و تولید سیگنال معاملاتی"""
+        try:
+            return await self._generate_signal(symbol)
+            
+        except Exception as e:
+            print(f"Error in market analysis: {e}")
+            return TradeSignal(symbol, "HOLD", 0.1, 0, 0, 0, datetime.now().isoformat(), f"Error: {str(e)}")
+    
+    async def analyze_many(self, symbols: List[str], concurrency: Optional[int] = None,
+                           timeout: Optional[float] = None) -> Dict:
+        """آنالیز هم‌زمان چند ارز با سقف هم‌زمانی و timeout برای هر ارز"""
+        semaphore = asyncio.Semaphore(concurrency or self.signal_concurrency)
+        timeout = timeout or self.signal_timeout
+
+        async def analyze(symbol: str):
+            async with semaphore:
+                return await asyncio.wait_for(self._generate_signal(symbol), timeout)
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(analyze(symbol) for symbol in symbols), return_exceptions=True)
+        elapsed = time.monotonic() - started
+
+        signals, errors = [], {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, asyncio.TimeoutError):
+                errors[symbol] = f"Timed out after {timeout}s"
+            elif isinstance(result, Exception):
+                errors[symbol] = str(result) or type(result).__name__
+            else:
+                signals.append(result)
+
+        return {
+            "signals": signals,
+            "errors": errors,
+            "requested": len(symbols),
+            "analyzed": len(signals),
+            "failed": len(errors),
+            "elapsed": round(elapsed, 3),
+            "symbols_per_second": round(len(symbols) / elapsed, 2) if elapsed > 0 else None
+        }
+    
+    async def _generate_signal(self, symbol: str) -> TradeSignal:
+        """تولید سیگنال (خطاها به فراخوان منتقل می‌شوند)"""
+        # دریافت داده‌های قیمت
+        await self.candles.sync(self.exchange, symbol, '1h', history=100)
+        key = (self.exchange.exchange_id, symbol, '1h')
+        candles = self.candles.load(key)
+        if not len(candles):
+            raise ValueError(f"No candles available for {symbol}")
+        
+        current_price = float(candles[-1, 4])
+        
+        # اندیکاتورها از موتور مشترک (محاسبه افزایشی برای کندل‌های جدید)
+        values = self.indicators.latest(key, candles)
+        
+        # استراتژی Moving Average Crossover
+        sma_20 = values['sma_20']
+        sma_50 = values['sma_50']
+        rsi = values['rsi_14']
+        
+        # تولید سیگنال
+        action, confidence, stop_loss, take_profit, reason = decide(sma_20, sma_50, rsi, current_price, self.strategy)
+        
+        return TradeSignal(
+            symbol=symbol,
+            action=action,
+            confidence=confidence,
+            price=current_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            timestamp=datetime.now().isoformat(),
+            reason=reason
+        )
+    
+    def calculate_rsi(self, prices, period=14):
+        """محاسبه RSI"""
+        return indicators.rsi(prices, period)
+    
+    def calculate_position_size(self, signal: TradeSignal, balance: float) -> float:
+        """محاسبه سایز پوزیشن بر اساس مدیریت ریسک"""
+        risk_amount = balance * self.risk_per_trade
+        price_diff = abs(signal.price - signal.stop_loss)
+        
+        if price_diff > 0:
+            position_size = risk_amount / price_diff
+            return min(position_size, self.max_position_size)
+        return 0
+    
+    async def execute_trade(self, signal: TradeSignal):
+        """اجرای معامله بر اساس سیگنال"""
+        if not self.trading_enabled or signal.action == "HOLD":
+            return {"status": "skipped", "reason": "Trading disabled or HOLD signal"}
+        if not self.is_leader:
+            return {"status": "skipped", "reason": "Not the trading leader"}
+        
+        try:
+            usdt_balance = await self.balance.get()
+            
+            if usdt_balance < 10:  # حداقل موجودی
+                return {"status": "failed", "reason": "Insufficient balance"}
+            
+            position_size = self.calculate_position_size(signal, usdt_balance)
+            
+            if position_size <= 0:
+                return {"status": "failed", "reason": "Invalid position size"}
+            
+            # رزرو مبلغ سفارش تا سیگنال‌های هم‌زمان بیش از موجودی سفارش ندهند
+            cost = position_size * signal.price if signal.action == "BUY" else 0.0
+            if not self.balance.reserve(cost):
+                return {"status": "failed", "reason": "Insufficient balance"}
+            if not self.is_leader:
+                # رهبری در حین خواندن موجودی از دست رفت
+                self.balance.release(cost)
+                return {"status": "skipped", "reason": "Not the trading leader"}
+            
+            # اجرای سفارش از طریق صف سفارش‌ها
+            order = await self.orders.execute(OrderRequest(
+                symbol=signal.symbol,
+                side=signal.action,
+                amount=position_size,
+                price=signal.price,
+                reserve=cost
+            ))
+            
+            # ثبت پوزیشن
+            position = Position(
+                symbol=signal.symbol,
+                side=signal.action,
+                amount=position_size,
+                entry_price=signal.price,
+                current_price=signal.price,
+                stop_loss=signal.stop_loss,
+                take_profit=signal.take_profit,
+                pnl=0,
+                timestamp=datetime.now().isoformat()
+            )
+            self.positions.open(position)
+            self.ledger.record_fill(signal.symbol, signal.action, 'open', position_size,
+                                    order.get('average') or signal.price, order['id'], position.id)
+            self.publish_stats()
+            # جریان معاملات این نماد برای مانیتورینگ سریع‌تر پوزیشن
+            self.tickers.watch([signal.symbol])
+            
+            return {
+                "status": "success",
+                "order_id": order['id'],
+                "symbol": signal.symbol,
+                "action": signal.action,
+                "amount": position_size,
+                "price": signal.price,
+                "position": position
+            }
+            
+        except Exception as e:
+            return {"status": "failed", "reason": str(e)}
+    
+    async def monitor_positions(self):
+        """مانیتورینگ پوزیشن‌های باز
+
+        برای هر نماد فقط یک قیمت خوانده می‌شود (جدول زنده یا یک fetch_tickers گروهی) و ایندکس
+        تریگرها فقط پوزیشن‌هایی را برمی‌گرداند که قیمت از حد ضرر/سودشان عبور کرده است.
+        بستن پوزیشن‌ها هم‌زمان انجام می‌شود.
+        """
+        self.retry_records()
+        if not len(self.triggers):
+            return []
+        
+        # دریافت قیمت فعلی (جدول زنده، در غیر این صورت یک درخواست REST برای همه نمادهای باقی‌مانده)
+        symbols = self.triggers.symbols()
+        prices = {}
+        for symbol in symbols:
+            price = self.tickers.price(symbol)
+            if price is not None:
+                prices[symbol] = price
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            try:
+                tickers = await self.exchange.fetch_tickers(missing)
+                prices.update({symbol: t['last'] for symbol, t in tickers.items() if t.get('last') is not None})
+            except Exception as e:
+                print(f"Error monitoring positions {missing}: {e}")
+        
+        fired = self.triggers.update_prices(prices)
+        if not fired:
+            return []
+        
+        # خارج کردن از ایندکس قبل از ارسال سفارش تا پاس هم‌زمان دیگری دوباره آن را نبندد
+        for position, _ in fired:
+            self.triggers.remove(position)
+            position.current_price = prices[position.symbol]
+            if position.side == "BUY":
+                position.pnl = (position.current_price - position.entry_price) * position.amount
+            else:
+                position.pnl = (position.entry_price - position.current_price) * position.amount
+        
+        updates = await asyncio.gather(*(self.close_position(position, reason) for position, reason in fired))
+        
+        for (position, reason), update in zip(fired, updates):
+            if update["status"] == "closed":
+                try:
+                    self.positions.close(position, reason)
+                except Exception as e:
+                    # پوزیشن از ایندکس خارج شده؛ فقط خط ژورنال دوباره نوشته می‌شود
+                    self._defer_record(f"journal close {position.id}", e,
+                                       lambda p=position, r=reason: self.positions.write_close(p.id, r))
+            else:
+                # بستن ناموفق؛ پوزیشن در ایندکس می‌ماند تا در پاس بعد دوباره تلاش شود
+                self.triggers.add(position)
+        return list(updates)
+    
+    async def close_position(self, position: Position, reason: str):
+        """بستن پوزیشن"""
+        # lease ممکن است وسط پاس مانیتورینگ منقضی شده باشد؛ رهبر جدید همین پوزیشن را از ژورنال می‌بندد
+        if not self.is_leader:
+            return {
+                "status": "close_failed",
+                "symbol": position.symbol,
+                "reason": "Not the trading leader",
+                "timestamp": datetime.now().isoformat()
+            }
+        try:
+            order = await self.orders.execute(OrderRequest(
+                symbol=position.symbol,
+                side="SELL" if position.side == "BUY" else "BUY",
+                amount=position.amount,
+                price=position.current_price,
+                priority=PRIORITY_CLOSE
+            ))
+        except Exception as e:
+            return {
+                "status": "close_failed",
+                "symbol": position.symbol,
+                "reason": str(e),
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        # سفارش بستن اجرا شده و پوزیشن بسته است؛ خطای ثبت در دفتر نباید باعث ارسال دوباره سفارش شود
+        # ثبت در دفتر معاملات با قیمت اجرای سفارش (در نبود آن، آخرین قیمت مانیتورینگ)
+        exit_price = order.get('average') or order.get('price') or position.current_price
+        try:
+            trade = self.ledger.record_close(position, exit_price, reason, order['id'])
+            position.pnl = trade['pnl']
+            recorded = True
+        except Exception as e:
+            self._defer_record(f"ledger close {position.id}", e,
+                               lambda: self.ledger.record_close(position, exit_price, reason, order['id']))
+            direction = 1 if position.side == "BUY" else -1
+            position.pnl = (exit_price - position.entry_price) * position.amount * direction
+            recorded = False
+        
+        return {
+            "status": "closed",
+            "symbol": position.symbol,
+            "side": position.side,
+            "reason": reason,
+            "pnl": position.pnl,
+            "order_id": order['id'],
+            "recorded": recorded,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _defer_record(self, name: str, error: Exception, record: Callable[[], Any]):
+        self.record_errors += 1
+        print(f"Error recording {name}, will retry: {error}")
+        self._unrecorded.append((name, record))
+    
+    def retry_records(self):
+        """تکرار ثبت‌های دفتر/ژورنال ناموفق (سفارش‌ها دوباره ارسال نمی‌شوند)"""
+        pending, self._unrecorded = self._unrecorded, []
+        for name, record in pending:
+            try:
+                record()
+            except Exception as e:
+                print(f"Error recording {name}, will retry: {e}")
+                self._unrecorded.append((name, record))
+    
+    def publish_stats(self):
+        """انتشار آمار رهبر در وضعیت مشترک برای workerهای دیگر"""
+        self.state.set('trading.stats', self._trading_stats())
+
+    def get_trading_stats(self) -> Dict:
+        """دریافت آمار معاملاتی (در workerهای غیررهبر از آخرین آمار منتشرشده رهبر)"""
+        if not self.is_leader:
+            stats = self.state.get('trading.stats')
+            if stats is not None:
+                return {**stats, "trading_enabled": self.trading_enabled}
+        return self._trading_stats()
+
+    def get_performance(self) -> Dict:
+        """معیارهای عملکرد کل و هر نماد؛ غیررهبر معیارها را از دیتابیس مشترک بازخوانی می‌کند"""
+        if not self.is_leader:
+            self.ledger.reload_metrics()
+        return {"overall": self.ledger.metrics(), "symbols": self.ledger.per_symbol()}
+
+    def _trading_stats(self) -> Dict:
+        # معاملات بسته‌شده از دفتر معاملات و پوزیشن‌های باز از دفتر پوزیشن (هر دو O(1))
+        book = self.positions.stats()
+        performance = self.ledger.metrics()
+        
+        return {
+            "total_trades": performance['trades'],
+            "active_positions": book['open_positions'],
+            "total_pnl": performance['realized_pnl'] + book['unrealized_pnl'],
+            "realized_pnl": performance['realized_pnl'],
+            "unrealized_pnl": book['unrealized_pnl'],
+            "win_rate": performance['win_rate'],
+            "profit_factor": performance['profit_factor'],
+            "max_drawdown": performance['max_drawdown'],
+            "unrecorded_closes": len(self._unrecorded),
+            "trading_enabled": self.trading_enabled,
+            "last_update": datetime.now().isoformat()
+        }
+
+    async def close(self):
+        """بستن اتصال صرافی، ژورنال پوزیشن‌ها و دفتر معاملات"""
+        await self.stop()
+        await self.orders.close()
+        self.positions.close_journal()
+        self.ledger.close()
+        await self.exchange.close()
+
+# نمونه استفاده
+auto_trader = AutoTrader()
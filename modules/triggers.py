@@ -0,0 +1,173 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Tuple
+
+class _Levels:
+    """سطوح قیمت مرتب‌شده با شیء متناظر هر سطح (دو لیست موازی برای bisect روی float)"""
+
+    __slots__ = ('prices', 'items')
+
+    def __init__(self):
+        self.prices: List[float] = []
+        self.items: List[object] = []
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def add(self, price: float, item):
+        index = bisect_right(self.prices, price)
+        self.prices.insert(index, price)
+        self.items.insert(index, item)
+
+    def remove(self, price: float, item) -> bool:
+        index = bisect_left(self.prices, price)
+        while index < len(self.prices) and self.prices[index] == price:
+            if self.items[index] is item:
+                del self.prices[index]
+                del self.items[index]
+                return True
+            index += 1
+        return False
+
+    def at_or_above(self, price: float) -> List:
+        return self.items[bisect_left(self.prices, price):]
+
+    def at_or_below(self, price: float) -> List:
+        return self.items[:bisect_right(self.prices, price)]
+
+class _SymbolTriggers:
+    __slots__ = ('below', 'above', 'buy_entries', 'sell_entries', 'net_amount', 'net_cost', 'count', 'winning')
+
+    def __init__(self):
+        # below: وقتی قیمت به سطح یا پایین‌تر برسد فعال می‌شود (حد ضرر BUY، حد سود SELL)
+        # above: وقتی قیمت به سطح یا بالاتر برسد فعال می‌شود (حد سود BUY، حد ضرر SELL)
+        self.below = _Levels()
+        self.above = _Levels()
+        # قیمت‌های ورود مرتب‌شده برای شمارش پوزیشن‌های در سود با bisect
+        self.buy_entries: List[float] = []
+        self.sell_entries: List[float] = []
+        # برای PnL باز بدون پیمایش پوزیشن‌ها: pnl = price * net_amount - net_cost
+        self.net_amount = 0.0
+        self.net_cost = 0.0
+        self.count = 0
+        self.winning = 0  # پوزیشن‌های در سود با آخرین قیمت
+
+    def pnl(self, price: float) -> float:
+        return price * self.net_amount - self.net_cost
+
+    def count_winning(self, price: float) -> int:
+        return (bisect_left(self.buy_entries, price)
+                + len(self.sell_entries) - bisect_right(self.sell_entries, price))
+
+class TriggerIndex:
+    """ایندکس حد ضرر/سود پوزیشن‌های باز به تفکیک نماد
+
+    هر به‌روزرسانی قیمت با دو جستجوی دودویی فقط تریگرهایی را برمی‌گرداند که قیمت از آن‌ها
+    عبور کرده است (O(log n + k))، بدون پیمایش همه پوزیشن‌های آن نماد. PnL باز و تعداد
+    پوزیشن‌های در سود به صورت مجموع جاری نگه داشته می‌شوند و خواندن آن‌ها O(1) است.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[str, _SymbolTriggers] = {}
+        self.prices: Dict[str, float] = {}
+        self.count = 0
+        self.open_pnl = 0.0
+        self.winning = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def _begin(self, symbol: str, entry: _SymbolTriggers):
+        # سهم فعلی نماد از مجموع‌های جاری کم می‌شود و بعد از تغییر دوباره اضافه می‌شود
+        price = self.prices.get(symbol)
+        if price is not None:
+            self.open_pnl -= entry.pnl(price)
+            self.winning -= entry.winning
+
+    def _end(self, symbol: str, entry: _SymbolTriggers):
+        price = self.prices.get(symbol)
+        if price is not None:
+            entry.winning = entry.count_winning(price)
+            self.open_pnl += entry.pnl(price)
+            self.winning += entry.winning
+
+    def add(self, position):
+        entry = self._symbols.get(position.symbol)
+        if entry is None:
+            entry = self._symbols[position.symbol] = _SymbolTriggers()
+        self._begin(position.symbol, entry)
+        direction = 1 if position.side == "BUY" else -1
+        if direction == 1:
+            entry.below.add(position.stop_loss, position)
+            entry.above.add(position.take_profit, position)
+            insort(entry.buy_entries, position.entry_price)
+        else:
+            entry.above.add(position.stop_loss, position)
+            entry.below.add(position.take_profit, position)
+            insort(entry.sell_entries, position.entry_price)
+        entry.net_amount += direction * position.amount
+        entry.net_cost += direction * position.amount * position.entry_price
+        entry.count += 1
+        self.count += 1
+        self._end(position.symbol, entry)
+
+    def remove(self, position) -> bool:
+        entry = self._symbols.get(position.symbol)
+        if entry is None:
+            return False
+        direction = 1 if position.side == "BUY" else -1
+        stop_side, target_side = (entry.below, entry.above) if direction == 1 else (entry.above, entry.below)
+        self._begin(position.symbol, entry)
+        if not stop_side.remove(position.stop_loss, position):
+            self._end(position.symbol, entry)
+            return False
+        target_side.remove(position.take_profit, position)
+        entries = entry.buy_entries if direction == 1 else entry.sell_entries
+        del entries[bisect_left(entries, position.entry_price)]
+        entry.net_amount -= direction * position.amount
+        entry.net_cost -= direction * position.amount * position.entry_price
+        entry.count -= 1
+        self.count -= 1
+        if entry.count == 0:
+            del self._symbols[position.symbol]
+            self.prices.pop(position.symbol, None)
+        else:
+            self._end(position.symbol, entry)
+        return True
+
+    def crossed(self, symbol: str, price: float) -> List[Tuple[object, str]]:
+        """ثبت قیمت جدید و برگرداندن (position، دلیل) برای تریگرهای عبورکرده"""
+        entry = self._symbols.get(symbol)
+        if entry is None:
+            return []
+        self._begin(symbol, entry)
+        self.prices[symbol] = price
+        self._end(symbol, entry)
+        fired = {}
+        for position in entry.below.at_or_above(price):
+            fired[id(position)] = (position, "STOP_LOSS" if position.side == "BUY" else "TAKE_PROFIT")
+        for position in entry.above.at_or_below(price):
+            reason = "TAKE_PROFIT" if position.side == "BUY" else "STOP_LOSS"
+            # اگر هر دو حد هم‌زمان فعال شوند، حد ضرر اولویت دارد (مثل منطق قبلی)
+            if id(position) not in fired or reason == "STOP_LOSS":
+                fired[id(position)] = (position, reason)
+        return list(fired.values())
+
+    def update_prices(self, prices: Dict[str, float]) -> List[Tuple[object, str]]:
+        fired = []
+        for symbol, price in prices.items():
+            fired.extend(self.crossed(symbol, price))
+        return fired
+
+    def unrealized_pnl(self) -> float:
+        """PnL باز با آخرین قیمت‌های ثبت‌شده"""
+        return self.open_pnl
+
+    def winning_positions(self) -> int:
+        """تعداد پوزیشن‌های باز در سود با آخرین قیمت‌ها"""
+        return self.winning
@@ -0,0 +1,367 @@
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Sequence
+
+from modules.lazy import lazy_import
+
+# فقط FeedSource به aiohttp نیاز دارد
+aiohttp = lazy_import('aiohttp')
+
+WINDOWS = {'1h': 3600, '24h': 86400}
+
+def transaction_time(transaction: Dict) -> float:
+    """زمان تراکنش به ثانیه epoch (timestamp عددی یا رشته ISO)"""
+    value = transaction.get('timestamp')
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+# ---------- منابع تراکنش ----------
+
+class WhaleSource(ABC):
+    """منبع تراکنش‌های نهنگ؛ fetch در هر دوره تراکنش‌های جدید را برمی‌گرداند"""
+
+    @abstractmethod
+    async def fetch(self) -> List[Dict]:
+        ...
+
+    async def close(self):
+        pass
+
+class RandomWhaleSource(WhaleSource):
+    """تولیدکننده تصادفی (همان شبیه‌سازی قبلی WhaleTracker)"""
+
+    def __init__(self, watchlist: Sequence[str], batch: int = 15, seed: Optional[int] = None):
+        self.watchlist = list(watchlist)
+        self.batch = batch
+        self._random = random.Random(seed)
+
+    async def fetch(self) -> List[Dict]:
+        return [self.transaction() for _ in range(self.batch)]
+
+    def transaction(self) -> Dict:
+        rnd = self._random
+        symbol = rnd.choice(self.watchlist)
+        amount = rnd.uniform(100, 5000)
+        usd_value = amount * rnd.uniform(100, 50000)
+        return {
+            'hash': ''.join(rnd.choices('abcdef0123456789', k=64)),
+            'symbol': symbol,
+            'amount': round(amount, 2),
+            'usd_value': round(usd_value, 2),
+            'from_address': f'{"1" if symbol == "BTC" else "0x"}{"".join(rnd.choices("abcdef0123456789", k=32))}',
+            'to_address': f'{"3" if symbol == "BTC" else "0x"}{"".join(rnd.choices("abcdef0123456789", k=32))}',
+            'timestamp': (datetime.now() - timedelta(seconds=rnd.uniform(0, 60))).isoformat(),
+            'type': rnd.choice(['EXCHANGE_INFLOW', 'EXCHANGE_OUTFLOW', 'WHALE_TRANSFER']),
+            'exchange': rnd.choice(['Binance', 'Coinbase', 'Kraken', 'FTX', 'KuCoin'])
+        }
+
+class JsonlReplaySource(WhaleSource):
+    """بازپخش تراکنش‌های ذخیره‌شده در فایل JSONL (هر خط یک تراکنش)
+
+    با batch_size در هر fetch حداکثر همین تعداد خط خوانده می‌شود؛ با loop=True در پایان
+    فایل از ابتدا تکرار می‌شود. با retime=True زمان هر تراکنش زمان بازپخش آن می‌شود تا
+    داده قدیمی در پنجره‌های غلتان دیده شود.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, loop: bool = False, retime: bool = False):
+        self.path = path
+        self.batch_size = batch_size
+        self.loop = loop
+        self.retime = retime
+        self.passes = 0  # تعداد دفعات برگشت به ابتدای فایل
+        self._file = None
+
+    async def fetch(self) -> List[Dict]:
+        if self._file is None:
+            self._file = open(self.path, encoding='utf-8')
+        batch = []
+        wrapped = False
+        while len(batch) < self.batch_size:
+            line = self._file.readline()
+            if not line:
+                # حداکثر یک بار برگشت به ابتدا در هر fetch (فایل کوچک یا بدون خط معتبر)
+                if not self.loop or wrapped:
+                    break
+                wrapped = True
+                self.passes += 1
+                self._file.seek(0)
+                continue
+            line = line.strip()
+            if line:
+                try:
+                    transaction = json.loads(line)
+                except ValueError:
+                    continue
+                if self.retime and self.passes and transaction.get('hash'):
+                    # بازپخش دوباره تراکنش جدید حساب شود، نه تکراری
+                    transaction['hash'] = f"{transaction['hash']}#{self.passes}"
+                batch.append(transaction)
+        if self.retime:
+            now = datetime.now().isoformat()
+            for transaction in batch:
+                transaction['timestamp'] = now
+        return batch
+
+    async def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class FeedSource(WhaleSource):
+    """فید HTTP محلی که لیست JSON تراکنش‌های جدید را برمی‌گرداند"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def fetch(self) -> List[Dict]:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        async with self._session.get(self.url) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        return payload.get('transactions', []) if isinstance(payload, dict) else payload
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+def transaction_key(transaction: Dict) -> str:
+    """کلید یکتای تراکنش: hash، یا در نبود آن ترکیب فیلدهای اصلی"""
+    return transaction.get('hash') or '{}:{}:{}:{}:{}'.format(
+        transaction.get('symbol'), transaction.get('from_address'), transaction.get('to_address'),
+        transaction.get('amount'), transaction.get('timestamp'))
+
+class RecentKeys:
+    """مجموعه محدود کلیدهای دیده‌شده برای حذف تراکنش‌های تکراری (قدیمی‌ترین‌ها اول حذف می‌شوند)"""
+
+    def __init__(self, capacity: int = 100000):
+        self.capacity = capacity
+        self._keys: 'OrderedDict[str, None]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def seen(self, key: str) -> bool:
+        """True اگر کلید قبلاً دیده شده باشد؛ در غیر این صورت ثبت می‌شود"""
+        if key in self._keys:
+            return True
+        self._keys[key] = None
+        if len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+        return False
+
+class AlertBuffer:
+    """بافر حلقوی هشدارها با شماره ترتیبی (seq) صعودی
+
+    کلاینت آخرین seq دیده‌شده را نگه می‌دارد و با since فقط هشدارهای جدید را می‌گیرد؛
+    هزینه خواندن متناسب با تعداد هشدارهای جدید است نه اندازه بافر.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self._alerts: Deque[Dict] = deque(maxlen=capacity)
+        self.last_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def append(self, alert: Dict, seq: Optional[int] = None) -> Dict:
+        """افزودن هشدار؛ seq داده‌شده (مثلاً seq مشترک تراکنش بین workerها) باید صعودی باشد"""
+        self.last_seq = self.last_seq + 1 if seq is None else seq
+        alert['seq'] = self.last_seq
+        self._alerts.append(alert)
+        return alert
+
+    def since(self, seq: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """هشدارهای با seq بزرگ‌تر از seq به ترتیب صعودی (با limit فقط جدیدترین‌ها)"""
+        alerts = []
+        for alert in reversed(self._alerts):
+            if seq is not None and alert['seq'] <= seq or limit is not None and len(alerts) >= limit:
+                break
+            alerts.append(alert)
+        alerts.reverse()
+        return alerts
+
+# ---------- تجمیع جریانی ----------
+
+class WhaleTotals:
+    """شمارنده‌های قابل جمع و تفریق یک سطل زمانی یا یک پنجره"""
+
+    __slots__ = ('count', 'value', 'inflow', 'outflow', 'transfers', 'inflow_value', 'outflow_value',
+                 'coins', 'exchanges')
+
+    def __init__(self):
+        self.count = 0
+        self.value = 0.0
+        self.inflow = 0
+        self.outflow = 0
+        self.transfers = 0
+        self.inflow_value = 0.0
+        self.outflow_value = 0.0
+        self.coins: Dict[str, List[float]] = {}  # coin -> [count, value, inflow, outflow]
+        self.exchanges: Dict[str, int] = {}
+
+    def add(self, transaction: Dict, sign: int = 1):
+        value = float(transaction.get('usd_value', 0))
+        kind = transaction.get('type', '')
+        self.count += sign
+        self.value += sign * value
+        coin = self.coins.setdefault(transaction.get('symbol', 'N/A'), [0, 0.0, 0, 0])
+        coin[0] += sign
+        coin[1] += sign * value
+        if 'INFLOW' in kind:
+            self.inflow += sign
+            self.inflow_value += sign * value
+            coin[2] += sign
+        elif 'OUTFLOW' in kind:
+            self.outflow += sign
+            self.outflow_value += sign * value
+            coin[3] += sign
+        elif kind == 'WHALE_TRANSFER':
+            self.transfers += sign
+        exchange = transaction.get('exchange')
+        if exchange:
+            self.exchanges[exchange] = self.exchanges.get(exchange, 0) + sign
+
+    def merge(self, other: 'WhaleTotals', sign: int = 1):
+        self.count += sign * other.count
+        self.value += sign * other.value
+        self.inflow += sign * other.inflow
+        self.outflow += sign * other.outflow
+        self.transfers += sign * other.transfers
+        self.inflow_value += sign * other.inflow_value
+        self.outflow_value += sign * other.outflow_value
+        for symbol, values in other.coins.items():
+            coin = self.coins.setdefault(symbol, [0, 0.0, 0, 0])
+            for i, v in enumerate(values):
+                coin[i] += sign * v
+            if coin[0] <= 0:
+                del self.coins[symbol]
+        for exchange, count in other.exchanges.items():
+            total = self.exchanges.get(exchange, 0) + sign * count
+            if total > 0:
+                self.exchanges[exchange] = total
+            else:
+                self.exchanges.pop(exchange, None)
+
+class _Bucket(WhaleTotals):
+    __slots__ = ('start',)
+
+    def __init__(self, start: float):
+        super().__init__()
+        self.start = start
+
+class _Window:
+    __slots__ = ('seconds', 'buckets', 'totals')
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.buckets: Deque[_Bucket] = deque()
+        self.totals = WhaleTotals()
+
+class RollingAggregator:
+    """پنجره‌های غلتان (پیش‌فرض 1h و 24h) روی سطل‌های زمانی ثابت
+
+    هر تراکنش فقط به سطل خودش و مجموع پنجره‌ها اضافه می‌شود و سطل‌های منقضی از مجموع
+    کم می‌شوند، پس خواندن آمار پنجره به تعداد تراکنش‌ها وابسته نیست (فقط به تعداد ارزها).
+    """
+
+    def __init__(self, windows: Optional[Dict[str, float]] = None, bucket_seconds: float = 60.0):
+        self.bucket_seconds = bucket_seconds
+        self.windows = {name: _Window(seconds) for name, seconds in (windows or WINDOWS).items()}
+        self._buckets: Dict[float, _Bucket] = {}
+        self.ingested = 0
+        self.dropped = 0  # تراکنش‌های قدیمی‌تر از بزرگ‌ترین پنجره
+
+    def add(self, transaction: Dict, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        timestamp = transaction_time(transaction)
+        start = timestamp - timestamp % self.bucket_seconds
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            if max(w.seconds for w in self.windows.values()) < now - start:
+                self.dropped += 1
+                return
+            bucket = self._buckets[start] = _Bucket(start)
+            for window in self.windows.values():
+                if now - start <= window.seconds:
+                    self._insert(window, bucket)
+        bucket.add(transaction)
+        for window in self.windows.values():
+            if now - start <= window.seconds:
+                window.totals.add(transaction)
+        self.ingested += 1
+
+    @staticmethod
+    def _insert(window: _Window, bucket: _Bucket):
+        # تقریباً همیشه جدیدترین سطل است؛ تراکنش دیرهنگام در جای مرتب خودش قرار می‌گیرد
+        if not window.buckets or window.buckets[-1].start < bucket.start:
+            window.buckets.append(bucket)
+            return
+        index = len(window.buckets)
+        while index > 0 and window.buckets[index - 1].start > bucket.start:
+            index -= 1
+        window.buckets.insert(index, bucket)
+
+    def expire(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        for window in self.windows.values():
+            while window.buckets and now - window.buckets[0].start > window.seconds:
+                window.totals.merge(window.buckets.popleft(), sign=-1)
+        horizon = max(w.seconds for w in self.windows.values())
+        for start in [s for s in self._buckets if now - s > horizon]:
+            del self._buckets[start]
+
+    def totals(self, window: str = '1h', now: Optional[float] = None) -> WhaleTotals:
+        self.expire(now)
+        return self.windows[window].totals
+
+    def summary(self, window: str = '1h', now: Optional[float] = None) -> Dict:
+        return summarize(self.totals(window, now), window)
+
+    def stats(self) -> Dict:
+        self.expire()
+        return {
+            'ingested': self.ingested,
+            'dropped': self.dropped,
+            'buckets': len(self._buckets),
+            'windows': {name: window.totals.count for name, window in self.windows.items()}
+        }
+
+def summarize(totals: WhaleTotals, window: Optional[str] = None) -> Dict:
+    """خروجی تحلیل (همان ساختار قبلی analyze_whale_behavior) از روی مجموع‌ها"""
+    most_active = max(totals.coins.items(), key=lambda item: item[1][0])[0] if totals.coins else 'N/A'
+    return {
+        'window': window,
+        'total_whale_activity': totals.count,
+        'total_value_moved': totals.value,
+        'most_active_coin': most_active,
+        'inflow_vs_outflow': {
+            'inflow': totals.inflow,
+            'outflow': totals.outflow,
+            'transfers': totals.transfers
+        },
+        'inflow_value': totals.inflow_value,
+        'outflow_value': totals.outflow_value,
+        'top_exchanges': dict(sorted(totals.exchanges.items(), key=lambda item: item[1], reverse=True)),
+        'coins': {symbol: {'count': int(v[0]), 'value': v[1], 'inflow': int(v[2]), 'outflow': int(v[3])}
+                  for symbol, v in totals.coins.items()}
+    }
+
+def source_from_spec(spec: str, watchlist: Sequence[str]) -> WhaleSource:
+    """ساخت منبع از رشته تنظیمات: random، jsonl:<path> یا آدرس http(s) فید محلی"""
+    if spec.startswith('jsonl:'):
+        return JsonlReplaySource(spec[len('jsonl:'):], loop=True, retime=True)
+    if spec.startswith(('http://', 'https://')):
+        return FeedSource(spec)
+    return RandomWhaleSource(watchlist)
@@ -0,0 +1,228 @@
+import asyncio
+import heapq
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+import time
+
+from modules.whale_stream import (AlertBuffer, RandomWhaleSource, RecentKeys, RollingAggregator, WhaleSource,
+                                  WhaleTotals, summarize, transaction_key)
+
+# کلید لاگ تراکنش‌های منتشرشده رهبر در SharedState
+SHARED_TRANSACTIONS_KEY = 'whales.transactions'
+
+class WhaleTracker:
+    """ردیاب نهنگ‌ها: تراکنش‌ها از یک منبع قابل تعویض خوانده و در پنجره‌های غلتان تجمیع می‌شوند
+
+    حلقه پس‌زمینه هر poll_interval ثانیه تراکنش‌های جدید را از منبع می‌گیرد؛ احساسات و
+    سطح ریسک از مجموع‌های آماده پنجره خوانده می‌شوند و به تعداد تراکنش‌ها وابسته نیستند.
+
+    با use_shared_state فقط رهبر از منبع می‌خواند و تراکنش‌ها را با seq مشترک در SharedState
+    منتشر می‌کند؛ همه workerها از همان لاگ ingest می‌کنند، پس seq هشدارها (و cursor since
+    کلاینت) در همه workerها یکسان است.
+    """
+
+    # آستانه‌های هشدار (دلار)
+    ALERT_THRESHOLD = 5000000
+    HIGH_PRIORITY_THRESHOLD = 10000000
+
+    def __init__(self, source: Optional[WhaleSource] = None, poll_interval: float = 30.0, recent_size: int = 1000,
+                 alert_capacity: int = 500):
+        self.whale_watchlist = [
+            'BTC', 'ETH', 'BNB', 'ADA', 'XRP', 'SOL', 'DOT', 'DOGE', 'AVAX', 'MATIC'
+        ]
+        self.source = source or RandomWhaleSource(self.whale_watchlist)
+        self.poll_interval = poll_interval
+        self.aggregator = RollingAggregator()
+        self.recent: Deque[Dict] = deque(maxlen=recent_size)
+        self.alerts = AlertBuffer(alert_capacity)
+        self.seen = RecentKeys()
+        self.duplicates = 0
+        self.fetch_errors = 0
+        # اجرای چند-worker: لاگ مشترک تراکنش‌ها (آخرین shared_log_size مورد) و seq آخرین تراکنش خوانده‌شده
+        self.state = None
+        self.is_leader: Callable[[], bool] = lambda: True
+        self.shared_log_size = recent_size
+        self.shared_seq = 0
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- دریافت از منبع ----------
+
+    def ingest(self, transactions: List[Dict]) -> int:
+        """افزودن تراکنش‌های جدید (تکراری‌ها بر اساس hash حذف می‌شوند) و ساخت هشدارهایشان"""
+        now = time.time()
+        added = 0
+        for transaction in transactions:
+            if self.seen.seen(transaction_key(transaction)):
+                self.duplicates += 1
+                continue
+            self.aggregator.add(transaction, now)
+            self.recent.append(transaction)
+            if transaction.get('usd_value', 0) > self.ALERT_THRESHOLD:
+                self.alerts.append(self._alert(transaction), transaction.get('seq'))
+            added += 1
+        return added
+
+    async def poll_once(self) -> int:
+        if self.state is None:
+            return self.ingest(await self.source.fetch())
+        if self.is_leader():
+            self._publish(await self.source.fetch())
+        return self._ingest_shared()
+
+    def use_shared_state(self, state, is_leader: Callable[[], bool]):
+        """اشتراک تراکنش‌ها بین workerها از طریق SharedState (فقط رهبر از منبع می‌خواند)"""
+        self.state = state
+        self.is_leader = is_leader
+
+    def _publish(self, transactions: List[Dict]):
+        """افزودن تراکنش‌ها به لاگ مشترک با seq صعودی (اتمیک بین workerها)"""
+        if not transactions:
+            return
+
+        def append(log: List[Dict]) -> List[Dict]:
+            seq = log[-1]['seq'] if log else 0
+            for transaction in transactions:
+                seq += 1
+                log.append({**transaction, 'seq': seq})
+            return log[-self.shared_log_size:]
+
+        self.state.update(SHARED_TRANSACTIONS_KEY, append, [])
+
+    def _ingest_shared(self) -> int:
+        log = self.state.get(SHARED_TRANSACTIONS_KEY, [])
+        new = [transaction for transaction in log if transaction['seq'] > self.shared_seq]
+        if new:
+            self.shared_seq = new[-1]['seq']
+        return self.ingest(new)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.fetch_errors += 1
+                print(f"Error fetching whale transactions: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.source.close()
+
+    def use_source(self, source: WhaleSource):
+        self.source = source
+
+    # ---------- خواندن ----------
+
+    def get_whale_transactions(self, min_value: int = 100000, limit: int = 10) -> List[Dict]:
+        """دریافت تراکنش‌های بزرگ (نهنگ‌ها) از بین تراکنش‌های اخیر"""
+        return heapq.nlargest(limit, (t for t in self.recent if t.get('usd_value', 0) >= min_value),
+                              key=lambda t: t['usd_value'])
+
+    def _totals(self, transactions: Optional[List[Dict]], window: str) -> WhaleTotals:
+        if transactions is None:
+            return self.aggregator.totals(window)
+        totals = WhaleTotals()
+        for transaction in transactions:
+            totals.add(transaction)
+        return totals
+
+    def analyze_whale_behavior(self, transactions: Optional[List[Dict]] = None, window: str = '1h') -> Dict:
+        """تحلیل رفتار نهنگ‌ها (بدون ورودی: پنجره غلتان window)"""
+        totals = self._totals(transactions, window)
+        if not totals.count:
+            return {}
+        analysis = summarize(totals, window if transactions is None else None)
+        analysis['risk_level'] = self._risk_level(totals)
+        return analysis
+
+    def calculate_risk_level(self, transactions: Optional[List[Dict]] = None, window: str = '1h') -> str:
+        """محاسبه سطح ریسک بر اساس فعالیت نهنگ‌ها"""
+        return self._risk_level(self._totals(transactions, window))
+
+    @staticmethod
+    def _risk_level(totals: WhaleTotals) -> str:
+        if not totals.count:
+            return "پایین"
+
+        if totals.value > 50000000 or totals.outflow > 5:
+            return "بسیار بالا"
+        elif totals.value > 10000000 or totals.outflow > 3:
+            return "بالا"
+        elif totals.value > 1000000:
+            return "متوسط"
+        else:
+            return "پایین"
+
+    def get_whale_sentiment(self, window: str = '1h') -> Dict:
+        """دریافت احساسات بازار از فعالیت نهنگ‌ها"""
+        totals = self.aggregator.totals(window)
+        
+        sentiment = {
+            'bullish_signals': 0,
+            'bearish_signals': 0,
+            'neutral_signals': 0,
+            'overall_sentiment': 'خنثی',
+            'window': window
+        }
+        
+        if totals.count:
+            inflow_ratio = totals.inflow / totals.count
+            
+            if inflow_ratio > 0.6:
+                sentiment.update({
+                    'bullish_signals': 3,
+                    'overall_sentiment': 'صعودی'
+                })
+            elif inflow_ratio < 0.4:
+                sentiment.update({
+                    'bearish_signals': 3,
+                    'overall_sentiment': 'نزولی'
+                })
+            else:
+                sentiment.update({
+                    'neutral_signals': 3,
+                    'overall_sentiment': 'خنثی'
+                })
+        
+        return sentiment
+
+    def stats(self) -> Dict:
+        return {
+            'source': type(self.source).__name__,
+            'running': self._task is not None and not self._task.done(),
+            'fetch_errors': self.fetch_errors,
+            'recent': len(self.recent),
+            'duplicates': self.duplicates,
+            'alerts': len(self.alerts),
+            'last_alert_seq': self.alerts.last_seq,
+            'shared_seq': self.shared_seq if self.state is not None else None,
+            **self.aggregator.stats()
+        }
+
+    def _alert(self, transaction: Dict) -> Dict:
+        return {
+            'type': 'WHALE_ALERT',
+            'symbol': transaction['symbol'],
+            'value': transaction['usd_value'],
+            'message': f'🚨 فعالیت نهنگ: {transaction["amount"]} {transaction["symbol"]} (${transaction["usd_value"]:,.0f})',
+            'timestamp': datetime.now().isoformat(),
+            'priority': 'HIGH' if transaction['usd_value'] > self.HIGH_PRIORITY_THRESHOLD else 'MEDIUM',
+            'hash': transaction_key(transaction)
+        }
+
+    def get_whale_alerts(self, since: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """هشدارهای فعالیت نهنگ‌ها با seq بعد از since (هشدارها فقط هنگام دریافت تراکنش ساخته می‌شوند)"""
+        return self.alerts.since(since, limit)
+
+# نمونه استفاده
+whale_tracker = WhaleTracker()
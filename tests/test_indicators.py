@@ -0,0 +1,29 @@
+import numpy as np
+
+from modules.indicators import INDICATOR_NAMES, IndicatorEngine
+
+HOUR = 3600 * 1000
+
+def make_candles(start: int, count: int) -> np.ndarray:
+    timestamps = start + np.arange(count) * HOUR
+    closes = 100 + np.arange(count, dtype=np.float64)
+    return np.column_stack([timestamps, closes, closes + 1, closes - 1, closes, np.ones(count)])
+
+def test_empty_state_is_backfilled_when_closed_candles_arrive():
+    engine = IndicatorEngine()
+    key = ('binance', 'BTC/USDT', '1h')
+    start = 1_700_000_000_000
+
+    # فراخوان اول فقط کندل در حال شکل‌گیری را دارد و state خالی ذخیره می‌شود
+    forming = make_candles(start, 1)
+    engine.series(key, forming, now=start + HOUR / 2)
+
+    candles = make_candles(start, 2)
+    out = engine.series(key, candles, now=start + 2 * HOUR)
+
+    assert set(out) == set(INDICATOR_NAMES)
+    assert all(len(values) == 2 for values in out.values())
+    state, closed = engine.update(key, candles, now=start + 2 * HOUR)
+    assert closed == 2
+    assert state.count == 2
+    assert state.first_timestamp == start
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+from modules.fake_exchange import FakeExchangeServer
+from modules.stream import TickerStream, TickerTable
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        await asyncio.sleep(0.01)
+
+def test_ticker_stream_reconnects_and_resubscribes():
+    async def run():
+        server = FakeExchangeServer(interval=0.02)
+        url = await server.start()
+        table = TickerTable()
+        table.watch(['BTC/USDT'])
+        stream = TickerStream(table, url, min_backoff=0.01, max_backoff=0.05)
+        stream.start()
+        try:
+            await wait_for(lambda: table.price('ETH/USDT') is not None and table.get('BTC/USDT') is not None)
+            assert server.subscribe_requests == 1
+
+            await server.drop_connections()
+            await wait_for(lambda: stream.reconnects == 1 and stream.connected)
+
+            # اتصال جدید همان اشتراک‌ها (تیکر همه نمادها و معاملات نماد watch شده) را دوباره ثبت می‌کند
+            await wait_for(lambda: list(server._subscriptions.values()) == [{'!miniTicker@arr', 'btcusdt@trade'}])
+            assert server.connections == 2
+            assert server.subscribe_requests == 2
+
+            reconnected_at = time.time()
+            await wait_for(lambda: table.get('ETH/USDT')['received_at'] > reconnected_at
+                           and table.get('BTC/USDT')['received_at'] > reconnected_at)
+            assert abs(table.price('ETH/USDT') - server.prices['ETHUSDT']) / server.prices['ETHUSDT'] < 0.05
+        finally:
+            await stream.stop()
+            await server.stop()
+
+    asyncio.run(run())